@@ -0,0 +1,160 @@
+"""Admission control: reject work with a retry hint instead of overloading the server"""
+import math
+import threading
+from contextlib import contextmanager
+
+from metrics import ADMISSION_REJECTIONS, log_event
+
+# Bounds for Retry-After, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 3600
+
+
+class AdmissionRejected(Exception):
+    """Raised when a limit is reached; retry_after is a whole number of seconds"""
+
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class RateEstimate:
+    """Exponentially weighted moving average of an observed quantity"""
+
+    def __init__(self, initial, alpha=0.2):
+        self.value = initial
+        self.alpha = alpha
+        self.samples = 0
+
+    def observe(self, value):
+        if self.samples == 0:
+            self.value = value
+        else:
+            self.value = self.alpha * value + (1 - self.alpha) * self.value
+        self.samples += 1
+
+
+def clamp_retry_after(seconds):
+    return int(min(max(math.ceil(seconds), MIN_RETRY_AFTER), MAX_RETRY_AFTER))
+
+
+class AdmissionController:
+    """Limits queued jobs and in-flight upload bytes, with a fair share per client
+
+    When several clients are waiting, each may hold at most an equal share
+    of the queue, and every client may queue min_client_jobs jobs even when
+    the queue is full, so one client submitting hundreds of videos cannot
+    lock the others out. A single upload larger than max_upload_bytes is
+    admitted only while no other upload is in flight. A limit of 0
+    disables it.
+    """
+
+    def __init__(self, job_manager, max_queued_jobs=100, max_upload_bytes=0, min_client_jobs=1,
+                 default_job_seconds=60.0, default_upload_rate=10 * 1024 * 1024):
+        self.job_manager = job_manager
+        self.max_queued_jobs = max_queued_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self.min_client_jobs = min_client_jobs
+        self.job_seconds = RateEstimate(default_job_seconds)
+        self.upload_rate = RateEstimate(default_upload_rate)
+        self._uploads = {}
+        self._lock = threading.Lock()
+
+    def observe_job(self, seconds):
+        """Record how long a job ran, for Retry-After estimates"""
+        with self._lock:
+            self.job_seconds.observe(seconds)
+
+    def observe_upload(self, size, seconds):
+        if seconds > 0 and size > 0:
+            with self._lock:
+                self.upload_rate.observe(size / seconds)
+
+    def job_retry_after(self, excess_jobs):
+        """Seconds until excess_jobs queue slots should have drained"""
+        workers = max(self.job_manager.max_workers, 1)
+        return clamp_retry_after(excess_jobs * self.job_seconds.value / workers)
+
+    def admit_jobs(self, client_id, count=1):
+        """Raise AdmissionRejected unless count more jobs from client_id fit in the queue"""
+        if not self.max_queued_jobs:
+            return
+        queued = self.job_manager.queued_by_client()
+        total = sum(queued.values())
+        mine = queued.get(client_id, 0)
+
+        # Every client is guaranteed a few queued jobs of its own
+        if mine + count <= self.min_client_jobs:
+            return
+
+        if total + count > self.max_queued_jobs:
+            self._reject(
+                f"Job queue is full ({total} of {self.max_queued_jobs} queued)",
+                self.job_retry_after(total + count - self.max_queued_jobs),
+                "queue_full",
+                client_id,
+            )
+
+        clients = set(queued) | {client_id}
+        share = max(self.max_queued_jobs // len(clients), self.min_client_jobs)
+        if mine + count > share:
+            # This client's own jobs have to drain first
+            self._reject(
+                f"Too many queued jobs for this client ({mine} queued, fair share is {share})",
+                self.job_retry_after(mine + count - share),
+                "client_share",
+                client_id,
+            )
+
+    @contextmanager
+    def upload(self, client_id, size):
+        """Hold size bytes of the upload budget for client_id while the body is received"""
+        with self._lock:
+            if self.max_upload_bytes:
+                in_flight = sum(held for _, held in self._uploads.values())
+                if in_flight and in_flight + size > self.max_upload_bytes:
+                    self._reject(
+                        f"Too many uploads in progress ({in_flight} bytes in flight)",
+                        (in_flight + size - self.max_upload_bytes) / self.upload_rate.value,
+                        "upload_bytes",
+                        client_id,
+                    )
+                clients = {owner for owner, _ in self._uploads.values()} | {client_id}
+                share = self.max_upload_bytes / len(clients)
+                mine = sum(held for owner, held in self._uploads.values() if owner == client_id)
+                if mine and mine + size > share:
+                    self._reject(
+                        f"Too many uploads in progress for this client ({mine} bytes in flight)",
+                        mine / self.upload_rate.value,
+                        "client_upload_share",
+                        client_id,
+                    )
+            token = object()
+            self._uploads[token] = (client_id, size)
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._uploads[token]
+
+    def stats(self):
+        with self._lock:
+            uploads = list(self._uploads.values())
+        return {
+            "max_queued_jobs": self.max_queued_jobs,
+            "max_upload_bytes": self.max_upload_bytes,
+            "min_client_jobs": self.min_client_jobs,
+            "queued_jobs": self.job_manager.queue_depth(),
+            "upload_bytes_in_flight": sum(size for _, size in uploads),
+            "uploads_in_flight": len(uploads),
+            "estimated_job_seconds": round(self.job_seconds.value, 3),
+            "estimated_upload_rate": round(self.upload_rate.value),
+        }
+
+    @staticmethod
+    def _reject(message, retry_after, reason, client_id):
+        retry_after = clamp_retry_after(retry_after)
+        ADMISSION_REJECTIONS.labels(reason=reason).inc()
+        log_event("admission_rejected", reason=reason, client=client_id, retry_after=retry_after)
+        raise AdmissionRejected(message, retry_after, reason)
@@ -0,0 +1,121 @@
+"""Decode video audio straight into NumPy buffers for Whisper"""
+import subprocess
+import tempfile
+
+import numpy as np
+
+# Whisper expects 16 kHz mono float32 in [-1, 1]
+SAMPLE_RATE = 16000
+
+READ_CHUNK_BYTES = 1024 * 1024
+# Tail of ffmpeg's log kept for the error message
+STDERR_TAIL_BYTES = 4096
+
+
+class AudioExtractionError(Exception):
+    """Raised when ffmpeg cannot decode the audio track"""
+
+
+def probe_duration(video_path):
+    """Duration of a media file in seconds according to ffprobe, or None"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        str(video_path)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        return float(result.stdout.strip())
+    except (OSError, ValueError):
+        return None
+
+
+def allocate_buffer(samples, spill_to_disk, spill_dir=None):
+    """float32 buffer in RAM, or backed by an anonymous temporary file"""
+    if not spill_to_disk:
+        return np.empty(samples, dtype=np.float32)
+    # TemporaryFile is unlinked already; the mapping keeps the data alive
+    # until the array is garbage collected
+    with tempfile.TemporaryFile(dir=spill_dir) as f:
+        return np.memmap(f, dtype=np.float32, mode='w+', shape=(samples,))
+
+
+def load_audio(video_path, memmap_threshold_seconds=None, spill_dir=None, progress_callback=None,
+               max_seconds=None):
+    """Decode the audio of video_path to a 16 kHz mono float32 array
+
+    ffmpeg writes raw s16le PCM to a pipe, which is converted chunk by chunk
+    into one preallocated buffer, so no WAV file touches the disk and Whisper
+    does not have to decode the audio a second time. Inputs longer than
+    memmap_threshold_seconds are buffered in a memory-mapped temporary file
+    instead of RAM. max_seconds stops decoding after that much audio.
+    """
+    duration = probe_duration(video_path)
+    if max_seconds is not None:
+        duration = min(duration, max_seconds) if duration else max_seconds
+    # Leave a second of slack so the estimate rarely needs to grow
+    capacity = int(((duration or 60.0) + 1.0) * SAMPLE_RATE)
+    spill_to_disk = bool(
+        memmap_threshold_seconds is not None and duration and duration > memmap_threshold_seconds
+    )
+    buffer = allocate_buffer(capacity, spill_to_disk, spill_dir)
+
+    cmd = [
+        'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-i', str(video_path),
+        '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+        '-ar', str(SAMPLE_RATE), '-ac', '1',
+    ]
+    if max_seconds is not None:
+        cmd += ['-t', str(max_seconds)]
+    cmd.append('pipe:1')
+    # ffmpeg's log goes to a temporary file rather than a pipe: nothing reads
+    # a pipe until stdout ends, and an input that logs an error on every
+    # frame would fill it and stall ffmpeg while this waits on stdout
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+
+    samples = 0
+    # A sample may straddle two reads; carry the odd byte over
+    leftover = b''
+    try:
+        while True:
+            chunk = process.stdout.read(READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            if leftover:
+                chunk = leftover + chunk
+            usable = len(chunk) - (len(chunk) % 2)
+            leftover = chunk[usable:]
+            pcm = np.frombuffer(chunk, dtype=np.int16, count=usable // 2)
+
+            if samples + len(pcm) > capacity:
+                capacity = max(capacity * 2, samples + len(pcm))
+                grown = allocate_buffer(capacity, spill_to_disk, spill_dir)
+                grown[:samples] = buffer[:samples]
+                buffer = grown
+
+            np.multiply(pcm, 1.0 / 32768.0, out=buffer[samples:samples + len(pcm)], casting='unsafe')
+            samples += len(pcm)
+
+            if progress_callback and duration:
+                progress_callback(samples / (duration * SAMPLE_RATE))
+
+        returncode = process.wait()
+        stderr_file.seek(max(stderr_file.seek(0, 2) - STDERR_TAIL_BYTES, 0))
+        stderr = stderr_file.read().decode('utf-8', errors='replace')
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        process.stdout.close()
+        stderr_file.close()
+
+    if returncode != 0:
+        raise AudioExtractionError(f"FFmpeg error: {stderr}")
+    if samples == 0:
+        raise AudioExtractionError("FFmpeg error: no audio stream decoded")
+
+    return buffer[:samples]
@@ -0,0 +1,139 @@
+"""Resumable multi-part uploads stored on disk until they are completed"""
+import hashlib
+import json
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+
+class UploadError(Exception):
+    """Raised for invalid upload sessions or parts"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSessionStore:
+    """Keeps the parts of in-progress uploads under <root>/<upload_id>/
+
+    Session metadata lives next to the parts in session.json, so an upload
+    can be resumed after a dropped connection or a server restart.
+    """
+
+    def __init__(self, root, max_upload_size, max_part_size, copy_chunk_size=1024 * 1024):
+        self.root = Path(root)
+        self.max_upload_size = max_upload_size
+        self.max_part_size = max_part_size
+        self.copy_chunk_size = copy_chunk_size
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def create(self, filename, content_type, total_size=None):
+        """Start a new upload session and return its metadata"""
+        if total_size is not None and total_size > self.max_upload_size:
+            raise UploadError(f"File exceeds maximum upload size of {self.max_upload_size} bytes", 413)
+
+        session = {
+            "upload_id": str(uuid.uuid4()),
+            "filename": filename,
+            "content_type": content_type,
+            "total_size": total_size,
+            "part_size": self.max_part_size,
+            "created_at": time.time(),
+        }
+        session_dir = self.root / session["upload_id"]
+        session_dir.mkdir()
+        self._write_session(session_dir, session)
+        return session
+
+    def get(self, upload_id):
+        """Return session metadata plus the parts received so far"""
+        session_dir = self._session_dir(upload_id)
+        session = json.loads((session_dir / "session.json").read_text())
+        session["parts"] = self._parts(session_dir)
+        session["received_size"] = sum(part["size"] for part in session["parts"])
+        return session
+
+    def part_path(self, upload_id, part_number):
+        """Temporary path to stream a part into; call commit_part once it is written"""
+        if part_number < 1:
+            raise UploadError("Part numbers start at 1")
+        return self._session_dir(upload_id) / f"part_{part_number:05d}.tmp"
+
+    def commit_part(self, upload_id, part_number, size):
+        """Make a fully written part visible, replacing any earlier attempt"""
+        session_dir = self._session_dir(upload_id)
+        received = sum(part["size"] for part in self._parts(session_dir) if part["part_number"] != part_number)
+        if received + size > self.max_upload_size:
+            self.discard_part(upload_id, part_number)
+            raise UploadError(f"File exceeds maximum upload size of {self.max_upload_size} bytes", 413)
+
+        tmp_path = self.part_path(upload_id, part_number)
+        tmp_path.replace(session_dir / f"part_{part_number:05d}")
+        return {"part_number": part_number, "size": size}
+
+    def discard_part(self, upload_id, part_number):
+        try:
+            self.part_path(upload_id, part_number).unlink()
+        except FileNotFoundError:
+            pass
+
+    def complete(self, upload_id, destination):
+        """Concatenate the parts into destination and drop the session
+
+        Returns (size, sha256 hex digest) of the assembled file.
+        """
+        session = self.get(upload_id)
+        numbers = [part["part_number"] for part in session["parts"]]
+        if not numbers:
+            raise UploadError("No parts uploaded")
+        if numbers != list(range(1, len(numbers) + 1)):
+            missing = sorted(set(range(1, max(numbers) + 1)) - set(numbers))
+            raise UploadError(f"Missing parts: {missing}")
+        if session["total_size"] is not None and session["received_size"] != session["total_size"]:
+            raise UploadError(
+                f"Received {session['received_size']} bytes, expected {session['total_size']}"
+            )
+
+        session_dir = self._session_dir(upload_id)
+        digest = hashlib.sha256()
+        size = 0
+        with open(destination, "wb") as out:
+            for number in numbers:
+                with open(session_dir / f"part_{number:05d}", "rb") as part:
+                    while True:
+                        chunk = part.read(self.copy_chunk_size)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        out.write(chunk)
+                        size += len(chunk)
+
+        shutil.rmtree(session_dir, ignore_errors=True)
+        return size, digest.hexdigest()
+
+    def abort(self, upload_id):
+        shutil.rmtree(self._session_dir(upload_id), ignore_errors=True)
+
+    def _session_dir(self, upload_id):
+        # upload_id comes from the URL, so only accept the UUIDs we hand out
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            raise UploadError("Upload session not found", 404)
+        session_dir = self.root / upload_id
+        if not (session_dir / "session.json").exists():
+            raise UploadError("Upload session not found", 404)
+        return session_dir
+
+    def _parts(self, session_dir):
+        parts = []
+        for path in sorted(session_dir.glob("part_*")):
+            if path.suffix == ".tmp":
+                continue
+            parts.append({"part_number": int(path.name[len("part_"):]), "size": path.stat().st_size})
+        return parts
+
+    def _write_session(self, session_dir, session):
+        (session_dir / "session.json").write_text(json.dumps(session))
@@ -0,0 +1,18 @@
+"""SQLite helpers shared by the on-disk caches and stores"""
+import sqlite3
+from pathlib import Path
+
+
+def connect(path):
+    """Open a SQLite database in WAL mode that may be used from several threads
+
+    Callers still serialize writes with their own lock; WAL lets readers in
+    other connections and processes proceed while a write is in progress.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
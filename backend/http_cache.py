@@ -0,0 +1,141 @@
+"""Conditional, ranged and compressed responses for files served from memory"""
+import gzip
+import hashlib
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent as they are; compressing them barely saves a packet
+COMPRESS_MIN_BYTES = 1024
+
+
+def strong_etag(*parts):
+    """Quoted ETag from the parts that identify one version of a file"""
+    return '"' + hashlib.sha256(":".join(str(part) for part in parts).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(header, etag):
+    """True if an If-None-Match header lists etag (weak comparison, as for GET)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def accepted_encodings(header):
+    """Content codings in an Accept-Encoding header with a non-zero q-value"""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """Best coding both sides support: br if the brotli module is installed, then gzip"""
+    accepted = accepted_encodings(header)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def parse_range(header, size):
+    """(start, end) of a single "bytes=" range, inclusive, or None to send the whole body
+
+    Multiple ranges are answered with the whole body, which HTTP allows.
+    Raises ValueError when the range lies outside the body.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        # A malformed Range header is ignored
+        return None
+    if start is None:
+        # Suffix range: the last N bytes
+        if not end:
+            raise ValueError("Empty suffix range")
+        return max(size - end, 0), size - 1
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise ValueError("Range starts past the end")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def cached_file_response(request, body, etag, media_type, headers=None, cache=None):
+    """Answer a GET for body, a file identified by etag, the way a static file server would
+
+    Sends 304 when If-None-Match matches, 206 for a satisfiable byte range
+    (honouring If-Range), 416 for an unsatisfiable one, and otherwise the
+    body compressed with gzip or brotli when the client accepts it. Each
+    encoding gets its own ETag. Compressed bodies are kept in cache (a
+    subtitles.RenderCache), keyed by ETag and encoding.
+    """
+    headers = dict(headers or {})
+    headers.update({"Accept-Ranges": "bytes", "Vary": "Accept-Encoding"})
+    headers.setdefault("Cache-Control", "no-cache")
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range.strip() != etag:
+        # The client's partial copy is stale; start over with the whole file
+        range_header = None
+
+    # Ranges refer to the uncompressed bytes, so partial responses are never compressed
+    encoding = None
+    if not range_header and len(body) >= COMPRESS_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding:
+        etag = etag[:-1] + f'-{encoding}"'
+    headers["ETag"] = etag
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if range_header:
+        try:
+            byte_range = parse_range(range_header, len(body))
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{len(body)}"
+            return Response(status_code=416, headers=headers)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            return Response(content=body[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+    if encoding:
+        key = f"{etag}:{encoding}"
+        compressed = cache.get(key) if cache is not None else None
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if cache is not None:
+                cache.put(key, compressed)
+        headers["Content-Encoding"] = encoding
+        body = compressed
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,145 @@
+"""Named Whisper inference profiles for CPU-only hosts
+
+A profile bundles the decode options passed to model.transcribe with
+whether the model runs with int8 dynamically quantized Linear layers, so
+a request can trade accuracy for throughput on purpose.
+"""
+import re
+
+import numpy as np
+
+from audio import SAMPLE_RATE
+
+# Length of the silent clip transcribed to warm a freshly loaded model
+WARM_UP_SECONDS = 1
+
+# Whisper detects the language from a single 30 s window of log-Mel features
+DETECTION_SECONDS = 30
+
+# Whisper's temperature fallback: a window whose output looks degenerate
+# (repetitive or low log-probability) is decoded again at the next one
+FULL_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Whisper language codes ("en", "haw", "yue"), accepted as source_language
+LANGUAGE_CODE = re.compile(r"^[a-z]{2,3}$")
+
+INFERENCE_PROFILES = {
+    # int8 weights and greedy decoding with a short fallback; not feeding
+    # the previous text back in also avoids repetition loops
+    "speed": {
+        "quantize": True,
+        "decode": {
+            "beam_size": None,
+            "best_of": 1,
+            "temperature": (0.0, 0.4, 0.8),
+            "condition_on_previous_text": False,
+        },
+    },
+    # Whisper's own defaults
+    "standard": {
+        "quantize": False,
+        "decode": {
+            "beam_size": None,
+            "best_of": 5,
+            "temperature": FULL_FALLBACK,
+            "condition_on_previous_text": True,
+        },
+    },
+    # Beam search, as the Whisper command line does by default
+    "quality": {
+        "quantize": False,
+        "decode": {
+            "beam_size": 5,
+            "best_of": 5,
+            "patience": 1.0,
+            "temperature": FULL_FALLBACK,
+            "condition_on_previous_text": True,
+        },
+    },
+}
+
+
+class ProfileError(Exception):
+    """Raised for an unknown inference profile name"""
+
+
+class LanguageError(Exception):
+    """Raised for a source language that is not a Whisper language code"""
+
+
+def resolve_profile(name, default):
+    name = name or default
+    if name not in INFERENCE_PROFILES:
+        raise ProfileError(f"Unknown inference profile: {name} (use {', '.join(INFERENCE_PROFILES)})")
+    return name
+
+
+def decode_options(name, base=None):
+    """Keyword arguments for model.transcribe under a profile
+
+    fp16 is always off: on CPU Whisper would fall back to fp32 anyway,
+    with a warning on every call.
+    """
+    options = dict(base or {})
+    options.update(INFERENCE_PROFILES[name]["decode"])
+    options["fp16"] = False
+    return options
+
+
+def profile_settings(name, base=None):
+    """Everything a profile changes about the output; reported in job results and part of the cache key"""
+    return dict(decode_options(name, base), quantize=INFERENCE_PROFILES[name]["quantize"])
+
+
+def detect_language(model, audio, top=5):
+    """Spoken language of the first DETECTION_SECONDS of audio
+
+    Runs the encoder once and the decoder for a single token, instead of
+    the full transcription. Returns the language code, its probability,
+    and the top candidates as {code: probability}.
+    """
+    import whisper
+
+    audio = np.ascontiguousarray(audio[:DETECTION_SECONDS * SAMPLE_RATE], dtype=np.float32)
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels)
+    _, probabilities = model.detect_language(mel.to(model.device))
+    ranked = sorted(probabilities.items(), key=lambda item: item[1], reverse=True)[:top]
+    return ranked[0][0], ranked[0][1], dict(ranked)
+
+
+def parse_source_language(source_language):
+    """Normalise a client-supplied spoken language code, or None to detect it"""
+    if not source_language:
+        return None
+    source_language = source_language.strip().lower()
+    if not LANGUAGE_CODE.match(source_language):
+        raise LanguageError(f"Invalid source language: {source_language}")
+    return source_language
+
+
+def reliable_language(detection, min_probability):
+    """The spoken language of a detection if it can be acted on, else None
+
+    A language named by the client is taken as given; a detected one only
+    when Whisper was at least min_probability sure of it, including one
+    stored with a cached transcription. Without a probability it is not
+    relied on.
+    """
+    if detection.get("source") == "client":
+        return detection.get("language")
+    probability = detection.get("probability")
+    if probability is None or probability < min_probability:
+        return None
+    return detection.get("language")
+
+
+def warm_up(model, options):
+    """Transcribe a short silent clip so the first request does not pay for lazy initialisation
+
+    The first forward pass allocates torch's buffers and picks its kernels,
+    and Whisper detects the language and sets up its kv-cache hooks, which
+    together take much longer than the clip itself. Temperature fallback
+    is left out; silence would otherwise be decoded over and over.
+    """
+    silence = np.zeros(WARM_UP_SECONDS * SAMPLE_RATE, dtype=np.float32)
+    model.transcribe(silence, **dict(options, temperature=0.0))
@@ -0,0 +1,221 @@
+"""Background cleanup of uploaded videos and generated subtitles
+
+Files expire after a per-directory TTL, and when the directories together
+exceed a size quota the least recently accessed files are evicted first.
+Access time is recorded explicitly with touch(), so eviction does not
+depend on the filesystem's atime mount options.
+"""
+import asyncio
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import JANITOR_RECLAIMED_BYTES, log_event
+
+
+class ManagedDirectory:
+    """A directory of files the janitor may delete
+
+    Files expire ttl_seconds after their last access; None or 0 disables
+    expiry, but the files still count toward the quota. Subdirectories are
+    ignored unless session_ttl_seconds is set, in which case each one (such
+    as an in-progress multi-part upload) expires that long after its most
+    recent write.
+    """
+
+    def __init__(self, name, path, ttl_seconds=None, session_ttl_seconds=None):
+        self.name = name
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.session_ttl_seconds = session_ttl_seconds
+
+
+def last_access(stat):
+    return max(stat.st_atime, stat.st_mtime)
+
+
+def touch(path):
+    """Record an access to path for LRU eviction without changing its mtime"""
+    try:
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def tree_stats(path):
+    """Total size and newest mtime of the files below path"""
+    size = 0
+    newest = os.stat(path).st_mtime
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            size += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return size, newest
+
+
+def _owner(name):
+    """The job, file or session id a stored name starts with"""
+    return name.split(".", 1)[0]
+
+
+class Janitor:
+    """Deletes expired files and enforces quota_bytes across directories
+
+    protected_ids() is called once per sweep and returns the ids of
+    everything an unfinished job still needs; a file or subdirectory whose
+    name up to the first "." is one of them is not deleted. Files younger than min_age_seconds are never evicted
+    for quota, so outputs being written right now are safe as well.
+    on_delete(directory_name, file_name) is called after each file is
+    deleted.
+    """
+
+    def __init__(self, directories, quota_bytes=None, interval_seconds=600, min_age_seconds=600,
+                 protected_ids=None, on_delete=None):
+        self.directories = directories
+        self.quota_bytes = quota_bytes
+        self.interval_seconds = interval_seconds
+        self.min_age_seconds = min_age_seconds
+        self.protected_ids = protected_ids or set
+        self.on_delete = on_delete
+        self.runs = 0
+        self.deleted_files = 0
+        self.reclaimed_bytes = 0
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._task = None
+
+    async def start(self):
+        """Start sweeping every interval_seconds; call from the application startup hook"""
+        if self.interval_seconds > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await run_in_threadpool(self.sweep)
+            except Exception as e:
+                log_event("janitor_failed", error=str(e))
+
+    def sweep(self):
+        """Run one cleanup pass and return a report of what was deleted"""
+        with self._lock:
+            started = time.time()
+            protected = self.protected_ids()
+            reclaimed = {"ttl": 0, "session_ttl": 0, "quota": 0}
+            deleted = 0
+            candidates = []
+            usage = {}
+
+            for directory in self.directories:
+                usage[directory.name] = 0
+                if not directory.path.exists():
+                    continue
+                for entry in os.scandir(directory.path):
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not directory.session_ttl_seconds:
+                                continue
+                            size, newest = tree_stats(entry.path)
+                            if self._expired(entry.name, newest, directory.session_ttl_seconds, started, protected):
+                                shutil.rmtree(entry.path, ignore_errors=True)
+                                reclaimed["session_ttl"] += size
+                                deleted += 1
+                            else:
+                                usage[directory.name] += size
+                            continue
+                        if not entry.is_file(follow_symlinks=False):
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    if self._expired(entry.name, last_access(stat), directory.ttl_seconds, started, protected):
+                        if self._delete(directory.name, entry):
+                            reclaimed["ttl"] += stat.st_size
+                            deleted += 1
+                        continue
+                    usage[directory.name] += stat.st_size
+                    candidates.append((last_access(stat), stat.st_mtime, stat.st_size, directory.name, entry))
+
+            total = sum(usage.values())
+            if self.quota_bytes and total > self.quota_bytes:
+                # Least recently accessed first
+                for accessed, modified, size, name, entry in sorted(candidates, key=lambda c: c[0]):
+                    if total <= self.quota_bytes:
+                        break
+                    if started - modified < self.min_age_seconds or _owner(entry.name) in protected:
+                        continue
+                    if self._delete(name, entry):
+                        reclaimed["quota"] += size
+                        usage[name] -= size
+                        total -= size
+                        deleted += 1
+
+            for reason, size in reclaimed.items():
+                if size:
+                    JANITOR_RECLAIMED_BYTES.labels(reason=reason).inc(size)
+
+            self.runs += 1
+            self.deleted_files += deleted
+            self.reclaimed_bytes += sum(reclaimed.values())
+            self.last_report = {
+                "started_at": started,
+                "seconds": round(time.time() - started, 3),
+                "deleted_files": deleted,
+                "reclaimed_bytes": sum(reclaimed.values()),
+                "reclaimed_bytes_by_reason": reclaimed,
+                "usage_bytes": usage,
+                "total_bytes": total,
+                "over_quota": bool(self.quota_bytes and total > self.quota_bytes),
+            }
+            log_event("janitor_sweep", **{k: v for k, v in self.last_report.items() if k != "started_at"})
+            return self.last_report
+
+    def stats(self):
+        return {
+            "quota_bytes": self.quota_bytes,
+            "interval_seconds": self.interval_seconds,
+            "directories": [
+                {
+                    "name": directory.name,
+                    "ttl_seconds": directory.ttl_seconds,
+                    "session_ttl_seconds": directory.session_ttl_seconds,
+                }
+                for directory in self.directories
+            ],
+            "runs": self.runs,
+            "deleted_files": self.deleted_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "last_sweep": self.last_report,
+        }
+
+    def _expired(self, name, modified, ttl_seconds, now, protected):
+        return bool(ttl_seconds) and now - modified > ttl_seconds and _owner(name) not in protected
+
+    def _delete(self, directory_name, entry):
+        try:
+            os.remove(entry.path)
+        except OSError:
+            return False
+        if self.on_delete:
+            try:
+                self.on_delete(directory_name, entry.name)
+            except Exception as e:
+                log_event("janitor_on_delete_failed", file=entry.name, error=str(e))
+        return True
@@ -0,0 +1,694 @@
+"""Job queue shared through SQLite by API and worker processes
+
+With APP_ROLE=api the server only puts jobs in this queue, and worker
+processes (worker.py) claim them in priority order, on this machine or on
+others that share the database and the upload, output and cache
+directories. A worker sends heartbeats while it runs a job; a job whose
+worker stops sending them is put back in the queue, up to max_attempts
+times, so a crashed or killed worker does not lose work.
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import db
+from jobs import Job, JOB_QUEUED, JOB_RUNNING, JOB_FAILED, JOB_CANCELLED, FINISHED_STATES, PRIORITIES, run_job
+from metrics import log_event
+
+# Worker-side progress ticks are written back at most this often
+PROGRESS_SAVE_INTERVAL = 1.0
+
+
+class JobQueue:
+    """SQLite table of jobs plus their recorded events and the live workers
+
+    Each row keeps the job's to_dict() form, written by whichever process
+    owns the job, next to the columns used to claim and supervise it.
+    Finished jobs are dropped after retention_seconds; the metadata store
+    keeps them for good.
+    """
+
+    def __init__(self, db_path, heartbeat_timeout=60.0, max_attempts=3, retention_seconds=24 * 3600):
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._conn = db.connect(db_path)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS queue_jobs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    estimated_seconds REAL,
+                    client_id TEXT,
+                    state TEXT NOT NULL,
+                    worker_id TEXT,
+                    claim_token TEXT,
+                    heartbeat_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS queue_jobs_claim ON queue_jobs (status, priority, estimated_seconds);
+                CREATE INDEX IF NOT EXISTS queue_jobs_claim_token ON queue_jobs (claim_token);
+                CREATE INDEX IF NOT EXISTS queue_jobs_finished_at ON queue_jobs (finished_at);
+
+                CREATE TABLE IF NOT EXISTS queue_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    event TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS queue_events_job_id ON queue_events (job_id, id);
+
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    hostname TEXT,
+                    pid INTEGER,
+                    concurrency INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    heartbeat_at REAL NOT NULL
+                );
+                """
+            )
+
+    # Jobs
+
+    def enqueue(self, job):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO queue_jobs (job_id, status, priority, estimated_seconds, client_id, state, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job.id, JOB_QUEUED, job.priority, job.estimated_seconds, job.client_id,
+                 json.dumps(job.to_dict(), default=float), job.created_at),
+            )
+
+    def claim(self, worker_id):
+        """Take the next queued job for worker_id and return its row, or None if the queue is empty
+
+        Interactive jobs come first, then the shortest estimated audio, then
+        submission order, as with the in-process JobManager. The claim is a
+        single UPDATE, so two workers can never take the same job.
+        """
+        token = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE queue_jobs
+                SET status = ?, worker_id = ?, claim_token = ?, heartbeat_at = ?, attempts = attempts + 1
+                WHERE seq = (
+                    SELECT seq FROM queue_jobs
+                    WHERE status = ? AND cancel_requested = 0
+                    ORDER BY priority, estimated_seconds IS NULL, estimated_seconds, seq
+                    LIMIT 1
+                )
+                """,
+                (JOB_RUNNING, worker_id, token, time.time(), JOB_QUEUED),
+            )
+            return self._conn.execute("SELECT * FROM queue_jobs WHERE claim_token = ?", (token,)).fetchone()
+
+    def save(self, job, worker_id):
+        """Write back the state of a job worker_id is running; False if it no longer owns the job"""
+        state = job.to_dict()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                """
+                UPDATE queue_jobs SET status = ?, state = ?, finished_at = ?
+                WHERE job_id = ? AND worker_id = ? AND status = ?
+                """,
+                (state["status"], json.dumps(state, default=float), state["finished_at"], job.id, worker_id,
+                 JOB_RUNNING),
+            ).rowcount > 0
+
+    def get(self, job_id):
+        with self._lock:
+            return self._conn.execute("SELECT * FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+    def request_cancel(self, job_id):
+        """Cancel a queued job at once, or flag a running one for its worker; returns the row"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT * FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] in FINISHED_STATES:
+                return row
+            self._conn.execute("UPDATE queue_jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+            if row["status"] == JOB_QUEUED:
+                self._finish(row, JOB_CANCELLED, None, now)
+            return self._conn.execute("SELECT * FROM queue_jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+    def requeue_stale(self):
+        """Put running jobs whose worker stopped sending heartbeats back in the queue
+
+        A job that already used max_attempts fails instead, and one that was
+        being cancelled is cancelled. Returns the ids of the jobs changed.
+        """
+        now = time.time()
+        changed = []
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT * FROM queue_jobs WHERE status = ? AND heartbeat_at < ?",
+                (JOB_RUNNING, now - self.heartbeat_timeout),
+            ).fetchall()
+            for row in rows:
+                if row["cancel_requested"]:
+                    self._finish(row, JOB_CANCELLED, None, now)
+                elif row["attempts"] >= self.max_attempts:
+                    error = f"Worker stopped responding ({row['attempts']} attempts)"
+                    self._finish(row, JOB_FAILED, error, now)
+                else:
+                    state = json.loads(row["state"])
+                    state.update(status=JOB_QUEUED, stage=None, started_at=None)
+                    self._conn.execute(
+                        """
+                        UPDATE queue_jobs SET status = ?, state = ?, worker_id = NULL, claim_token = NULL
+                        WHERE seq = ?
+                        """,
+                        (JOB_QUEUED, json.dumps(state, default=float), row["seq"]),
+                    )
+                    # The next attempt publishes its segments again
+                    self._conn.execute("DELETE FROM queue_events WHERE job_id = ?", (row["job_id"],))
+                    self._add_event(row["job_id"], "status", {"status": JOB_QUEUED, "result": None, "error": None})
+                log_event("job_stale", job_id=row["job_id"], worker_id=row["worker_id"], attempts=row["attempts"])
+                changed.append(row["job_id"])
+        return changed
+
+    def release(self, worker_id):
+        """Return the running jobs of a worker that is shutting down to the queue without using an attempt"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT seq, job_id, state FROM queue_jobs WHERE worker_id = ? AND status = ?",
+                (worker_id, JOB_RUNNING),
+            ).fetchall()
+            for row in rows:
+                state = json.loads(row["state"])
+                state.update(status=JOB_QUEUED, stage=None, started_at=None)
+                self._conn.execute(
+                    """
+                    UPDATE queue_jobs
+                    SET status = ?, state = ?, worker_id = NULL, claim_token = NULL, attempts = attempts - 1
+                    WHERE seq = ?
+                    """,
+                    (JOB_QUEUED, json.dumps(state, default=float), row["seq"]),
+                )
+                self._conn.execute("DELETE FROM queue_events WHERE job_id = ?", (row["job_id"],))
+                self._add_event(row["job_id"], "status", {"status": JOB_QUEUED, "result": None, "error": None})
+        return [row["job_id"] for row in rows]
+
+    def finished_since(self, since):
+        """Rows of jobs that finished after since, oldest first"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM queue_jobs WHERE finished_at > ? ORDER BY finished_at",
+                (since,),
+            ).fetchall()
+
+    def queue_depth(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM queue_jobs WHERE status = ?", (JOB_QUEUED,)
+            ).fetchone()[0]
+
+    def running(self):
+        with self._lock:
+            return self._conn.execute("SELECT * FROM queue_jobs WHERE status = ?", (JOB_RUNNING,)).fetchall()
+
+    def queued_by_client(self):
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT client_id, COUNT(*) FROM queue_jobs
+                WHERE status = ? AND cancel_requested = 0 GROUP BY client_id
+                """,
+                (JOB_QUEUED,),
+            ).fetchall()
+        return {client_id: count for client_id, count in rows}
+
+    def unfinished(self):
+        """Rows of queued and running jobs"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM queue_jobs WHERE status IN (?, ?)", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+
+    def prune(self):
+        """Drop finished jobs, their events and departed workers older than retention_seconds"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                DELETE FROM queue_events WHERE job_id IN (
+                    SELECT job_id FROM queue_jobs WHERE finished_at < ?
+                )
+                """,
+                (cutoff,),
+            )
+            removed = self._conn.execute("DELETE FROM queue_jobs WHERE finished_at < ?", (cutoff,)).rowcount
+            self._conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (cutoff,))
+        return removed
+
+    # Events
+
+    def add_event(self, job_id, event):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO queue_events (job_id, event) VALUES (?, ?)",
+                (job_id, json.dumps(event, default=float)),
+            )
+
+    def events_since(self, job_id, after_id=0):
+        """(id, event) pairs recorded for a job after after_id"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, event FROM queue_events WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after_id),
+            ).fetchall()
+        return [(row["id"], json.loads(row["event"])) for row in rows]
+
+    # Workers
+
+    def register_worker(self, worker_id, concurrency):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO workers (worker_id, hostname, pid, concurrency, started_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (worker_id, socket.gethostname(), os.getpid(), concurrency, now, now),
+            )
+
+    def unregister_worker(self, worker_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def heartbeat(self, worker_id, job_ids):
+        """Record that worker_id is alive and running job_ids
+
+        Returns {job_id: cancel_requested} for the jobs it still owns; a job
+        missing from the result was taken away, e.g. after a long stall.
+        """
+        now = time.time()
+        marks = ", ".join("?" for _ in job_ids)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (now, worker_id))
+            if not job_ids:
+                return {}
+            self._conn.execute(
+                f"""
+                UPDATE queue_jobs SET heartbeat_at = ?
+                WHERE worker_id = ? AND status = ? AND job_id IN ({marks})
+                """,
+                (now, worker_id, JOB_RUNNING, *job_ids),
+            )
+            rows = self._conn.execute(
+                f"""
+                SELECT job_id, cancel_requested FROM queue_jobs
+                WHERE worker_id = ? AND status = ? AND job_id IN ({marks})
+                """,
+                (worker_id, JOB_RUNNING, *job_ids),
+            ).fetchall()
+        return {row["job_id"]: bool(row["cancel_requested"]) for row in rows}
+
+    def workers(self):
+        """Workers that sent a heartbeat within heartbeat_timeout, with the jobs they are running"""
+        with self._lock:
+            workers = self._conn.execute(
+                "SELECT * FROM workers WHERE heartbeat_at >= ? ORDER BY started_at",
+                (time.time() - self.heartbeat_timeout,),
+            ).fetchall()
+            running = self._conn.execute(
+                "SELECT job_id, worker_id FROM queue_jobs WHERE status = ?", (JOB_RUNNING,)
+            ).fetchall()
+        return [
+            dict(worker, jobs=[row["job_id"] for row in running if row["worker_id"] == worker["worker_id"]])
+            for worker in workers
+        ]
+
+    def _finish(self, row, status, error, now):
+        state = json.loads(row["state"])
+        state.update(status=status, error=error, finished_at=now)
+        self._conn.execute(
+            "UPDATE queue_jobs SET status = ?, state = ?, finished_at = ?, worker_id = NULL WHERE seq = ?",
+            (status, json.dumps(state, default=float), now, row["seq"]),
+        )
+        self._add_event(row["job_id"], "status", {"status": status, "result": None, "error": error})
+
+    def _add_event(self, job_id, event_type, data):
+        self._conn.execute(
+            "INSERT INTO queue_events (job_id, event) VALUES (?, ?)",
+            (job_id, json.dumps({"event": event_type, "data": data, "time": time.time()})),
+        )
+
+
+class RemoteJob:
+    """Snapshot of a queued job for the API process, with events polled from the queue
+
+    It offers the parts of the Job interface the endpoints use: to_dict(),
+    finished, cancel_requested, events and subscribe().
+    """
+
+    def __init__(self, queue, row, poll_interval=0.5):
+        self._queue = queue
+        self._poll_interval = poll_interval
+        self._pollers = {}
+        self._state = json.loads(row["state"])
+        self._state.update(
+            status=row["status"],
+            finished_at=row["finished_at"],
+            worker_id=row["worker_id"],
+            attempts=row["attempts"],
+        )
+        self.id = row["job_id"]
+        self.file_id = self._state["file_id"]
+        self.priority = self._state["priority"]
+        self.estimated_seconds = self._state["estimated_seconds"]
+        self.batch_id = self._state["batch_id"]
+        self.client_id = self._state["client_id"]
+        self.status = self._state["status"]
+        self.result = self._state["result"]
+        self.error = self._state["error"]
+        self.created_at = self._state["created_at"]
+        self.started_at = self._state["started_at"]
+        self.finished_at = self._state["finished_at"]
+        self.cancel_requested = bool(row["cancel_requested"])
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def events(self):
+        return [event for _, event in self._queue.events_since(self.id)]
+
+    def to_dict(self):
+        return dict(self._state)
+
+    def subscribe(self, loop):
+        """Return an asyncio.Queue on loop receiving all past and future events"""
+        queue = asyncio.Queue()
+        self._pollers[queue] = loop.create_task(self._poll(queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        task = self._pollers.pop(queue, None)
+        if task:
+            task.cancel()
+
+    async def _poll(self, queue):
+        loop = asyncio.get_running_loop()
+        last_id = 0
+        overall = None
+        while True:
+            # The final status event is written before the row is marked
+            # finished, so reading the row first never misses it
+            row = await loop.run_in_executor(None, self._queue.get, self.id)
+            events = await loop.run_in_executor(None, self._queue.events_since, self.id, last_id)
+            for last_id, event in events:
+                queue.put_nowait(event)
+            if row is None or row["status"] in FINISHED_STATES:
+                return
+            # Progress ticks are not recorded as events; report the saved values
+            state = json.loads(row["state"])
+            if state["stage"] and state["progress"] != overall:
+                overall = state["progress"]
+                queue.put_nowait({
+                    "event": "progress",
+                    "data": {
+                        "stage": state["stage"],
+                        "progress": state["stages"][state["stage"]]["progress"],
+                        "overall": overall,
+                    },
+                    "time": time.time(),
+                })
+            await asyncio.sleep(self._poll_interval)
+
+
+class QueueJobManager:
+    """Stands in for JobManager when jobs run in separate worker processes
+
+    submit() only writes the job to the queue. A background task puts back
+    jobs of workers that stopped sending heartbeats and calls on_status for
+    jobs that finished, so the API process sees their final state as well.
+    """
+
+    def __init__(self, queue, stages=(), on_status=None, poll_interval=5.0):
+        self.queue = queue
+        self.stages = stages
+        self.on_status = on_status
+        self.poll_interval = poll_interval
+        self._finished_after = time.time()
+        self._task = None
+
+    @property
+    def max_workers(self):
+        """Jobs the live workers can run at once"""
+        return max(sum(worker["concurrency"] for worker in self.queue.workers()), 1)
+
+    async def start(self):
+        """Start supervising the queue; call from the application startup hook"""
+        self._finished_after = time.time()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def submit(self, file_id, options=None, priority=PRIORITIES["normal"], estimated_seconds=None, batch_id=None,
+               client_id=None):
+        """Queue a new job for the workers and return it immediately"""
+        job = Job(
+            file_id,
+            options,
+            self.stages,
+            priority=priority,
+            estimated_seconds=estimated_seconds,
+            batch_id=batch_id,
+            client_id=client_id,
+        )
+        if self.on_status:
+            self.on_status(job)
+        self.queue.enqueue(job)
+        return job
+
+    def get(self, job_id):
+        row = self.queue.get(job_id)
+        return RemoteJob(self.queue, row) if row else None
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop at once, running ones when their worker notices"""
+        row = self.queue.request_cancel(job_id)
+        if row is None:
+            return None
+        job = RemoteJob(self.queue, row)
+        if job.status == JOB_CANCELLED and self.on_status:
+            self.on_status(job)
+        return job
+
+    def queue_depth(self):
+        return self.queue.queue_depth()
+
+    def active_jobs(self):
+        return [RemoteJob(self.queue, row) for row in self.queue.running()]
+
+    def queued_by_client(self):
+        return self.queue.queued_by_client()
+
+    def referenced_ids(self):
+        ids = set()
+        for row in self.queue.unfinished():
+            ids.update((row["job_id"], json.loads(row["state"])["file_id"]))
+        return ids
+
+    def stats(self):
+        workers = self.queue.workers()
+        return {
+            "max_workers": max(sum(worker["concurrency"] for worker in workers), 1),
+            "queued": self.queue_depth(),
+            "running": [row["job_id"] for row in self.queue.running()],
+            "workers": workers,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await loop.run_in_executor(None, self._supervise)
+            except Exception as e:
+                log_event("job_queue_supervision_failed", error=str(e))
+
+    def _supervise(self):
+        changed = self.queue.requeue_stale()
+        rows = self.queue.finished_since(self._finished_after)
+        if rows:
+            self._finished_after = rows[-1]["finished_at"]
+        if self.on_status:
+            for job_id in changed:
+                row = self.queue.get(job_id)
+                if row and row["status"] not in FINISHED_STATES:
+                    self.on_status(RemoteJob(self.queue, row))
+            for row in rows:
+                self.on_status(RemoteJob(self.queue, row))
+        self.queue.prune()
+
+
+class QueuedJob(Job):
+    """A job claimed by a worker process; its events and state changes are written to the queue"""
+
+    def __init__(self, queue, worker_id, row, on_status=None):
+        state = json.loads(row["state"])
+        super().__init__(
+            state["file_id"],
+            state["options"],
+            tuple(state["stages"]),
+            on_status=self._status_changed,
+            priority=state["priority"],
+            estimated_seconds=state["estimated_seconds"],
+            batch_id=state["batch_id"],
+            client_id=state["client_id"],
+            job_id=row["job_id"],
+        )
+        self.created_at = state["created_at"]
+        self.attempt = row["attempts"]
+        self.worker_id = worker_id
+        self.lost = False
+        self._queue = queue
+        self._persist = on_status
+        self._saved_at = 0.0
+
+    def publish(self, event_type, data, record=True):
+        if self.lost:
+            return
+        if record:
+            self._queue.add_event(self.id, {"event": event_type, "data": data, "time": time.time()})
+            if event_type == "stage":
+                self.save()
+        elif time.monotonic() - self._saved_at >= PROGRESS_SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        """Write the current state to the queue; stop the job if this worker no longer owns it"""
+        self._saved_at = time.monotonic()
+        if not self.lost and not self._queue.save(self, self.worker_id):
+            self.mark_lost()
+        return not self.lost
+
+    def mark_lost(self):
+        """Stop working on a job that was handed to another worker"""
+        if not self.lost:
+            self.lost = True
+            self._cancel_event.set()
+            log_event("job_lost", job_id=self.id, worker_id=self.worker_id)
+
+    def _status_changed(self, job):
+        if self.save() and self._persist:
+            self._persist(self)
+
+
+class QueueWorker:
+    """Claims jobs from a JobQueue and runs handler on them in concurrency threads
+
+    Heartbeats are sent every heartbeat_interval seconds from their own
+    thread, so they keep going while Whisper holds the worker threads. They
+    also deliver cancellation requests to the running jobs, and put back
+    jobs of other workers that died.
+    """
+
+    def __init__(self, queue, handler, concurrency=1, on_status=None, poll_interval=1.0, heartbeat_interval=5.0,
+                 worker_id=None):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.on_status = on_status
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._running = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        """Work until stop() is called and the running jobs are done; blocks"""
+        self.queue.register_worker(self.worker_id, self.concurrency)
+        log_event("worker_started", worker_id=self.worker_id, concurrency=self.concurrency)
+        heartbeat = threading.Thread(target=self._heartbeat, name="queue-heartbeat", daemon=True)
+        threads = [
+            threading.Thread(target=self._work, name=f"queue-worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        heartbeat.start()
+        for thread in threads:
+            thread.start()
+        try:
+            # Short joins keep the main thread responsive to signals
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=1.0)
+        finally:
+            self._stopping.set()
+            self._stopped.set()
+            self.queue.unregister_worker(self.worker_id)
+            log_event("worker_stopped", worker_id=self.worker_id)
+
+    def stop(self, release=False):
+        """Stop claiming jobs; with release, hand the running ones back to the queue at once"""
+        self._stopping.set()
+        if release:
+            with self._lock:
+                jobs = list(self._running.values())
+            for job in jobs:
+                job.mark_lost()
+            released = self.queue.release(self.worker_id)
+            log_event("worker_released_jobs", worker_id=self.worker_id, jobs=released)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                row = self.queue.claim(self.worker_id)
+            except sqlite3.Error as e:
+                log_event("job_claim_failed", worker_id=self.worker_id, error=str(e))
+                row = None
+            if row is None:
+                self._stopping.wait(self.poll_interval)
+                continue
+            job = QueuedJob(self.queue, self.worker_id, row, on_status=self.on_status)
+            with self._lock:
+                self._running[job.id] = job
+            try:
+                log_event("job_claimed", job_id=job.id, worker_id=self.worker_id, attempt=job.attempt)
+                run_job(job, self.handler)
+            finally:
+                with self._lock:
+                    del self._running[job.id]
+
+    def _heartbeat(self):
+        while not self._stopped.is_set():
+            try:
+                with self._lock:
+                    jobs = dict(self._running)
+                owned = self.queue.heartbeat(self.worker_id, list(jobs))
+                for job_id, job in jobs.items():
+                    if job_id not in owned:
+                        job.mark_lost()
+                    elif owned[job_id]:
+                        job._cancel_event.set()
+                for job_id in self.queue.requeue_stale():
+                    row = self.queue.get(job_id)
+                    if row and self.on_status:
+                        self.on_status(RemoteJob(self.queue, row))
+            except Exception as e:
+                log_event("worker_heartbeat_failed", worker_id=self.worker_id, error=str(e))
+            self._stopped.wait(self.heartbeat_interval)
@@ -0,0 +1,336 @@
+"""Background job queue for video processing"""
+import asyncio
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import JOBS_FINISHED, log_event
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+# Lower values run first
+PRIORITIES = {"interactive": 0, "normal": 1, "bulk": 2}
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled"""
+
+
+class JobError(Exception):
+    """Raised by a job handler to fail the job with a readable message"""
+
+
+class Job:
+    """A single video processing request and its progress"""
+
+    def __init__(self, file_id, options=None, stages=(), on_status=None, priority=PRIORITIES["normal"],
+                 estimated_seconds=None, batch_id=None, client_id=None, job_id=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.file_id = file_id
+        self.options = options or {}
+        self.priority = priority
+        self.estimated_seconds = estimated_seconds
+        self.batch_id = batch_id
+        self.client_id = client_id
+        self.status = JOB_QUEUED
+        self.stage = None
+        self.stages = {
+            name: {"status": "pending", "progress": 0.0, "started_at": None, "finished_at": None}
+            for name in stages
+        }
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._subscribers = []
+        self._on_status = on_status
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Abort the running handler if cancellation was requested"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def subscribe(self, loop):
+        """Return an asyncio.Queue on loop receiving all past and future events"""
+        queue = asyncio.Queue()
+        with self._lock:
+            for event in self.events:
+                queue.put_nowait(event)
+            self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(loop, q) for loop, q in self._subscribers if q is not queue]
+
+    def publish(self, event_type, data, record=True):
+        """Hand an event to every subscriber; safe from any thread
+
+        Recorded events are replayed to late subscribers. Progress ticks are
+        not recorded, since the latest values are part of to_dict().
+        """
+        event = {"event": event_type, "data": data, "time": time.time()}
+        with self._lock:
+            if record:
+                self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def set_status(self, status):
+        """Change the job state and notify subscribers"""
+        self.status = status
+        if status in FINISHED_STATES:
+            self.finished_at = time.time()
+        elif status == JOB_RUNNING:
+            self.started_at = time.time()
+        self.publish("status", {
+            "status": status,
+            "result": self.result,
+            "error": self.error,
+        })
+        if self._on_status:
+            self._on_status(self)
+
+    def start_stage(self, name):
+        """Mark a pipeline stage as started"""
+        self.check_cancelled()
+        with self._lock:
+            self.stage = name
+            stage = self.stages.setdefault(name, {"status": "pending", "progress": 0.0, "finished_at": None})
+            stage["status"] = "running"
+            stage["started_at"] = time.time()
+        self.publish("stage", {"stage": name, "status": "running"})
+
+    def update_progress(self, name, progress):
+        """Record fractional progress (0..1) for a stage"""
+        progress = round(min(max(progress, 0.0), 1.0), 4)
+        with self._lock:
+            self.stages[name]["progress"] = progress
+        self.publish("progress", {"stage": name, "progress": progress, "overall": self.progress()}, record=False)
+
+    def finish_stage(self, name):
+        """Mark a pipeline stage as done"""
+        with self._lock:
+            stage = self.stages[name]
+            stage["status"] = "completed"
+            stage["progress"] = 1.0
+            stage["finished_at"] = time.time()
+        self.publish("stage", {"stage": name, "status": "completed"})
+
+    def skip_stage(self, name):
+        """Mark a pipeline stage as not needed, e.g. when its output was cached"""
+        self.check_cancelled()
+        with self._lock:
+            stage = self.stages[name]
+            stage["status"] = "skipped"
+            stage["progress"] = 1.0
+            stage["finished_at"] = time.time()
+        self.publish("stage", {"stage": name, "status": "skipped"})
+
+    def progress(self):
+        """Overall progress as the mean of the stage progress values"""
+        if not self.stages:
+            return 1.0 if self.status == JOB_COMPLETED else 0.0
+        return round(sum(s["progress"] for s in self.stages.values()) / len(self.stages), 4)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "file_id": self.file_id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress(),
+                "stages": {name: dict(stage) for name, stage in self.stages.items()},
+                "options": self.options,
+                "priority": self.priority,
+                "estimated_seconds": self.estimated_seconds,
+                "batch_id": self.batch_id,
+                "client_id": self.client_id,
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+def run_job(job, handler):
+    """Run handler on job, moving it from running to its final state; blocks until done"""
+    job.set_status(JOB_RUNNING)
+    try:
+        job.result = handler(job)
+        status = JOB_COMPLETED
+    except JobCancelled:
+        status = JOB_CANCELLED
+    except JobError as e:
+        job.error = str(e)
+        status = JOB_FAILED
+    except Exception as e:
+        job.error = f"Processing failed: {str(e)}"
+        status = JOB_FAILED
+    job.set_status(status)
+    JOBS_FINISHED.labels(status=status).inc()
+    log_event(
+        "job_finished",
+        job_id=job.id,
+        status=status,
+        queued_seconds=round(job.started_at - job.created_at, 3),
+        run_seconds=round(job.finished_at - job.started_at, 3),
+        error=job.error,
+    )
+    return status
+
+
+class JobManager:
+    """Runs jobs from an in-process priority queue on a bounded pool of worker threads
+
+    Queued jobs run by priority (see PRIORITIES), and within a priority the
+    job with the shortest estimated audio runs first, so short interactive
+    requests are not stuck behind long recordings. Jobs without an estimate
+    run after those with one, in submission order.
+
+    The handler is a blocking callable taking a Job and returning its result
+    dict. It runs on the thread pool so the event loop stays free for other
+    requests while ffmpeg, Whisper and the translator are busy. on_status,
+    if given, is called with the job when it is submitted and on every
+    status change, e.g. to persist it.
+    """
+
+    def __init__(self, handler, max_workers=2, stages=(), history_limit=1000, on_status=None):
+        self.handler = handler
+        self.on_status = on_status
+        self.max_workers = max_workers
+        self.stages = stages
+        self.history_limit = history_limit
+        self.jobs = {}
+        self._sequence = itertools.count()
+        self._queue = None
+        self._executor = None
+        self._workers = []
+
+    async def start(self):
+        """Start the worker tasks; call from the application startup hook"""
+        self._queue = asyncio.PriorityQueue()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    async def stop(self):
+        """Cancel outstanding jobs and shut the worker pool down"""
+        for job in self.jobs.values():
+            if not job.finished:
+                job._cancel_event.set()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, file_id, options=None, priority=PRIORITIES["normal"], estimated_seconds=None, batch_id=None,
+               client_id=None):
+        """Queue a new job and return it immediately"""
+        job = Job(
+            file_id,
+            options,
+            self.stages,
+            on_status=self.on_status,
+            priority=priority,
+            estimated_seconds=estimated_seconds,
+            batch_id=batch_id,
+            client_id=client_id,
+        )
+        if self.on_status:
+            self.on_status(job)
+        self.jobs[job.id] = job
+        order = estimated_seconds if estimated_seconds is not None else float("inf")
+        self._queue.put_nowait((priority, order, next(self._sequence), job))
+        self._prune_history()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Request cancellation; queued jobs stop at once, running ones at the next stage boundary"""
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel_event.set()
+        if job.status == JOB_QUEUED:
+            job.set_status(JOB_CANCELLED)
+        return job
+
+    def queue_depth(self):
+        return sum(1 for job in self.jobs.values() if job.status == JOB_QUEUED)
+
+    def active_jobs(self):
+        return [job for job in self.jobs.values() if job.status == JOB_RUNNING]
+
+    def queued_by_client(self):
+        """Number of queued jobs per client, not counting ones being cancelled"""
+        queued = {}
+        for job in list(self.jobs.values()):
+            if job.status == JOB_QUEUED and not job.cancel_requested:
+                queued[job.client_id] = queued.get(job.client_id, 0) + 1
+        return queued
+
+    def referenced_ids(self):
+        """Job and file ids of every unfinished job"""
+        ids = set()
+        for job in list(self.jobs.values()):
+            if not job.finished:
+                ids.update((job.id, job.file_id))
+        return ids
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "queued": self.queue_depth(),
+            "running": [job.id for job in self.active_jobs()],
+        }
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            *_, job = await self._queue.get()
+            try:
+                if job.finished:
+                    continue
+                await loop.run_in_executor(self._executor, run_job, job, self.handler)
+            finally:
+                self._queue.task_done()
+
+    def _prune_history(self):
+        """Forget the oldest finished jobs once the history limit is exceeded"""
+        excess = len(self.jobs) - self.history_limit
+        if excess <= 0:
+            return
+        finished = sorted(
+            (job for job in self.jobs.values() if job.finished),
+            key=lambda job: job.finished_at or job.created_at,
+        )
+        for job in finished[:excess]:
+            del self.jobs[job.id]
@@ -0,0 +1,269 @@
+"""Windowed transcription of long audio
+
+Sequential windows let segments be reported as soon as each window is
+done; parallel overlapping windows spread one recording across processes.
+"""
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import numpy as np
+
+from audio import SAMPLE_RATE
+
+# Energy is compared over 100 ms frames when looking for a quiet cut point
+FRAME_SAMPLES = SAMPLE_RATE // 10
+
+# Model loaded in each worker process on first use; one resident at a time
+_worker_model_name = None
+_worker_model = None
+_worker_options = {}
+
+
+def init_worker(options=None, num_threads=None):
+    """Process pool initializer: pin torch threads and set default decode options"""
+    global _worker_options
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    _worker_options = options or {}
+
+
+def load_worker_model(model_name, quantize=False):
+    """Load this worker's private copy of a Whisper model, replacing any other"""
+    global _worker_model_name, _worker_model
+    key = (model_name, quantize)
+    if _worker_model_name != key:
+        import whisper
+
+        from models import quantize_int8
+
+        # Drop the previous model first so two never sit in memory together
+        _worker_model = None
+        _worker_model = whisper.load_model(model_name, device="cpu")
+        if quantize:
+            _worker_model = quantize_int8(_worker_model)
+        _worker_model_name = key
+    return _worker_model
+
+
+def transcribe_window(index, audio, offset_seconds, model_name, options=None, quantize=False):
+    """Transcribe one window in a worker process"""
+    model = load_worker_model(model_name, quantize)
+    result = model.transcribe(audio, **dict(_worker_options, **(options or {})))
+    return index, offset_seconds, result["segments"], result.get("language")
+
+
+def find_quiet_point(audio, center, search_samples):
+    """Sample index of the quietest 100 ms frame within search_samples of center"""
+    start = max(center - search_samples, 0)
+    end = min(center + search_samples, len(audio))
+    frames = (end - start) // FRAME_SAMPLES
+    if frames < 2:
+        return center
+    region = audio[start:start + frames * FRAME_SAMPLES].reshape(frames, FRAME_SAMPLES)
+    energy = np.einsum("ij,ij->i", region, region)
+    return start + int(np.argmin(energy)) * FRAME_SAMPLES + FRAME_SAMPLES // 2
+
+
+def plan_windows(audio, window_seconds=600.0, overlap_seconds=5.0, search_seconds=15.0):
+    """Split audio into windows cut at natural pauses
+
+    Returns a list of (start, end, own_start, own_end) sample indexes. Each
+    window covers [start, end), which reaches overlap_seconds past its cut
+    points on both sides; segments are kept by the window whose
+    [own_start, own_end) range contains their midpoint.
+    """
+    total = len(audio)
+    window = int(window_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    # A cut searched for further back than half a window could land on or
+    # before the previous one, and the split would never advance
+    search = min(int(search_seconds * SAMPLE_RATE), window // 2)
+
+    cuts = [0]
+    while total - cuts[-1] > window + search:
+        cuts.append(find_quiet_point(audio, cuts[-1] + window, search))
+    cuts.append(total)
+
+    return [
+        (max(own_start - overlap, 0), min(own_end + overlap, total), own_start, own_end)
+        for own_start, own_end in zip(cuts, cuts[1:])
+    ]
+
+
+def stitch_segments(window_results, windows):
+    """Merge per-window segments into one timeline
+
+    window_results maps window index to (offset_seconds, segments). Segment
+    times are shifted to the global timeline, segments outside the window's
+    own range are dropped, and text repeated across the overlap is removed.
+    """
+    stitched = []
+    previous_window = None
+    for index in sorted(window_results):
+        offset, segments = window_results[index]
+        own_start = windows[index][2] / SAMPLE_RATE
+        own_end = windows[index][3] / SAMPLE_RATE
+        for segment in segments:
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            midpoint = (start + end) / 2
+            if not own_start <= midpoint < own_end:
+                continue
+            text = segment["text"]
+            if stitched:
+                previous = stitched[-1]
+                # Same words heard from both sides of a cut
+                if (previous_window != index and start < previous["end"]
+                        and text.strip() == previous["text"].strip()):
+                    previous["end"] = max(previous["end"], end)
+                    continue
+                # Never let a segment start before the previous one ended
+                start = max(start, previous["end"])
+                end = max(end, start)
+            stitched.append(dict(segment, start=start, end=end, text=text))
+            previous_window = index
+
+    for i, segment in enumerate(stitched):
+        segment["id"] = i
+    return stitched
+
+
+def transcribe_incremental(audio, model, options=None, window_seconds=60.0, overlap_seconds=2.0,
+                           segment_callback=None, progress_callback=None, check_cancelled=None):
+    """Transcribe audio window by window in this process
+
+    Windows are cut at quiet points and reach overlap_seconds past each
+    cut, so a word spoken across a cut is heard whole by one of them; the
+    results are merged with stitch_segments as in long-form mode. The tail
+    of the previous window's text is passed as initial_prompt, so decoding
+    keeps its context across cuts the way a single pass does (unless
+    condition_on_previous_text is off). segment_callback receives segments
+    (on the global timeline) as soon as the next window can no longer
+    change them.
+    """
+    options = options or {}
+    windows = plan_windows(audio, window_seconds, overlap_seconds)
+    window_results = {}
+    segments = []
+    emitted = 0
+    languages = Counter()
+    for i, (start, end, _, _) in enumerate(windows):
+        if check_cancelled:
+            check_cancelled()
+        window_options = dict(options)
+        # Keep the language found in the first window instead of detecting it again
+        if languages and "language" not in options:
+            window_options["language"] = languages.most_common(1)[0][0]
+        before = [segment for segment in segments if segment["end"] <= start / SAMPLE_RATE]
+        previous_text = "".join(segment["text"] for segment in before[-5:]).strip()
+        if previous_text and "initial_prompt" not in options and options.get("condition_on_previous_text", True):
+            window_options["initial_prompt"] = previous_text
+        result = model.transcribe(audio[start:end], **window_options)
+
+        window_results[i] = (start / SAMPLE_RATE, result["segments"])
+        segments = stitch_segments(window_results, windows)
+        if result.get("language"):
+            languages[result["language"]] += end - start
+
+        ready = len(segments)
+        if i + 1 < len(windows):
+            # Segments reaching into the next window may still merge with its text
+            next_start = windows[i + 1][0] / SAMPLE_RATE
+            ready = 0
+            while ready < len(segments) and segments[ready]["end"] <= next_start:
+                ready += 1
+        if segment_callback and ready > emitted:
+            segment_callback(segments[emitted:ready])
+            emitted = ready
+        if progress_callback:
+            progress_callback((i + 1) / len(windows))
+
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": languages.most_common(1)[0][0] if languages else None,
+        "windows": len(windows),
+    }
+
+
+def transcribe_long_form(audio, executor, model_name, options=None, window_seconds=600.0, overlap_seconds=5.0,
+                         progress_callback=None, check_cancelled=None, segment_callback=None, quantize=False):
+    """Transcribe audio in parallel windows on a pool set up with init_worker
+
+    Returns a dict shaped like whisper_model.transcribe() output (text,
+    segments, language) with timestamps on the original timeline.
+    segment_callback receives segments in timeline order as soon as every
+    window before them has finished.
+    """
+    windows = plan_windows(audio, window_seconds, overlap_seconds)
+    # Only keep a couple of windows per worker in flight so the copies sent
+    # to the workers never add up to a second copy of the whole recording
+    max_in_flight = max(getattr(executor, "_max_workers", 1), 1) * 2
+    queued = iter(enumerate(windows))
+
+    def submit_next():
+        try:
+            i, (start, end, _, _) = next(queued)
+        except StopIteration:
+            return None
+        # Copy so a memory-mapped slice is pickled as plain samples
+        samples = np.array(audio[start:end], dtype=np.float32)
+        return executor.submit(transcribe_window, i, samples, start / SAMPLE_RATE, model_name, options,
+                               quantize)
+
+    pending = set()
+    for _ in range(max_in_flight):
+        future = submit_next()
+        if future is not None:
+            pending.add(future)
+
+    window_results = {}
+    languages = Counter()
+    emitted = 0
+
+    def emit_ready_segments():
+        nonlocal emitted
+        ready = 0
+        while ready in window_results:
+            ready += 1
+        if ready == 0:
+            return
+        segments = stitch_segments({i: window_results[i] for i in range(ready)}, windows)
+        if ready < len(windows):
+            # The last finished window's tail may still merge with the next one
+            boundary = windows[ready - 1][2] / SAMPLE_RATE
+            segments = [s for s in segments if (s["start"] + s["end"]) / 2 < boundary]
+        if len(segments) > emitted:
+            segment_callback(segments[emitted:])
+            emitted = len(segments)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, offset, segments, language = future.result()
+                window_results[index] = (offset, segments)
+                if language:
+                    languages[language] += windows[index][3] - windows[index][2]
+                future = submit_next()
+                if future is not None:
+                    pending.add(future)
+            if segment_callback and done:
+                emit_ready_segments()
+            if progress_callback and done:
+                progress_callback(len(window_results) / len(windows))
+            if check_cancelled:
+                check_cancelled()
+    finally:
+        for future in pending:
+            future.cancel()
+
+    segments = stitch_segments(window_results, windows)
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": languages.most_common(1)[0][0] if languages else None,
+        "windows": len(windows),
+    }
@@ -0,0 +1,216 @@
+"""Indexed metadata for uploaded files and processing jobs"""
+import json
+import threading
+import time
+
+import db
+
+FILE_FIELDS = ("filename", "content_type", "path", "size", "content_hash", "duration", "language", "deleted_at")
+JOB_JSON_FIELDS = ("target_languages", "options", "result", "outputs")
+
+
+class MetadataStore:
+    """SQLite store keyed by file_id and job_id
+
+    Uploads are looked up here instead of by globbing the upload directory,
+    and finished jobs stay queryable after they leave the in-memory job
+    history or the server restarts.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = db.connect(db_path)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    filename TEXT,
+                    content_type TEXT,
+                    path TEXT,
+                    size INTEGER,
+                    content_hash TEXT,
+                    duration REAL,
+                    language TEXT,
+                    created_at REAL NOT NULL,
+                    deleted_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS files_created_at ON files (created_at);
+                CREATE INDEX IF NOT EXISTS files_content_hash ON files (content_hash);
+
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    model TEXT,
+                    target_languages TEXT,
+                    options TEXT,
+                    result TEXT,
+                    outputs TEXT,
+                    language TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+                CREATE INDEX IF NOT EXISTS jobs_file_id ON jobs (file_id, created_at);
+
+                CREATE TABLE IF NOT EXISTS batches (
+                    batch_id TEXT PRIMARY KEY,
+                    job_ids TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS batches_created_at ON batches (created_at);
+                """
+            )
+
+    # Files
+
+    def add_file(self, file_id, path, filename=None, content_type=None, size=None, content_hash=None,
+                 created_at=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO files (file_id, filename, content_type, path, size, content_hash, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (file_id, filename, content_type, str(path), size, content_hash, created_at or time.time()),
+            )
+
+    def update_file(self, file_id, **fields):
+        """Set some of FILE_FIELDS on a file"""
+        unknown = set(fields) - set(FILE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown file fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE files SET {assignments} WHERE file_id = ?",
+                [*fields.values(), file_id],
+            )
+
+    def get_file(self, file_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_files(self, include_deleted=False, limit=50, offset=0):
+        """Files, newest first, and the total number matching"""
+        where = "" if include_deleted else "WHERE deleted_at IS NULL"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM files {where}").fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT * FROM files {where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def known_file_ids(self):
+        with self._lock:
+            return {row["file_id"] for row in self._conn.execute("SELECT file_id FROM files")}
+
+    # Jobs
+
+    def save_job(self, job):
+        """Insert or update a job from its to_dict() form"""
+        result = job.get("result") or {}
+        options = job.get("options") or {}
+        outputs = None
+        if result:
+            outputs = [entry["srt_file"] for entry in result.get("srt_files", [])]
+            outputs.append(f"{job['job_id']}.segments.json")
+        values = {
+            "job_id": job["job_id"],
+            "file_id": job["file_id"],
+            "status": job["status"],
+            "stage": job.get("stage"),
+            "model": result.get("model") or options.get("model"),
+            "target_languages": options.get("target_languages"),
+            "options": options,
+            "result": job.get("result"),
+            "outputs": outputs,
+            "language": result.get("language_detected"),
+            "error": job.get("error"),
+            "created_at": job["created_at"],
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at"),
+        }
+        for name in JOB_JSON_FIELDS:
+            if values[name] is not None:
+                values[name] = json.dumps(values[name], default=float)
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({columns}) VALUES ({placeholders})",
+                list(values.values()),
+            )
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, status=None, file_id=None, limit=50, offset=0):
+        """Jobs, newest first, optionally filtered, and the total number matching"""
+        clauses = []
+        params = []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if file_id:
+            clauses.append("file_id = ?")
+            params.append(file_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM jobs {where}", params).fetchone()[0]
+            # The full result (with the transcription text) is left to get_job
+            rows = self._conn.execute(
+                f"""
+                SELECT job_id, file_id, status, stage, model, target_languages, outputs, language, error,
+                       created_at, started_at, finished_at
+                FROM jobs {where} ORDER BY created_at DESC LIMIT ? OFFSET ?
+                """,
+                [*params, limit, offset],
+            ).fetchall()
+        return [self._job_row(row) for row in rows], total
+
+    def fail_unfinished_jobs(self, error):
+        """Mark jobs left queued or running by a previous process as failed"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                """
+                UPDATE jobs SET status = 'failed', error = ?, finished_at = ?
+                WHERE status IN ('queued', 'running')
+                """,
+                (error, time.time()),
+            ).rowcount
+
+    # Batches
+
+    def add_batch(self, batch_id, job_ids):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO batches (batch_id, job_ids, created_at) VALUES (?, ?, ?)",
+                (batch_id, json.dumps(job_ids), time.time()),
+            )
+
+    def get_batch(self, batch_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if not row:
+            return None
+        return dict(row, job_ids=json.loads(row["job_ids"]))
+
+    @staticmethod
+    def _job_row(row):
+        job = dict(row)
+        for name in JOB_JSON_FIELDS:
+            if job.get(name) is not None:
+                job[name] = json.loads(job[name])
+        return job
@@ -0,0 +1,132 @@
+"""Prometheus metrics and structured timing logs for the processing pipeline"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app_sub")
+
+# Stages range from milliseconds (a cached SRT write) to hours (Whisper on
+# a feature-length recording)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+EXTRACTION_SECONDS = Histogram(
+    "app_sub_audio_extraction_seconds",
+    "Time spent decoding audio with ffmpeg",
+    buckets=STAGE_BUCKETS,
+)
+INFERENCE_SECONDS = Histogram(
+    "app_sub_whisper_inference_seconds",
+    "Time spent in Whisper transcription",
+    ["model", "mode"],
+    buckets=STAGE_BUCKETS,
+)
+REAL_TIME_FACTOR = Histogram(
+    "app_sub_whisper_real_time_factor",
+    "Inference seconds per second of audio",
+    ["model", "mode"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 4, 8),
+)
+AUDIO_SECONDS = Counter(
+    "app_sub_transcribed_audio_seconds",
+    "Seconds of audio transcribed",
+    ["model"],
+)
+TRANSLATION_SECONDS = Histogram(
+    "app_sub_translation_seconds",
+    "Time spent translating the segments of one language",
+    ["backend"],
+    buckets=STAGE_BUCKETS,
+)
+TRANSLATION_ERRORS = Counter(
+    "app_sub_translation_errors",
+    "Failed translator requests; kind is batch or text",
+    ["backend", "kind"],
+)
+TRANSLATION_FALLBACKS = Counter(
+    "app_sub_translation_fallbacks",
+    "Batches retried one text at a time (per_text) and texts left untranslated (original)",
+    ["backend", "kind"],
+)
+SUBTITLE_WRITE_SECONDS = Histogram(
+    "app_sub_subtitle_write_seconds",
+    "Time spent writing a subtitle file",
+    ["format"],
+    buckets=STAGE_BUCKETS,
+)
+QUEUE_DEPTH = Gauge("app_sub_job_queue_depth", "Jobs waiting for a worker")
+JOBS_IN_FLIGHT = Gauge("app_sub_jobs_in_flight", "Jobs currently being processed")
+JOBS_FINISHED = Counter("app_sub_jobs_finished", "Jobs that reached a final state", ["status"])
+UPLOAD_BYTES = Counter("app_sub_upload_bytes", "Bytes received by upload endpoints", ["kind"])
+UPLOAD_RATE = Histogram(
+    "app_sub_upload_bytes_per_second",
+    "Transfer rate of individual uploads",
+    ["kind"],
+    buckets=(64e3, 256e3, 1e6, 4e6, 16e6, 64e6, 256e6, 1e9),
+)
+ADMISSION_REJECTIONS = Counter(
+    "app_sub_admission_rejections",
+    "Requests rejected with 429 by admission control",
+    ["reason"],
+)
+NOT_READY_REJECTIONS = Counter(
+    "app_sub_not_ready_rejections",
+    "Requests rejected with 503 because startup warm-up had not finished",
+)
+SERVICE_READY = Gauge("app_sub_ready", "1 once startup warm-up has finished, else 0")
+COLD_START_SECONDS = Gauge(
+    "app_sub_cold_start_seconds",
+    "Seconds from process start until the service was ready",
+)
+VAD_SKIPPED_SECONDS = Counter(
+    "app_sub_vad_skipped_audio_seconds",
+    "Seconds of non-speech audio cut before transcription",
+)
+JANITOR_RECLAIMED_BYTES = Counter(
+    "app_sub_janitor_reclaimed_bytes",
+    "Bytes deleted by the storage janitor",
+    ["reason"],
+)
+
+
+def log_event(event, **fields):
+    """Log one event as a single JSON object"""
+    logger.info(json.dumps(dict(event=event, **fields), default=str))
+
+
+@contextmanager
+def timed(event, histogram=None, **fields):
+    """Time a block, observe it on histogram and log it with fields
+
+    The block may add fields to the yielded dict; they are included in the
+    log line.
+    """
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield fields
+    except BaseException as e:
+        outcome = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(seconds)
+        log_event(event, seconds=round(seconds, 4), outcome=outcome, **fields)
+
+
+def observe_inference(model, mode, audio_seconds, seconds):
+    """Record one Whisper run and its real-time factor"""
+    INFERENCE_SECONDS.labels(model=model, mode=mode).observe(seconds)
+    AUDIO_SECONDS.labels(model=model).inc(audio_seconds)
+    if audio_seconds > 0:
+        REAL_TIME_FACTOR.labels(model=model, mode=mode).observe(seconds / audio_seconds)
+
+
+def observe_upload(kind, size, seconds):
+    """Record the size and transfer rate of one upload or upload part"""
+    UPLOAD_BYTES.labels(kind=kind).inc(size)
+    if seconds > 0:
+        UPLOAD_RATE.labels(kind=kind).observe(size / seconds)
@@ -0,0 +1,231 @@
+"""Lazily loaded Whisper models kept resident under an LRU memory budget"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from metrics import log_event
+
+# Named profiles clients can ask for instead of a model size
+MODEL_PROFILES = {
+    "fast": "base",
+    "balanced": "small",
+    "accurate": "large",
+}
+
+# Approximate parameter counts, used to make room before a model is loaded
+MODEL_PARAMETERS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large": 1_550_000_000,
+}
+
+
+class ModelError(Exception):
+    """Raised for unknown models or models that cannot fit the memory budget"""
+
+
+def model_memory_bytes(model):
+    """Bytes held by a torch module's parameters and buffers"""
+    total = sum(t.numel() * t.element_size() for t in model.parameters()) + sum(
+        t.numel() * t.element_size() for t in model.buffers()
+    )
+    # Dynamically quantized Linear layers keep their int8 weights packed,
+    # outside parameters(); their weight is a method rather than a tensor
+    for module in model.modules():
+        weight = getattr(module, "weight", None)
+        if callable(weight):
+            packed = weight()
+            total += packed.numel() * packed.element_size()
+    return total
+
+
+def quantize_int8(model):
+    """Quantize a Whisper model's Linear layers to int8 in place, for faster CPU inference
+
+    Whisper wraps every nn.Linear in a subclass, which quantize_dynamic
+    does not recognise, so the layers are swapped for plain nn.Linear
+    copies first. Activations stay float32 and are quantized on the fly.
+    """
+    import torch
+
+    def unwrap(module):
+        for name, child in module.named_children():
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.load_state_dict(child.state_dict())
+                setattr(module, name, linear)
+            else:
+                unwrap(child)
+
+    unwrap(model)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def pin_torch_threads(num_threads):
+    """Fix torch's intra-op thread count for this process"""
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def estimate_memory_bytes(name):
+    """Expected fp32 size of a model before it is loaded"""
+    for size, parameters in MODEL_PARAMETERS.items():
+        if name == size or name.startswith(f"{size}.") or name.startswith(f"{size}-"):
+            return parameters * 4
+    return 0
+
+
+def available_models():
+    import whisper
+    return whisper.available_models()
+
+
+class LoadedModel:
+    """A resident model plus the bookkeeping the registry reports"""
+
+    def __init__(self, name, model, load_seconds):
+        self.name = name
+        self.model = model
+        self.load_seconds = load_seconds
+        self.memory_bytes = model_memory_bytes(model)
+        self.loaded_at = time.time()
+        self.last_used_at = self.loaded_at
+        self.uses = 0
+        self.in_use = 0
+        # Whisper installs kv-cache hooks on the model for every transcribe
+        # call, so concurrent calls on one model instance must be serialized
+        self.lock = threading.Lock()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "memory_bytes": self.memory_bytes,
+            "load_seconds": round(self.load_seconds, 3),
+            "loaded_at": self.loaded_at,
+            "last_used_at": self.last_used_at,
+            "uses": self.uses,
+            "in_use": self.in_use > 0,
+        }
+
+
+class ModelRegistry:
+    """Loads Whisper models on first use and keeps up to max_models resident
+
+    When a new model would exceed max_models or memory_budget_bytes, the
+    least recently used idle models are unloaded first. An int8 quantized
+    model is resident separately from the float32 one of the same size.
+    num_threads, if set, pins torch's thread count before the first load.
+    """
+
+    def __init__(self, default_model="base", max_models=2, memory_budget_bytes=None, loader=None,
+                 num_threads=None):
+        self.default_model = default_model
+        self.max_models = max_models
+        self.memory_budget_bytes = memory_budget_bytes
+        self.num_threads = num_threads
+        self._loader = loader or self._load_whisper
+        self._threads_pinned = False
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.evictions = 0
+
+    def resolve(self, name=None):
+        """Map a model size or profile name to a Whisper model name"""
+        name = MODEL_PROFILES.get(name or self.default_model, name or self.default_model)
+        if name not in available_models():
+            raise ModelError(f"Unknown model: {name}")
+        return name
+
+    @contextmanager
+    def acquire(self, name=None, quantize=False):
+        """Yield a loaded model for exclusive use, loading it if needed"""
+        loaded = self._get(self.resolve(name), quantize)
+        try:
+            with loaded.lock:
+                loaded.uses += 1
+                loaded.last_used_at = time.time()
+                yield loaded.model
+        finally:
+            with self._lock:
+                loaded.in_use -= 1
+
+    def stats(self):
+        with self._lock:
+            models = [loaded.to_dict() for loaded in self._models.values()]
+        return {
+            "default_model": self.default_model,
+            "profiles": MODEL_PROFILES,
+            "max_models": self.max_models,
+            "num_threads": self.num_threads,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "resident_bytes": sum(model["memory_bytes"] for model in models),
+            "evictions": self.evictions,
+            "loaded": models,
+        }
+
+    def _get(self, name, quantize=False):
+        key = f"{name}-int8" if quantize else name
+        while True:
+            with self._lock:
+                loaded = self._models.get(key)
+                if loaded is not None:
+                    self._models.move_to_end(key)
+                    loaded.in_use += 1
+                    return loaded
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this model; wait and look again
+            loading.wait()
+
+        try:
+            self._make_room(estimate_memory_bytes(key))
+            log_event("model_loading", model=key)
+            started = time.perf_counter()
+            model = self._loader(name)
+            if quantize:
+                model = quantize_int8(model)
+            loaded = LoadedModel(key, model, time.perf_counter() - started)
+            log_event("model_loaded", model=key, seconds=round(loaded.load_seconds, 3),
+                      memory_bytes=loaded.memory_bytes)
+            with self._lock:
+                self._models[key] = loaded
+                loaded.in_use += 1
+            return loaded
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _make_room(self, incoming_bytes):
+        """Unload idle models, least recently used first, until the new one fits"""
+        with self._lock:
+            while self._models:
+                resident = sum(loaded.memory_bytes for loaded in self._models.values())
+                over_count = len(self._models) >= self.max_models
+                over_budget = (
+                    self.memory_budget_bytes is not None
+                    and resident + incoming_bytes > self.memory_budget_bytes
+                )
+                if not (over_count or over_budget):
+                    return
+                idle = [name for name, loaded in self._models.items() if loaded.in_use == 0]
+                if not idle:
+                    if over_budget:
+                        raise ModelError("Not enough model memory budget; all resident models are busy")
+                    return
+                evicted = self._models.pop(idle[0])
+                self.evictions += 1
+                log_event("model_unloaded", model=evicted.name, memory_bytes=evicted.memory_bytes)
+
+    def _load_whisper(self, name):
+        import whisper
+        if self.num_threads and not self._threads_pinned:
+            pin_torch_threads(self.num_threads)
+            self._threads_pinned = True
+        return whisper.load_model(name, device="cpu")
@@ -0,0 +1,127 @@
+"""Read one file field of a multipart/form-data body as it arrives
+
+Starlette's UploadFile spools the whole body to a temporary file before
+the handler runs, so limits could only be checked once every byte was on
+disk. MultipartFileStream parses the raw request stream instead and hands
+out the file's bytes chunk by chunk, so they can be checked and written
+straight to their destination.
+"""
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(Exception):
+    """Raised for a body that is not the multipart form expected"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MultipartFileStream:
+    """The field_name file part of a multipart/form-data request body
+
+    Call open() to read up to the end of the file part's headers, which
+    sets filename and content_type, then iterate chunks() for its data.
+    Other fields are read past and dropped. Raw body bytes beyond
+    max_body_size raise MultipartError with status 413.
+    """
+
+    def __init__(self, stream, content_type_header, field_name="file", max_body_size=None):
+        content_type, params = parse_options_header(content_type_header or "")
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise MultipartError("Expected a multipart/form-data body")
+        self.field_name = field_name
+        self.max_body_size = max_body_size
+        self.filename = None
+        self.content_type = None
+        self.body_size = 0
+        self._stream = stream.__aiter__()
+        self._pending = []
+        self._in_field = False
+        self._field_done = False
+        self._finished = False
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        })
+
+    async def open(self):
+        """Read until the file part's headers are parsed; returns self"""
+        while not self._in_field and not self._field_done:
+            if not await self._read():
+                raise MultipartError(f"Missing form field: {self.field_name}")
+        return self
+
+    async def chunks(self):
+        """Yield the file's bytes as they arrive, then read the rest of the body"""
+        while True:
+            if self._pending:
+                data = b"".join(self._pending)
+                self._pending.clear()
+                yield data
+            if not await self._read():
+                break
+        if not self._field_done or not self._finished:
+            raise MultipartError("Incomplete multipart body")
+
+    async def _read(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            return False
+        self.body_size += len(chunk)
+        if self.max_body_size is not None and self.body_size > self.max_body_size:
+            raise MultipartError("Request body too large", 413)
+        try:
+            self._parser.write(chunk)
+        except MultipartParseError as e:
+            raise MultipartError(f"Malformed multipart body: {e}")
+        return True
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data, start, end):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        disposition, params = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if disposition != b"form-data" or self._field_done:
+            return
+        if params.get(b"name", b"").decode("utf-8", "replace") != self.field_name:
+            return
+        self._in_field = True
+        self.filename = params.get(b"filename", b"").decode("utf-8", "replace")
+        content_type, _ = parse_options_header(self._headers.get(b"content-type", b""))
+        self.content_type = content_type.decode("latin-1") or "application/octet-stream"
+
+    def _on_part_data(self, data, start, end):
+        if self._in_field:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_field:
+            self._in_field = False
+            self._field_done = True
+
+    def _on_end(self):
+        self._finished = True
@@ -0,0 +1,186 @@
+"""Streaming subtitle pipeline: Whisper segments through translation into SRT files
+
+Segments move through bounded asyncio queues, from the transcription to a
+translation stage per target language and on to a writer that appends
+that language's SRT file. Early segments are translated and written while
+Whisper is still decoding later audio, so a job takes about as long as
+its slowest stage instead of the sum of them, and a stage that falls
+behind holds the others back rather than letting segments pile up.
+
+The event loop runs in a thread of its own; feed() and finish() are meant
+for the blocking transcription thread.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from metrics import SUBTITLE_WRITE_SECONDS
+from subtitles import SrtAppender
+
+# Marks the end of the segment stream on every queue
+_END = object()
+
+
+class SubtitlePipeline:
+    """Translate and write segments per language as they are fed in
+
+    translate(segments, language) returns the texts to write and runs in a
+    worker thread; up to translate_concurrency chunks per language are in
+    flight at once, and are written in order. on_written(language,
+    segments, texts) is called after each chunk reaches its file. At most
+    queue_size chunks wait in front of each stage.
+    """
+
+    def __init__(self, languages, translate, output_paths, on_written=None, queue_size=8,
+                 translate_concurrency=2):
+        self.languages = list(languages)
+        self.translate = translate
+        self.output_paths = dict(output_paths)
+        self.on_written = on_written
+        self.queue_size = queue_size
+        self.translate_concurrency = max(translate_concurrency, 1)
+        # Texts written so far, per language, in segment order
+        self.texts = {language: [] for language in self.languages}
+        self.fed = 0
+        self._loop = None
+        self._thread = None
+        self._main = None
+        self._input = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),),
+                                        name="subtitle-pipeline", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def feed(self, segments):
+        """Queue segments for every language, waiting while the pipeline is full"""
+        if not segments:
+            return
+        self._put(list(segments))
+        self.fed += len(segments)
+
+    def finish(self):
+        """Wait until everything fed has been written; returns {language: texts}"""
+        try:
+            self._put(_END)
+        except Exception:
+            pass
+        self._thread.join()
+        self._loop.close()
+        if self._error is not None:
+            raise self._error
+        return self.texts
+
+    def abort(self):
+        """Stop at once, e.g. when the job fails or is cancelled; partial files are left to the caller"""
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._main.cancel)
+            self._thread.join()
+        if not self._loop.is_closed():
+            self._loop.close()
+
+    def _put(self, item):
+        put = self._input.put(item)
+        try:
+            future = asyncio.run_coroutine_threadsafe(put, self._loop)
+        except RuntimeError:
+            # The loop is closed already
+            put.close()
+            raise self._error or RuntimeError("Subtitle pipeline stopped")
+        try:
+            while True:
+                try:
+                    return future.result(timeout=1.0)
+                except concurrent.futures.TimeoutError:
+                    # Still waiting for room, unless the loop is gone
+                    if not self._thread.is_alive():
+                        future.cancel()
+                        break
+        except concurrent.futures.CancelledError:
+            # The pipeline stopped while this waited for room
+            pass
+        raise self._error or RuntimeError("Subtitle pipeline stopped")
+
+    async def _run(self):
+        self._main = asyncio.current_task()
+        self._input = asyncio.Queue(self.queue_size)
+        self._ready.set()
+        lanes = {language: asyncio.Queue(self.queue_size) for language in self.languages}
+        tasks = [asyncio.create_task(self._fan_out(lanes))]
+        for language, lane in lanes.items():
+            in_flight = asyncio.Queue(self.translate_concurrency)
+            tasks.append(asyncio.create_task(self._translate_lane(language, lane, in_flight)))
+            tasks.append(asyncio.create_task(self._write_lane(language, in_flight)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e if isinstance(e, Exception) else RuntimeError("Subtitle pipeline cancelled")
+            # Release everything, including a feed() waiting for queue space
+            pending = [task for task in asyncio.all_tasks() if task is not self._main]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fan_out(self, lanes):
+        while True:
+            segments = await self._input.get()
+            for lane in lanes.values():
+                await lane.put(segments)
+            if segments is _END:
+                return
+
+    async def _translate_lane(self, language, lane, in_flight):
+        while True:
+            segments = await lane.get()
+            if segments is _END:
+                await in_flight.put(_END)
+                return
+            translation = asyncio.create_task(asyncio.to_thread(self.translate, segments, language))
+            # The writer raises the error; this only keeps a chunk the writer
+            # never reaches from being reported as unretrieved
+            translation.add_done_callback(lambda task: task.cancelled() or task.exception())
+            # Waits while translate_concurrency chunks are unwritten
+            await in_flight.put((segments, translation))
+
+    async def _write_lane(self, language, in_flight):
+        # Only the time spent on the file counts, as for a file written in
+        # one go, not the wait for translations in between
+        writing = _Stopwatch()
+        output = await asyncio.to_thread(writing.run, SrtAppender, self.output_paths[language])
+        try:
+            while True:
+                item = await in_flight.get()
+                if item is _END:
+                    return
+                segments, translation = item
+                texts = await translation
+                await asyncio.to_thread(writing.run, output.append, segments, texts)
+                self.texts[language].extend(texts)
+                if self.on_written:
+                    self.on_written(language, segments, texts)
+        finally:
+            writing.run(output.close)
+            SUBTITLE_WRITE_SECONDS.labels(format="srt").observe(writing.seconds)
+
+
+class _Stopwatch:
+    """Adds up the time spent in the calls made through run()"""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def run(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.seconds += time.perf_counter() - started
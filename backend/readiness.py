@@ -0,0 +1,123 @@
+"""Startup warm-up in the background, and the readiness it reports
+
+The server starts listening as soon as its module is imported; slow
+steps such as loading the Whisper model and running a first inference
+happen afterwards in a thread, and /readyz says whether they are done.
+"""
+import asyncio
+import os
+import threading
+import time
+
+from metrics import COLD_START_SECONDS, SERVICE_READY, log_event
+
+_IMPORTED_AT = time.time()
+
+
+def process_started_at():
+    """Wall-clock time this process started, so cold starts include interpreter start-up and imports
+
+    Read from /proc on Linux; elsewhere the time this module was imported.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields resume after its ")"
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED_AT
+
+
+class Readiness:
+    """Named startup steps, run once each in order; ready when all have succeeded
+
+    A step that raises is retried every retry_seconds, so a model download
+    that fails on boot does not need a restart to recover.
+    """
+
+    def __init__(self, retry_seconds=30.0):
+        self.retry_seconds = retry_seconds
+        self.started_at = process_started_at()
+        self.listening_at = None
+        self.ready_at = None
+        self._steps = []
+        self._state = {}
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        SERVICE_READY.set_function(lambda: 1.0 if self.ready else 0.0)
+
+    def add(self, name, step):
+        self._steps.append((name, step))
+        self._state[name] = {"status": "pending", "attempts": 0, "seconds": None, "error": None}
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        """Run the steps in a background thread"""
+        self._thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+        self._thread.start()
+
+    def mark_listening(self):
+        """Record that the server has bound its port and accepts connections"""
+        self.listening_at = time.time()
+        log_event("listening", seconds=round(self.listening_at - self.started_at, 3))
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        """Run the steps in this thread; returns False if stopped before they all succeeded"""
+        for name, step in self._steps:
+            state = self._state[name]
+            while True:
+                if self._stopping.is_set():
+                    return False
+                state["status"] = "running"
+                state["attempts"] += 1
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    state.update(status="failed", seconds=round(time.perf_counter() - started, 3), error=str(e))
+                    log_event("warm_up_failed", step=name, attempt=state["attempts"], error=str(e))
+                    self._stopping.wait(self.retry_seconds)
+                    continue
+                state.update(status="done", seconds=round(time.perf_counter() - started, 3), error=None)
+                log_event("warm_up", step=name, seconds=state["seconds"])
+                break
+
+        self.ready_at = time.time()
+        self._ready.set()
+        COLD_START_SECONDS.set(self.cold_start_seconds())
+        log_event("ready", cold_start_seconds=round(self.cold_start_seconds(), 3))
+        return True
+
+    async def wait(self, timeout):
+        """Wait up to timeout seconds for readiness without blocking the event loop"""
+        deadline = time.monotonic() + timeout
+        while not self.ready:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(remaining, 0.1))
+        return True
+
+    def cold_start_seconds(self):
+        return self.ready_at - self.started_at if self.ready_at else None
+
+    def to_dict(self):
+        cold_start = self.cold_start_seconds()
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "listening_at": self.listening_at,
+            "ready_at": self.ready_at,
+            "seconds_to_listen": round(self.listening_at - self.started_at, 3) if self.listening_at else None,
+            "cold_start_seconds": round(cold_start, 3) if cold_start is not None else None,
+            "steps": {name: dict(state) for name, state in self._state.items()},
+        }
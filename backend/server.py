@@ -1,17 +1,62 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse, Response, JSONResponse
+from starlette.concurrency import run_in_threadpool
 import os
 import uuid
-import subprocess
-import whisper
-import tempfile
+import hashlib
 from pathlib import Path
 import json
-from typing import Optional
+from typing import List, Optional, Union
+from pydantic import BaseModel
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import asyncio
 import aiofiles
-from googletrans import Translator
 import re
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+from jobs import JobManager, JobError, JobCancelled, JOB_CANCELLED, FINISHED_STATES, PRIORITIES
+from job_queue import JobQueue, QueueJobManager
+from chunked_upload import UploadSessionStore, UploadError
+from multipart_stream import MultipartFileStream, MultipartError
+from translation import create_backend, needs_translation, translate_segments
+from translation_cache import TranslationCache
+from transcription_cache import TranscriptionCache, hash_file, options_key
+from metadata import MetadataStore
+from transcript_index import TranscriptIndex
+from audio import load_audio, probe_duration, SAMPLE_RATE
+import longform
+import vad
+from pipeline import SubtitlePipeline
+from models import ModelRegistry, ModelError, available_models
+from inference import (
+    INFERENCE_PROFILES, LanguageError, ProfileError, resolve_profile, decode_options, profile_settings,
+    parse_source_language, reliable_language,
+)
+import inference
+import subtitles
+import janitor
+from janitor import Janitor, ManagedDirectory
+from subtitles import RenderCache
+from admission import AdmissionController, AdmissionRejected
+from http_cache import cached_file_response, strong_etag
+from readiness import Readiness
+from metrics import (
+    EXTRACTION_SECONDS, SUBTITLE_WRITE_SECONDS, QUEUE_DEPTH, JOBS_IN_FLIGHT, VAD_SKIPPED_SECONDS,
+    NOT_READY_REJECTIONS,
+    log_event, timed, observe_inference, observe_upload
+)
+
+# Pipeline events are logged as one JSON object per line
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO"),
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
 
 app = FastAPI()
 
@@ -30,206 +75,1715 @@ OUTPUT_DIR = Path("outputs")
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Load Whisper model (using base model for speed, can be changed to large for accuracy)
-print("Loading Whisper model...")
-whisper_model = whisper.load_model("base")
-print("Whisper model loaded successfully!")
-
-# Initialize translator
-translator = Translator()
-
-def seconds_to_srt_time(seconds):
-    """Convert seconds to SRT time format"""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
-
-def extract_audio_from_video(video_path, audio_path):
-    """Extract audio from video using FFmpeg"""
-    try:
-        cmd = [
-            'ffmpeg', '-i', str(video_path), 
-            '-vn', '-acodec', 'pcm_s16le', 
-            '-ar', '16000', '-ac', '1', 
-            str(audio_path), '-y'
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise Exception(f"FFmpeg error: {result.stderr}")
-        return True
+# Upload limits: files are streamed to disk as they arrive and rejected as
+# soon as they grow past MAX_UPLOAD_SIZE; multi-part uploads are assembled
+# in UPLOAD_CHUNK_SIZE pieces
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", str(5 * 1024 ** 3)))
+# Room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+MAX_PART_SIZE = int(os.environ.get("MAX_PART_SIZE", str(64 * 1024 ** 2)))
+
+upload_sessions = UploadSessionStore(
+    UPLOAD_DIR / ".parts",
+    max_upload_size=MAX_UPLOAD_SIZE,
+    max_part_size=MAX_PART_SIZE,
+    copy_chunk_size=UPLOAD_CHUNK_SIZE,
+)
+
+# Retention: uploads and outputs expire their TTL after they were last
+# accessed, abandoned multi-part uploads after their last part, and the least
+# recently used files are evicted once the directories together exceed
+# STORAGE_QUOTA_BYTES (0 disables the quota). See janitor.py.
+UPLOAD_TTL_SECONDS = float(os.environ.get("UPLOAD_TTL_SECONDS", str(7 * 24 * 3600)))
+OUTPUT_TTL_SECONDS = float(os.environ.get("OUTPUT_TTL_SECONDS", str(30 * 24 * 3600)))
+UPLOAD_SESSION_TTL_SECONDS = float(os.environ.get("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+STORAGE_QUOTA_BYTES = int(os.environ.get("STORAGE_QUOTA_BYTES", "0"))
+JANITOR_INTERVAL_SECONDS = float(os.environ.get("JANITOR_INTERVAL_SECONDS", "600"))
+
+# Whisper models are loaded on first use (base by default for speed; requests
+# may ask for another size or a "fast"/"balanced"/"accurate" profile). Up to
+# MAX_RESIDENT_MODELS stay loaded within MODEL_MEMORY_BUDGET_MB, LRU first out.
+WHISPER_MODEL_NAME = os.environ.get("WHISPER_MODEL", "base")
+MAX_RESIDENT_MODELS = int(os.environ.get("MAX_RESIDENT_MODELS", "2"))
+MODEL_MEMORY_BUDGET_MB = os.environ.get("MODEL_MEMORY_BUDGET_MB")
+# Extra keyword arguments for model.transcribe; part of the transcription cache key
+TRANSCRIBE_OPTIONS = {}
+# Decode settings and quantization used unless a request picks another
+# "speed"/"standard"/"quality" profile (see inference.py)
+INFERENCE_PROFILE = resolve_profile(os.environ.get("INFERENCE_PROFILE"), "standard")
+
+# Decoded audio longer than this is buffered in a memory-mapped temp file
+# instead of RAM (16 kHz float32 is ~230 MB per hour)
+AUDIO_MEMMAP_THRESHOLD_SECONDS = float(os.environ.get("AUDIO_MEMMAP_THRESHOLD_SECONDS", str(2 * 3600)))
+
+# Long-form mode: audio longer than LONGFORM_MIN_SECONDS is split into
+# overlapping windows transcribed in parallel by LONGFORM_WORKERS processes,
+# each with its own copy of the model (0 or 1 disables it)
+LONGFORM_WORKERS = int(os.environ.get("LONGFORM_WORKERS", str(max((os.cpu_count() or 1) // 2, 1))))
+LONGFORM_THREADS = max((os.cpu_count() or 1) // max(LONGFORM_WORKERS, 1), 1)
+LONGFORM_MIN_SECONDS = float(os.environ.get("LONGFORM_MIN_SECONDS", str(20 * 60)))
+LONGFORM_WINDOW_SECONDS = float(os.environ.get("LONGFORM_WINDOW_SECONDS", str(10 * 60)))
+LONGFORM_OVERLAP_SECONDS = float(os.environ.get("LONGFORM_OVERLAP_SECONDS", "5"))
+longform_executor = None
+
+# Voice activity detection: pauses longer than VAD_MIN_SILENCE_SECONDS are
+# cut out before Whisper sees the audio, padded by VAD_SPEECH_PAD_SECONDS,
+# and timestamps are mapped back afterwards (0 disables)
+VAD_MIN_SILENCE_SECONDS = float(os.environ.get("VAD_MIN_SILENCE_SECONDS", "1.0"))
+VAD_SPEECH_PAD_SECONDS = float(os.environ.get("VAD_SPEECH_PAD_SECONDS", "0.2"))
+# With VAD on, /api/detect-language looks this far into the audio for the
+# speech to detect the language from, so a silent or musical intro does not
+# decide it
+DETECTION_SCAN_SECONDS = float(os.environ.get("DETECTION_SCAN_SECONDS", "120"))
+
+# Chunks of segments (one Whisper window each) that may wait in front of each
+# stage of the subtitle pipeline before transcription has to pause
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "8"))
+
+# Shorter recordings are transcribed in sequential windows of this length so
+# segments reach clients and the subtitle pipeline as each window finishes
+# (0 disables). Neighbouring windows share INCREMENTAL_OVERLAP_SECONDS of
+# audio around each cut, and the words heard twice are merged
+INCREMENTAL_WINDOW_SECONDS = float(os.environ.get("INCREMENTAL_WINDOW_SECONDS", "60"))
+INCREMENTAL_OVERLAP_SECONDS = float(os.environ.get("INCREMENTAL_OVERLAP_SECONDS", "2"))
+
+# Number of videos processed at the same time by the job worker pool, and
+# how many of them may be decoding or transcribing audio at once (the rest
+# translate and write subtitles)
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", "2"))
+MAX_CONCURRENT_TRANSCRIPTIONS = int(os.environ.get("MAX_CONCURRENT_TRANSCRIPTIONS", str(MAX_CONCURRENT_JOBS)))
+transcription_slots = threading.BoundedSemaphore(MAX_CONCURRENT_TRANSCRIPTIONS)
+
+# torch threads for in-process inference. Transcriptions on one resident
+# model take turns (see LoadedModel.lock), so with the default single model
+# only one decodes at a time and it gets every core; torch's setting is per
+# process, so splitting the cores between transcription slots would leave
+# most of them idle.
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", str(os.cpu_count() or 1)))
+
+model_registry = ModelRegistry(
+    default_model=WHISPER_MODEL_NAME,
+    max_models=MAX_RESIDENT_MODELS,
+    memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB) * 1024 ** 2 if MODEL_MEMORY_BUDGET_MB else None,
+    num_threads=INFERENCE_THREADS,
+)
+
+# Admission control: beyond these limits requests get 429 with Retry-After.
+# Clients are told apart by the X-Client-ID header, else their address. 0
+# disables a limit.
+MAX_QUEUED_JOBS = int(os.environ.get("MAX_QUEUED_JOBS", "100"))
+MIN_CLIENT_QUEUED_JOBS = int(os.environ.get("MIN_CLIENT_QUEUED_JOBS", "1"))
+MAX_INFLIGHT_UPLOAD_BYTES = int(os.environ.get("MAX_INFLIGHT_UPLOAD_BYTES", str(8 * 1024 ** 3)))
+
+# Subtitle languages offered by /api/languages; "original" means no translation
+SUPPORTED_LANGUAGES = {
+    "original": "Original Language",
+    "en": "English",
+    "es": "Spanish", 
+    "fr": "French",
+    "de": "German",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "ru": "Russian",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "zh": "Chinese",
+    "ar": "Arabic",
+    "hi": "Hindi"
+}
+
+# Initialize translator backend ("google" or "identity", see translation.py)
+TRANSLATOR_BACKEND = os.environ.get("TRANSLATOR_BACKEND", "google")
+TRANSLATION_BATCH_SIZE = int(os.environ.get("TRANSLATION_BATCH_SIZE", "50"))
+TRANSLATION_CONCURRENCY = int(os.environ.get("TRANSLATION_CONCURRENCY", "4"))
+# A target that is the spoken language is not translated, if the language
+# was named by the client or detected with at least this probability
+LANGUAGE_SKIP_MIN_PROBABILITY = float(os.environ.get("LANGUAGE_SKIP_MIN_PROBABILITY", "0.8"))
+translator = create_backend(TRANSLATOR_BACKEND)
+
+# Translation memory shared by all jobs; survives restarts on disk
+CACHE_DIR = Path(os.environ.get("CACHE_DIR", "cache"))
+TRANSLATION_CACHE_MEMORY_BYTES = int(os.environ.get("TRANSLATION_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+translation_cache = TranslationCache(
+    CACHE_DIR / "translations.db",
+    max_memory_bytes=TRANSLATION_CACHE_MEMORY_BYTES,
+)
+
+# Whisper results keyed by upload content hash, so repeat requests and
+# byte-identical re-uploads skip ffmpeg and Whisper
+transcription_cache = TranscriptionCache(CACHE_DIR / "transcriptions.db")
+
+# Files and jobs by id, so uploads are found without scanning UPLOAD_DIR and
+# jobs can be listed after they leave memory
+METADATA_DB = Path(os.environ.get("METADATA_DB", str(CACHE_DIR / "metadata.db")))
+metadata_store = MetadataStore(METADATA_DB)
+
+# Full-text index of every file's transcript segments for /api/search,
+# updated as jobs finish
+SEARCH_INDEX_DB = Path(os.environ.get("SEARCH_INDEX_DB", str(CACHE_DIR / "search.db")))
+transcript_index = TranscriptIndex(SEARCH_INDEX_DB)
+
+# "all" runs jobs inside this process. "api" only puts them in a SQLite
+# queue for separate "worker" processes (worker.py), which may run on other
+# machines when the queue database, uploads, outputs and caches are on
+# shared storage. A job whose worker misses heartbeats for
+# WORKER_HEARTBEAT_TIMEOUT seconds is put back in the queue, at most
+# MAX_JOB_ATTEMPTS times in total.
+APP_ROLE = os.environ.get("APP_ROLE", "all")
+if APP_ROLE not in ("all", "api", "worker"):
+    raise ValueError(f"Unknown APP_ROLE: {APP_ROLE}")
+JOB_QUEUE_DB = Path(os.environ.get("JOB_QUEUE_DB", str(CACHE_DIR / "queue.db")))
+WORKER_HEARTBEAT_TIMEOUT = float(os.environ.get("WORKER_HEARTBEAT_TIMEOUT", "60"))
+MAX_JOB_ATTEMPTS = int(os.environ.get("MAX_JOB_ATTEMPTS", "3"))
+JOB_STAGES = ("extract_audio", "transcribe", "create_srt")
+
+# Processes that run jobs load the default model and run one dummy
+# inference right after start-up, while already accepting connections;
+# the API process of an "api" deployment only needs it for
+# /api/detect-language. A failed warm-up is retried every
+# WARM_UP_RETRY_SECONDS.
+WARM_UP_MODEL = os.environ.get("WARM_UP_MODEL", "0" if APP_ROLE == "api" else "1") == "1"
+WARM_UP_RETRY_SECONDS = float(os.environ.get("WARM_UP_RETRY_SECONDS", "30"))
+# Requests that need the model and arrive before warm-up has finished wait
+# up to READY_WAIT_SECONDS, then get 503 with Retry-After (0 rejects at once)
+READY_WAIT_SECONDS = float(os.environ.get("READY_WAIT_SECONDS", "30"))
+READY_RETRY_AFTER_SECONDS = int(os.environ.get("READY_RETRY_AFTER_SECONDS", "10"))
+
+def extract_audio_from_video(video_path, progress_callback=None, max_seconds=None):
+    """Decode the audio of a video to a 16 kHz mono float32 array using FFmpeg"""
+    try:
+        with timed("extract_audio", EXTRACTION_SECONDS, video=Path(video_path).name) as log_fields:
+            audio = load_audio(
+                video_path,
+                memmap_threshold_seconds=AUDIO_MEMMAP_THRESHOLD_SECONDS,
+                spill_dir=UPLOAD_DIR,
+                progress_callback=progress_callback,
+                max_seconds=max_seconds
+            )
+            log_fields["audio_seconds"] = round(len(audio) / SAMPLE_RATE, 3)
+        return audio
     except Exception as e:
-        print(f"Audio extraction failed: {e}")
-        return False
+        log_event("extract_audio_failed", video=Path(video_path).name, error=str(e))
+        return None
+
+def record_transcription(model_name, mode, audio, seconds, result, profile=None):
+    """Observe inference time and real-time factor, and log the run"""
+    audio_seconds = len(audio) / SAMPLE_RATE
+    observe_inference(model_name, mode, audio_seconds, seconds)
+    log_event(
+        "transcribe",
+        model=model_name,
+        mode=mode,
+        inference_profile=profile,
+        seconds=round(seconds, 4),
+        audio_seconds=round(audio_seconds, 3),
+        real_time_factor=round(seconds / audio_seconds, 4) if audio_seconds else None,
+        segments=len(result["segments"]),
+        windows=result.get("windows", 1),
+    )
 
-def transcribe_audio(audio_path):
-    """Transcribe audio using Whisper"""
+def skip_silence(audio):
+    """Cut non-speech out of audio before transcription
+
+    Returns the speech-only audio, the vad.SpeechMap that restores its
+    timestamps, and a report of what was cut; (audio, None, None) when VAD
+    is disabled.
+    """
+    if VAD_MIN_SILENCE_SECONDS <= 0:
+        return audio, None, None
+    started = time.perf_counter()
+    speech_map = vad.SpeechMap(
+        vad.find_speech(audio, min_silence_seconds=VAD_MIN_SILENCE_SECONDS, speech_pad_seconds=VAD_SPEECH_PAD_SECONDS),
+        len(audio)
+    )
+    speech = speech_map.compact(audio)
+    report = dict(speech_map.stats(), seconds=round(time.perf_counter() - started, 4))
+    VAD_SKIPPED_SECONDS.inc(report["skipped_seconds"])
+    log_event("vad", **report)
+    return speech, speech_map, report
+
+def transcription_options(profile, language=None, base=None):
+    """model.transcribe keyword arguments for a profile, with an optional language hint"""
+    options = decode_options(profile, base)
+    if language:
+        # Whisper skips its own detection when the language is given
+        options["language"] = language
+    return options
+
+def detect_audio_language(audio, model_name=None, profile=None):
+    """Detect the spoken language from the start of audio
+
+    Returns a dict with language, probability, candidates and seconds;
+    language is None if detection failed, and Whisper then detects it
+    again while transcribing.
+    """
+    profile = profile or INFERENCE_PROFILE
+    try:
+        model_name = model_registry.resolve(model_name)
+        with model_registry.acquire(model_name, quantize=INFERENCE_PROFILES[profile]["quantize"]) as model:
+            started = time.perf_counter()
+            language, probability, candidates = inference.detect_language(model, audio)
+            seconds = time.perf_counter() - started
+        log_event("detect_language", model=model_name, language=language,
+                  probability=round(probability, 4), seconds=round(seconds, 4))
+        return {
+            "language": language,
+            "probability": round(probability, 4),
+            "candidates": {code: round(p, 4) for code, p in candidates.items()},
+            "source": "detected",
+            "seconds": round(seconds, 4),
+        }
+    except Exception as e:
+        log_event("detect_language_failed", model=model_name, error=str(e))
+        return {"language": None, "source": "failed"}
+
+class CallbackError(Exception):
+    """Carries an error raised by a caller's callback out of a transcription"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+def passing_errors(callback):
+    """Wrap callback so what it raises is re-raised to the caller, not taken for a Whisper failure"""
+    if callback is None:
+        return None
+
+    def call(*args):
+        try:
+            return callback(*args)
+        except (JobCancelled, JobError):
+            raise
+        except Exception as e:
+            raise CallbackError(e) from e
+    return call
+
+def transcribe_audio(audio, model_name=None, segment_callback=None, progress_callback=None,
+                     check_cancelled=None, profile=None, language=None):
+    """Transcribe audio (a float32 sample array) using Whisper
+
+    With INCREMENTAL_WINDOW_SECONDS set, the audio is decoded in sequential
+    windows and segment_callback receives segments as each window finishes.
+    language, if known, spares Whisper its own detection.
+    """
+    incremental = INCREMENTAL_WINDOW_SECONDS > 0
+    profile = profile or INFERENCE_PROFILE
+    options = transcription_options(profile, language, TRANSCRIBE_OPTIONS)
+    segment_callback = passing_errors(segment_callback)
+    progress_callback = passing_errors(progress_callback)
     try:
-        result = whisper_model.transcribe(str(audio_path))
+        model_name = model_registry.resolve(model_name)
+        with model_registry.acquire(model_name, quantize=INFERENCE_PROFILES[profile]["quantize"]) as model:
+            # Timed once the model is loaded and free, so only inference counts
+            started = time.perf_counter()
+            if incremental:
+                result = longform.transcribe_incremental(
+                    audio,
+                    model,
+                    options,
+                    window_seconds=INCREMENTAL_WINDOW_SECONDS,
+                    overlap_seconds=INCREMENTAL_OVERLAP_SECONDS,
+                    segment_callback=segment_callback,
+                    progress_callback=progress_callback,
+                    check_cancelled=check_cancelled
+                )
+            else:
+                result = model.transcribe(audio, **options)
+            seconds = time.perf_counter() - started
+        record_transcription(model_name, "incremental" if incremental else "single", audio, seconds, result, profile)
+        if segment_callback and not incremental:
+            segment_callback(result['segments'])
         return result
+    except (JobCancelled, JobError):
+        raise
+    except CallbackError as e:
+        # The subtitle pipeline failed, not Whisper; the job reports its error
+        raise e.error
     except Exception as e:
-        print(f"Transcription failed: {e}")
+        log_event("transcribe_failed", model=model_name, error=str(e))
         return None
 
-def translate_text(text, target_language='en'):
-    """Translate text using Google Translate"""
+def warm_up_model(model_name=None, profile=None):
+    """Load a model for an inference profile and run one dummy inference on it"""
+    profile = profile or INFERENCE_PROFILE
+    model_name = model_registry.resolve(model_name)
+    with model_registry.acquire(model_name, quantize=INFERENCE_PROFILES[profile]["quantize"]) as model:
+        started = time.perf_counter()
+        inference.warm_up(model, transcription_options(profile, base=TRANSCRIBE_OPTIONS))
+        seconds = time.perf_counter() - started
+    log_event("model_warm_up", model=model_name, inference_profile=profile, seconds=round(seconds, 4))
+
+def get_longform_executor():
+    """Process pool for long-form transcription, started on first use"""
+    global longform_executor
+    if longform_executor is None:
+        # spawn rather than fork: forking a process that already runs torch
+        # threads can deadlock the children
+        longform_executor = ProcessPoolExecutor(
+            max_workers=LONGFORM_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=longform.init_worker,
+            initargs=(TRANSCRIBE_OPTIONS, LONGFORM_THREADS)
+        )
+    return longform_executor
+
+def transcribe_audio_long_form(audio, model_name, segment_callback=None, progress_callback=None,
+                               check_cancelled=None, profile=None, language=None):
+    """Transcribe long audio in parallel windows across worker processes"""
+    profile = profile or INFERENCE_PROFILE
+    segment_callback = passing_errors(segment_callback)
+    progress_callback = passing_errors(progress_callback)
     try:
-        translated = translator.translate(text, dest=target_language)
-        return translated.text
+        # Includes each worker's first model load, which the workers keep
+        started = time.perf_counter()
+        result = longform.transcribe_long_form(
+            audio,
+            get_longform_executor(),
+            model_name,
+            # The workers add TRANSCRIBE_OPTIONS themselves
+            options=transcription_options(profile, language),
+            window_seconds=LONGFORM_WINDOW_SECONDS,
+            overlap_seconds=LONGFORM_OVERLAP_SECONDS,
+            progress_callback=progress_callback,
+            check_cancelled=check_cancelled,
+            segment_callback=segment_callback,
+            quantize=INFERENCE_PROFILES[profile]["quantize"]
+        )
+        record_transcription(model_name, "long_form", audio, time.perf_counter() - started, result, profile)
+        return result
+    except (JobCancelled, JobError):
+        raise
+    except CallbackError as e:
+        raise e.error
     except Exception as e:
-        print(f"Translation failed: {e}")
-        return text  # Return original text if translation fails
+        log_event("transcribe_failed", model=model_name, mode="long_form", error=str(e))
+        return None
 
-def create_srt_file(segments, target_language=None, output_path=None):
-    """Create SRT file from transcription segments"""
+def use_long_form(audio, requested=None):
+    """Decide whether to transcribe in parallel windows"""
+    if LONGFORM_WORKERS < 2:
+        return False
+    if requested is not None:
+        return requested
+    return len(audio) / SAMPLE_RATE >= LONGFORM_MIN_SECONDS
+
+def decode_mode_settings(requested=None):
+    """The settings that pick and shape the decode mode, for the transcription cache key
+
+    Windows are cut differently in each mode, so the text differs slightly.
+    use_long_form decides from these and the audio, which the content hash
+    fixes, so they pin the mode before the audio is decoded.
+    """
+    if LONGFORM_WORKERS < 2:
+        requested = False
+    settings = {"long_form": requested}
+    if requested is not False:
+        settings["long_form_windows"] = [LONGFORM_WINDOW_SECONDS, LONGFORM_OVERLAP_SECONDS]
+        if requested is None:
+            settings["long_form_min_seconds"] = LONGFORM_MIN_SECONDS
+    if requested is not True:
+        # A window of 0 is a single model.transcribe call
+        settings["incremental_windows"] = [INCREMENTAL_WINDOW_SECONDS, INCREMENTAL_OVERLAP_SECONDS]
+    return settings
+
+def translate_text(text, target_language='en'):
+    """Translate a single text with the configured translator backend"""
+    return translate_segments([text], target_language, translator, cache=translation_cache)[0]
+
+def translate_segment_texts(segments, target_language=None, progress_callback=None, source_language=None):
+    """Segment texts, translated in batched, concurrent requests if a target language is given"""
+    texts = [segment['text'].strip() for segment in segments]
+    if needs_translation(target_language, source_language):
+        texts = translate_segments(
+            texts,
+            target_language,
+            translator,
+            batch_size=TRANSLATION_BATCH_SIZE,
+            concurrency=TRANSLATION_CONCURRENCY,
+            progress_callback=progress_callback,
+            cache=translation_cache
+        )
+    return texts
+
+def write_subtitle_file(segments, texts, fmt="srt", output_path=None):
+    """Write segments with the given texts to a subtitle file"""
     if not output_path:
-        output_path = OUTPUT_DIR / f"{uuid.uuid4()}.srt"
-    
-    srt_content = []
-    
-    for i, segment in enumerate(segments, 1):
-        start_time = seconds_to_srt_time(segment['start'])
-        end_time = seconds_to_srt_time(segment['end'])
-        text = segment['text'].strip()
-        
-        # Translate if target language is specified
-        if target_language and target_language != 'original':
-            text = translate_text(text, target_language)
-        
-        srt_content.append(f"{i}")
-        srt_content.append(f"{start_time} --> {end_time}")
-        srt_content.append(text)
-        srt_content.append("")  # Empty line between subtitles
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(srt_content))
-    
+        output_path = OUTPUT_DIR / f"{uuid.uuid4()}{subtitles.FORMATS[fmt][1]}"
+
+    with timed("write_subtitles", SUBTITLE_WRITE_SECONDS.labels(format=fmt), format=fmt, segments=len(segments)):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for chunk in subtitles.render(segments, texts, fmt):
+                f.write(chunk)
+
     return output_path
 
+def create_srt_file(segments, target_language=None, output_path=None, progress_callback=None,
+                    source_language=None):
+    """Create SRT file from transcription segments"""
+    texts = translate_segment_texts(segments, target_language, progress_callback, source_language)
+    return write_subtitle_file(segments, texts, "srt", output_path)
+
+def subtitle_document_path(job_id):
+    return OUTPUT_DIR / f"{job_id}.segments.json"
+
+def save_subtitle_document(job_id, file_id, transcription_result, translations):
+    """Store the canonical segments and per-language texts of a finished job
+
+    Every subtitle format and layout is rendered from this file on demand.
+    """
+    document = {
+        "job_id": job_id,
+        "file_id": file_id,
+        "language_detected": transcription_result.get('language'),
+        "segments": [
+            {"start": segment['start'], "end": segment['end'], "text": segment['text'].strip()}
+            for segment in transcription_result['segments']
+        ],
+        "translations": translations,
+    }
+    path = subtitle_document_path(job_id)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, default=float)
+    tmp_path.replace(path)
+    return path
+
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy", "message": "Video transcription service is running"}
+    return {"status": "healthy", "message": "Video transcription service is running", "ready": readiness.ready}
+
+@app.get("/livez")
+async def liveness():
+    """The process is up and serving requests; says nothing about the model"""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness_check():
+    """200 once start-up warm-up has finished, else 503; both with the warm-up steps and cold-start timings"""
+    return JSONResponse(readiness.to_dict(), status_code=200 if readiness.ready else 503)
+
+async def require_ready():
+    """Hold a request that needs the model until warm-up has finished, for at most READY_WAIT_SECONDS"""
+    if readiness.ready or (READY_WAIT_SECONDS > 0 and await readiness.wait(READY_WAIT_SECONDS)):
+        return
+    NOT_READY_REJECTIONS.inc()
+    raise HTTPException(
+        status_code=503,
+        detail="Service is starting up; the model is not ready yet",
+        headers={"Retry-After": str(READY_RETRY_AFTER_SECONDS)}
+    )
+
+class UploadTooLarge(Exception):
+    """Raised while streaming an upload that exceeds its size limit"""
+
+async def stream_to_file(chunks, path, max_size):
+    """Write an async iterator of byte chunks to path, enforcing max_size as data arrives
+
+    Returns (size, sha256 hex digest) of the written data.
+    """
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(path, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        # Never leave a partial file behind
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return size, digest.hexdigest()
+
+def check_content_length(request: Request, max_size, detail):
+    """Reject requests that announce a body larger than max_size before reading it"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise HTTPException(status_code=413, detail=detail)
 
 @app.post("/api/upload-video")
-async def upload_video(file: UploadFile = File(...)):
-    """Upload video file and return file ID"""
-    try:
-        # Validate file type
-        if not file.content_type.startswith('video/'):
-            raise HTTPException(status_code=400, detail="File must be a video")
-        
-        # Generate unique file ID
-        file_id = str(uuid.uuid4())
-        file_extension = Path(file.filename).suffix
-        video_path = UPLOAD_DIR / f"{file_id}{file_extension}"
-        
-        # Save uploaded file
-        async with aiofiles.open(video_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
+async def upload_video(request: Request):
+    """Upload video file (multipart field "file") and return file ID
+
+    The body is parsed as it arrives and the file written straight to its
+    destination, so the size limit holds while bytes come in, whether or
+    not the client announced a Content-Length.
+    """
+    too_large = f"File exceeds maximum upload size of {MAX_UPLOAD_SIZE} bytes"
+    try:
+        # Multipart framing adds a little overhead on top of the file itself
+        check_content_length(request, MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD_BYTES, too_large)
+        # The upload budget is held from before the first byte is read, and
+        # the rate observed is that of the request body coming off the network
+        with admission.upload(client_id_for(request), upload_reservation(request, MAX_UPLOAD_SIZE)):
+            started = time.perf_counter()
+            upload = await MultipartFileStream(
+                request.stream(),
+                request.headers.get("content-type"),
+                max_body_size=MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD_BYTES
+            ).open()
+
+            # Validate file type
+            if not upload.content_type.startswith('video/'):
+                raise HTTPException(status_code=400, detail="File must be a video")
+
+            # Generate unique file ID
+            file_id = str(uuid.uuid4())
+            file_extension = Path(upload.filename).suffix
+            video_path = UPLOAD_DIR / f"{file_id}{file_extension}"
+
+            # Stream the uploaded file to disk without holding it in memory
+            size, content_hash = await stream_to_file(upload.chunks(), video_path, MAX_UPLOAD_SIZE)
+            elapsed = time.perf_counter() - started
+        observe_upload("single", size, elapsed)
+        admission.observe_upload(upload.body_size, elapsed)
+        await run_in_threadpool(
+            metadata_store.add_file,
+            file_id,
+            video_path,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=size,
+            content_hash=content_hash
+        )
+
         return {
             "file_id": file_id,
-            "filename": file.filename,
-            "size": len(content),
+            "filename": upload.filename,
+            "size": size,
+            "sha256": content_hash,
             "message": "Video uploaded successfully"
         }
-        
+
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=too_large)
+    except MultipartError as e:
+        raise HTTPException(status_code=e.status_code, detail=too_large if e.status_code == 413 else str(e))
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.post("/api/uploads")
+async def create_upload(
+    filename: str = Form(...),
+    content_type: str = Form(...),
+    total_size: Optional[int] = Form(None)
+):
+    """Start a resumable multi-part upload"""
+    if not content_type.startswith('video/'):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    try:
+        session = upload_sessions.create(filename, content_type, total_size)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    return {
+        "upload_id": session["upload_id"],
+        "part_size": session["part_size"],
+        "max_size": MAX_UPLOAD_SIZE,
+        "message": "Upload session created"
+    }
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """List the parts received so far, so a client can resume an interrupted upload"""
+    try:
+        return upload_sessions.get(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.put("/api/uploads/{upload_id}/parts/{part_number}")
+async def upload_part(upload_id: str, part_number: int, request: Request):
+    """Upload one part (the raw request body); re-sending a part replaces it"""
+    try:
+        check_content_length(request, MAX_PART_SIZE, f"Part exceeds maximum part size of {MAX_PART_SIZE} bytes")
+        part_path = upload_sessions.part_path(upload_id, part_number)
+        with admission.upload(client_id_for(request), upload_reservation(request, MAX_PART_SIZE)):
+            started = time.perf_counter()
+            size, _ = await stream_to_file(request.stream(), part_path, MAX_PART_SIZE)
+            elapsed = time.perf_counter() - started
+        observe_upload("part", size, elapsed)
+        admission.observe_upload(size, elapsed)
+        return upload_sessions.commit_part(upload_id, part_number, size)
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Part exceeds maximum part size of {MAX_PART_SIZE} bytes")
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    """Assemble the uploaded parts into a video file and return its file ID"""
+    try:
+        session = upload_sessions.get(upload_id)
+        file_id = str(uuid.uuid4())
+        video_path = UPLOAD_DIR / f"{file_id}{Path(session['filename']).suffix}"
+
+        # Concatenating multi-GB parts is blocking file I/O
+        size, content_hash = await run_in_threadpool(upload_sessions.complete, upload_id, video_path)
+        await run_in_threadpool(
+            metadata_store.add_file,
+            file_id,
+            video_path,
+            filename=session["filename"],
+            content_type=session["content_type"],
+            size=size,
+            content_hash=content_hash
+        )
+
+        return {
+            "file_id": file_id,
+            "filename": session["filename"],
+            "size": size,
+            "sha256": content_hash,
+            "message": "Video uploaded successfully"
+        }
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abort a multi-part upload and delete its parts"""
+    try:
+        upload_sessions.abort(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    return {"upload_id": upload_id, "message": "Upload aborted"}
+
+@contextmanager
+def transcription_slot(job):
+    """Wait for one of MAX_CONCURRENT_TRANSCRIPTIONS, still honouring cancellation"""
+    while not transcription_slots.acquire(timeout=1.0):
+        job.check_cancelled()
+    try:
+        yield
+    finally:
+        transcription_slots.release()
+
+def run_processing_job(job):
+    """Job handler: extract audio, transcribe, translate, and generate SRT"""
+    video_file = metadata_store.get_file(job.file_id)
+    if not video_file or video_file["deleted_at"] or not os.path.exists(video_file["path"]):
+        raise JobError("Video file not found")
+
+    video_path = Path(video_file["path"])
+    janitor.touch(video_path)
+    target_languages = job.options.get("target_languages", ["original"])
+
+    # Files uploaded before hashes were recorded are hashed once here
+    content_hash = video_file["content_hash"]
+    if content_hash is None:
+        content_hash = hash_file(video_path)
+        metadata_store.update_file(job.file_id, content_hash=content_hash)
+
+    long_form = job.options.get("long_form")
+    model_name = model_registry.resolve(job.options.get("model"))
+    # Jobs queued before profiles existed run with the current default
+    profile = job.options.get("inference_profile") or INFERENCE_PROFILE
+    # A language named by the client replaces detection and changes the
+    # output, so it is part of the cache key; a detected one is what Whisper
+    # would have found itself
+    source_language = job.options.get("source_language")
+    settings = profile_settings(profile, dict(TRANSCRIBE_OPTIONS, language=source_language)
+                                if source_language else TRANSCRIBE_OPTIONS)
+    if VAD_MIN_SILENCE_SECONDS > 0:
+        settings["vad"] = {"min_silence_seconds": VAD_MIN_SILENCE_SECONDS, "speech_pad_seconds": VAD_SPEECH_PAD_SECONDS}
+    settings["decode"] = decode_mode_settings(long_form)
+    # Taken before the thread count is added, which does not change the text
+    settings_key = options_key(settings)
+    vad_report = None
+    transcription_result = transcription_cache.get(content_hash, model_name, settings)
+    transcription_cached = transcription_result is not None
+
+    # Segments stream through translation into the SRT files while Whisper
+    # is still working, and to event subscribers as they are produced. The
+    # pipeline starts once the spoken language is known.
+    # Named after the job, so the janitor leaves them alone while it runs.
+    # Each attempt writes files of its own and moves them into place when it
+    # completes, so a worker that lost the job to a retry cannot write into
+    # or delete the files of the attempt that took over.
+    output_paths = {language: OUTPUT_DIR / f"{job.id}.{language}.srt" for language in target_languages}
+    attempt = uuid.uuid4().hex[:8]
+    partial_paths = {
+        language: path.with_name(f"{path.name}.{attempt}.part") for language, path in output_paths.items()
+    }
+    pipeline = None
+    srt_total = None
+
+    def start_pipeline(detection):
+        nonlocal pipeline
+        # Translation to the spoken language is only skipped when the
+        # detection is sure of it; otherwise the translator detects the
+        # source itself
+        spoken = reliable_language(detection, LANGUAGE_SKIP_MIN_PROBABILITY)
+        job.publish("language", detection)
+
+        def publish_written(language, segments, texts):
+            if needs_translation(language, spoken):
+                for segment, text in zip(segments, texts):
+                    job.publish("translation", {"language": language, "index": segment['id'], "text": text})
+            if srt_total:
+                written = min(len(texts) for texts in pipeline.texts.values())
+                job.update_progress("create_srt", written / srt_total)
+
+        pipeline = SubtitlePipeline(
+            target_languages,
+            lambda segments, language: translate_segment_texts(segments, language, source_language=spoken),
+            partial_paths,
+            on_written=publish_written,
+            queue_size=PIPELINE_QUEUE_SIZE
+        ).start()
+
+    def publish_segments(segments):
+        for segment in segments:
+            job.publish("segment", {
+                "index": segment['id'],
+                "start": segment['start'],
+                "end": segment['end'],
+                "text": segment['text'].strip()
+            })
+        pipeline.feed(segments)
+
+    try:
+        if transcription_cached:
+            log_event("transcription_cache_hit", job_id=job.id, file_id=job.file_id, model=model_name)
+            job.skip_stage("extract_audio")
+            job.skip_stage("transcribe")
+            # A client-named language is part of the cache key; a detected
+            # one keeps its probability, so the same translations are skipped
+            language_detection = {
+                "language": transcription_result.get('language'),
+                "probability": transcription_result.get('language_probability'),
+                "source": "client" if source_language else "cache",
+            }
+            start_pipeline(language_detection)
+            segments = transcription_result['segments']
+            for i in range(0, len(segments), TRANSLATION_BATCH_SIZE):
+                publish_segments(segments[i:i + TRANSLATION_BATCH_SIZE])
+        else:
+            # Decoded audio only exists while a transcription slot is held
+            with transcription_slot(job):
+                # Step 1: Extract audio
+                job.start_stage("extract_audio")
+                audio = extract_audio_from_video(
+                    video_path,
+                    progress_callback=lambda p: job.update_progress("extract_audio", p)
+                )
+                if audio is None:
+                    raise JobError("Audio extraction failed")
+                metadata_store.update_file(job.file_id, duration=len(audio) / SAMPLE_RATE)
+                # Whisper only sees the speech; its timestamps are mapped back
+                audio, speech_map, vad_report = skip_silence(audio)
+                restore = speech_map.restore_segments if speech_map else list
+                job.finish_stage("extract_audio")
+
+                # Step 2: Find the spoken language from the first 30 s of
+                # speech, unless the client named it, then transcribe with it
+                # as a hint
+                job.start_stage("transcribe")
+                if not len(audio):
+                    # Nothing but silence: Whisper could only make text up
+                    language_detection = {"language": source_language, "source": "client" if source_language else "skipped"}
+                    start_pipeline(language_detection)
+                    transcription_result = {"text": "", "segments": [], "language": source_language}
+                else:
+                    if source_language:
+                        language_detection = {"language": source_language, "source": "client"}
+                    else:
+                        language_detection = detect_audio_language(audio, model_name, profile)
+                    start_pipeline(language_detection)
+                    long_form = use_long_form(audio, long_form)
+                    transcribe = transcribe_audio_long_form if long_form else transcribe_audio
+                    started = time.perf_counter()
+                    transcription_result = transcribe(
+                        audio,
+                        model_name,
+                        segment_callback=lambda segments: publish_segments(restore(segments)),
+                        progress_callback=lambda p: job.update_progress("transcribe", p),
+                        check_cancelled=job.check_cancelled,
+                        profile=profile,
+                        language=language_detection["language"]
+                    )
+                    if transcription_result and vad_report and vad_report["speech_seconds"]:
+                        # Assuming the cut audio would have cost as much per second
+                        vad_report["inference_seconds_saved"] = round(
+                            (time.perf_counter() - started)
+                            * vad_report["skipped_seconds"] / vad_report["speech_seconds"], 3
+                        )
+                # Release the decoded samples before the translation stage
+                del audio
+                if not transcription_result:
+                    raise JobError("Transcription failed")
+                transcription_result["segments"] = restore(transcription_result["segments"])
+                transcription_result["language_probability"] = language_detection.get("probability")
+                transcription_cache.put(content_hash, model_name, settings, transcription_result)
+                settings["threads"] = LONGFORM_THREADS if long_form else INFERENCE_THREADS
+                job.finish_stage("transcribe")
+
+        # Step 3: Wait for the translations and SRT files still in the
+        # pipeline; a target that is the spoken language needs no
+        # translator calls
+        job.start_stage("create_srt")
+        srt_total = pipeline.fed
+        translations = pipeline.finish()
+    except BaseException:
+        if pipeline is not None:
+            pipeline.abort()
+        for path in partial_paths.values():
+            path.unlink(missing_ok=True)
+        raise
+    spoken_language = transcription_result.get('language')
+    metadata_store.update_file(job.file_id, language=spoken_language)
+    if any(len(texts) != len(transcription_result['segments']) for texts in translations.values()):
+        for path in partial_paths.values():
+            path.unlink(missing_ok=True)
+        raise JobError("Subtitle pipeline lost segments")
+    for language, path in partial_paths.items():
+        os.replace(path, output_paths[language])
+
+    save_subtitle_document(job.id, job.file_id, transcription_result, translations)
+    transcript_index.add(
+        job.file_id,
+        job.id,
+        transcription_result['segments'],
+        language=transcription_result.get('language'),
+        model=model_name,
+        content_hash=content_hash,
+        settings=settings_key
+    )
+    job.finish_stage("create_srt")
+
+    srt_files = [{"language": language, "srt_file": output_paths[language].name} for language in target_languages]
+
+    log_event(
+        "job_processed",
+        job_id=job.id,
+        file_id=job.file_id,
+        model=model_name,
+        inference_profile=profile,
+        long_form=bool(long_form),
+        transcription_cached=transcription_cached,
+        language=spoken_language,
+        language_source=language_detection["source"],
+        vad_skipped_seconds=vad_report["skipped_seconds"] if vad_report else None,
+        segments=len(transcription_result['segments']),
+        languages=target_languages,
+        stage_seconds={
+            name: round(stage["finished_at"] - stage["started_at"], 3)
+            for name, stage in job.stages.items()
+            if stage.get("started_at") and stage.get("finished_at")
+        }
+    )
+
+    return {
+        "job_id": job.id,
+        "file_id": job.file_id,
+        "srt_file": srt_files[0]["srt_file"],
+        "srt_files": srt_files,
+        "transcription": transcription_result['text'],
+        "language_detected": transcription_result.get('language', 'unknown'),
+        "language_detection": language_detection,
+        "translations_skipped": [
+            language for language in target_languages
+            if language != "original" and not needs_translation(
+                language, reliable_language(language_detection, LANGUAGE_SKIP_MIN_PROBABILITY)
+            )
+        ],
+        "segments_count": len(transcription_result['segments']),
+        "transcription_cached": transcription_cached,
+        "model": model_name,
+        "inference_profile": profile,
+        "inference": settings,
+        "vad": vad_report,
+        "long_form": bool(long_form),
+        "subtitle_formats": list(subtitles.FORMATS),
+        "message": "Video processed successfully"
+    }
+
+def persist_job(job):
+    metadata_store.save_job(job.to_dict())
+    if job.finished and job.started_at:
+        admission.observe_job(job.finished_at - job.started_at)
+
+if APP_ROLE == "all":
+    job_queue = None
+    job_manager = JobManager(
+        run_processing_job,
+        max_workers=MAX_CONCURRENT_JOBS,
+        stages=JOB_STAGES,
+        on_status=persist_job,
+    )
+else:
+    job_queue = JobQueue(
+        JOB_QUEUE_DB,
+        heartbeat_timeout=WORKER_HEARTBEAT_TIMEOUT,
+        max_attempts=MAX_JOB_ATTEMPTS,
+    )
+    job_manager = QueueJobManager(job_queue, stages=JOB_STAGES, on_status=persist_job)
+
+admission = AdmissionController(
+    job_manager,
+    max_queued_jobs=MAX_QUEUED_JOBS,
+    max_upload_bytes=MAX_INFLIGHT_UPLOAD_BYTES,
+    min_client_jobs=MIN_CLIENT_QUEUED_JOBS,
+)
+
+def client_id_for(request: Request):
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+def too_many_requests(e):
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def upload_reservation(request: Request, max_size):
+    """Bytes to hold against the upload budget: the announced length, else the most allowed"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        return min(int(content_length), max_size)
+    return min(max_size, MAX_INFLIGHT_UPLOAD_BYTES or max_size)
+
+QUEUE_DEPTH.set_function(job_manager.queue_depth)
+JOBS_IN_FLIGHT.set_function(lambda: len(job_manager.active_jobs()))
+
+def forget_deleted_upload(directory_name, file_name):
+    if directory_name == "uploads":
+        file_id = file_name.split('.', 1)[0]
+        metadata_store.update_file(file_id, deleted_at=time.time())
+        transcript_index.remove(file_id)
+
+storage_janitor = Janitor(
+    [
+        ManagedDirectory("uploads", UPLOAD_DIR, ttl_seconds=UPLOAD_TTL_SECONDS),
+        ManagedDirectory("upload_sessions", upload_sessions.root, session_ttl_seconds=UPLOAD_SESSION_TTL_SECONDS),
+        ManagedDirectory("outputs", OUTPUT_DIR, ttl_seconds=OUTPUT_TTL_SECONDS),
+    ],
+    quota_bytes=STORAGE_QUOTA_BYTES,
+    interval_seconds=JANITOR_INTERVAL_SECONDS,
+    # Uploads and outputs are named after the file and job they belong to
+    protected_ids=job_manager.referenced_ids,
+    on_delete=forget_deleted_upload,
+)
+
+def backfill_file_metadata():
+    """Register uploads that predate the metadata store"""
+    known = metadata_store.known_file_ids()
+    added = 0
+    for path in UPLOAD_DIR.iterdir():
+        file_id = path.name.split('.', 1)[0]
+        if not path.is_file() or file_id in known:
+            continue
+        try:
+            uuid.UUID(file_id)
+        except ValueError:
+            continue
+        stat = path.stat()
+        metadata_store.add_file(
+            file_id,
+            path,
+            filename=path.name,
+            size=stat.st_size,
+            created_at=stat.st_mtime
+        )
+        added += 1
+    if added:
+        log_event("metadata_backfill", files_added=added)
+
+def fail_interrupted_jobs():
+    """Mark the jobs an earlier server process was running as failed
+
+    Queued jobs outlive the API process; only in-process ones are lost. Runs
+    before the job manager starts, so no job of this process is touched.
+    """
+    if APP_ROLE != "all":
+        return
+    interrupted = metadata_store.fail_unfinished_jobs("Interrupted by a server restart")
+    if interrupted:
+        log_event("jobs_interrupted", jobs=interrupted)
+
+def backfill_transcript_index():
+    """Index transcripts of jobs that finished before the search index existed
+
+    Runs once per index: jobs index their own transcripts, so later starts
+    have nothing to add and skip reading the output directory.
+    """
+    if transcript_index.backfilled():
+        return
+    indexed = transcript_index.indexed_file_ids()
+    added = 0
+    # Oldest first, so each file ends up with its most recent transcript
+    for path in sorted(OUTPUT_DIR.glob("*.segments.json"), key=lambda p: p.stat().st_mtime):
+        try:
+            with open(path, encoding='utf-8') as f:
+                document = json.load(f)
+        except (OSError, ValueError):
+            continue
+        file_id = document.get("file_id")
+        if not file_id or file_id in indexed:
+            continue
+        video_file = metadata_store.get_file(file_id)
+        if not video_file or video_file["deleted_at"]:
+            continue
+        transcript_index.add(
+            file_id,
+            document["job_id"],
+            document["segments"],
+            language=document.get("language_detected")
+        )
+        added += 1
+    transcript_index.mark_backfilled()
+    if added:
+        log_event("search_index_backfill", files_added=added)
+
+# Slow start-up work that must not keep the port closed: uvicorn binds it
+# only once the startup hooks return. The backfills scan the upload and
+# output directories and are left to the processes serving the API; the
+# model is only warmed here in processes that run jobs or are configured to
+readiness = Readiness(retry_seconds=WARM_UP_RETRY_SECONDS)
+if APP_ROLE != "worker":
+    readiness.add("metadata_backfill", backfill_file_metadata)
+    readiness.add("search_index_backfill", backfill_transcript_index)
+readiness.add("translator", lambda: translator.warm_up())
+if WARM_UP_MODEL:
+    readiness.add("model", warm_up_model)
+
+@app.on_event("startup")
+async def start_job_manager():
+    await run_in_threadpool(fail_interrupted_jobs)
+    await job_manager.start()
+    await storage_janitor.start()
+    readiness.start()
+
+@app.on_event("shutdown")
+async def stop_job_manager():
+    readiness.stop()
+    await storage_janitor.stop()
+    await job_manager.stop()
+    if longform_executor is not None:
+        longform_executor.shutdown(wait=False, cancel_futures=True)
+
+def parse_target_languages(target_language, target_languages):
+    """Merge the single and list language fields into a de-duplicated list"""
+    languages = []
+    for value in (target_languages or []) + ([target_language] if target_language else []):
+        # Also accept a comma-separated list in a single form field
+        languages.extend(code.strip() for code in value.split(",") if code.strip())
+    languages = list(dict.fromkeys(languages)) or ["original"]
+
+    unsupported = [code for code in languages if code not in SUPPORTED_LANGUAGES]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported language(s): {', '.join(unsupported)}")
+    return languages
+
+def parse_priority(priority, default):
+    """Accept a priority name from PRIORITIES or its number"""
+    if priority is None or priority == "":
+        return PRIORITIES[default]
+    if isinstance(priority, str) and priority in PRIORITIES:
+        return PRIORITIES[priority]
+    try:
+        value = int(priority)
+    except (TypeError, ValueError):
+        value = None
+    if value is None or value < 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid priority: {priority} (use {', '.join(PRIORITIES)} or a number >= 0)"
+        )
+    return value
+
+def estimate_audio_seconds(video_file):
+    """Duration of an upload for scheduling, probed once with ffprobe if unknown"""
+    if video_file["duration"] is None:
+        duration = probe_duration(video_file["path"])
+        if duration:
+            metadata_store.update_file(video_file["file_id"], duration=duration)
+        return duration
+    return video_file["duration"]
+
+async def prepare_job(file_id, languages, model, long_form, priority, default_priority, inference_profile=None,
+                      source_language=None):
+    """Validate one processing request and return the keyword arguments for job_manager.submit"""
+    try:
+        # Off the event loop: the first call imports whisper, and with it torch
+        model_name = await run_in_threadpool(model_registry.resolve, model)
+        profile = resolve_profile(inference_profile, INFERENCE_PROFILE)
+        source_language = parse_source_language(source_language)
+    except (ModelError, ProfileError, LanguageError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    priority = parse_priority(priority, default_priority)
+
+    # Fail fast on unknown files instead of queueing a job that cannot run
+    video_file = await run_in_threadpool(metadata_store.get_file, file_id)
+    if not video_file or video_file["deleted_at"]:
+        raise HTTPException(status_code=404, detail=f"Video file not found: {file_id}")
+
+    return {
+        "file_id": file_id,
+        "options": {
+            "target_languages": languages,
+            "long_form": long_form,
+            "model": model_name,
+            "inference_profile": profile,
+            "source_language": source_language,
+        },
+        "priority": priority,
+        "estimated_seconds": await run_in_threadpool(estimate_audio_seconds, video_file),
+    }
+
+@app.post("/api/detect-language")
+async def detect_language(file_id: str = Form(...), model: Optional[str] = Form(None)):
+    """Detect the spoken language of an upload without transcribing it
+
+    Only the first 30 s of speech are decoded. The answer can be passed
+    back as source_language to process-video, which then skips detection.
+    The model is shared with running jobs, so this waits while one of them
+    holds it.
+    """
+    await require_ready()
+    try:
+        model_name = await run_in_threadpool(model_registry.resolve, model)
+    except ModelError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    video_file = await run_in_threadpool(metadata_store.get_file, file_id)
+    if not video_file or video_file["deleted_at"] or not os.path.exists(video_file["path"]):
+        raise HTTPException(status_code=404, detail="Video file not found")
+
+    def detect():
+        scan_seconds = DETECTION_SCAN_SECONDS if VAD_MIN_SILENCE_SECONDS > 0 else inference.DETECTION_SECONDS
+        audio = extract_audio_from_video(video_file["path"], max_seconds=scan_seconds)
+        if audio is None:
+            raise HTTPException(status_code=422, detail="Audio extraction failed")
+        # Detection reads the first 30 s it is given, which must be speech
+        audio, _, _ = skip_silence(audio)
+        if not len(audio):
+            raise HTTPException(status_code=422, detail=f"No speech in the first {scan_seconds:g} s of audio")
+        return detect_audio_language(audio, model_name)
+
+    detection = await run_in_threadpool(detect)
+    if detection["language"] is None:
+        raise HTTPException(status_code=500, detail="Language detection failed")
+    return {"file_id": file_id, "model": model_name, **detection}
+
 @app.post("/api/process-video")
 async def process_video(
+    request: Request,
     file_id: str = Form(...),
-    target_language: Optional[str] = Form("original")
+    target_language: Optional[str] = Form(None),
+    target_languages: List[str] = Form([]),
+    long_form: Optional[bool] = Form(None),
+    model: Optional[str] = Form(None),
+    priority: Optional[str] = Form(None),
+    inference_profile: Optional[str] = Form(None),
+    source_language: Optional[str] = Form(None)
 ):
-    """Process video: extract audio, transcribe, translate, and generate SRT"""
-    try:
-        # Find the video file
-        video_files = list(UPLOAD_DIR.glob(f"{file_id}.*"))
-        if not video_files:
-            raise HTTPException(status_code=404, detail="Video file not found")
-        
-        video_path = video_files[0]
-        audio_path = UPLOAD_DIR / f"{file_id}.wav"
-        
-        # Step 1: Extract audio
-        print(f"Extracting audio from {video_path}")
-        if not extract_audio_from_video(video_path, audio_path):
-            raise HTTPException(status_code=500, detail="Audio extraction failed")
-        
-        # Step 2: Transcribe audio
-        print("Transcribing audio...")
-        transcription_result = transcribe_audio(audio_path)
-        if not transcription_result:
-            raise HTTPException(status_code=500, detail="Transcription failed")
-        
-        # Step 3: Create SRT file
-        print("Creating SRT file...")
-        srt_path = create_srt_file(
-            transcription_result['segments'], 
-            target_language if target_language != "original" else None
+    """Queue a video for processing and return the job ID
+
+    Accepts one target_language or several target_languages; the video is
+    transcribed once and one SRT file is produced per language. long_form
+    forces parallel windowed transcription on or off; by default it is used
+    for audio longer than LONGFORM_MIN_SECONDS. model picks a Whisper model
+    size or profile (see /api/models); the server default is used otherwise.
+    inference_profile ("speed", "standard" or "quality") picks the decode
+    settings and quantization. source_language names the spoken language
+    and skips detection. priority defaults to "interactive". Until start-up
+    warm-up has finished, requests wait for it (see READY_WAIT_SECONDS).
+    """
+    await require_ready()
+    try:
+        languages = parse_target_languages(target_language, target_languages)
+        prepared = await prepare_job(
+            file_id, languages, model, long_form, priority, "interactive", inference_profile, source_language
         )
-        
-        # Clean up temporary audio file
-        try:
-            os.remove(audio_path)
-        except:
-            pass
-        
+        client_id = client_id_for(request)
+        admission.admit_jobs(client_id)
+        job = job_manager.submit(**prepared, client_id=client_id)
+
         return {
+            "job_id": job.id,
             "file_id": file_id,
-            "srt_file": srt_path.name,
-            "transcription": transcription_result['text'],
-            "language_detected": transcription_result.get('language', 'unknown'),
-            "segments_count": len(transcription_result['segments']),
-            "message": "Video processed successfully"
+            "target_languages": languages,
+            "status": job.status,
+            "priority": job.priority,
+            "message": "Video queued for processing"
         }
-        
+
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+class BatchItem(BaseModel):
+    file_id: str
+    target_languages: Optional[List[str]] = None
+    long_form: Optional[bool] = None
+    model: Optional[str] = None
+    priority: Optional[Union[int, str]] = None
+    inference_profile: Optional[str] = None
+    source_language: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    target_languages: List[str] = []
+    model: Optional[str] = None
+    priority: Optional[Union[int, str]] = None
+    inference_profile: Optional[str] = None
+
+MAX_BATCH_ITEMS = int(os.environ.get("MAX_BATCH_ITEMS", "500"))
+
+@app.post("/api/batches")
+async def create_batch(batch: BatchRequest, request: Request):
+    """Queue many videos at once
+
+    Items inherit target_languages, model, inference_profile and priority
+    from the batch unless they set their own; batch priority defaults to
+    "bulk". Every item is validated before any job is queued.
+    """
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(batch.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+    await require_ready()
+
+    default_priority = parse_priority(batch.priority, "bulk")
+    prepared = []
+    for index, item in enumerate(batch.items):
+        try:
+            languages = parse_target_languages(
+                None,
+                item.target_languages if item.target_languages is not None else batch.target_languages
+            )
+            prepared.append(await prepare_job(
+                item.file_id,
+                languages,
+                item.model or batch.model,
+                item.long_form,
+                item.priority if item.priority is not None else default_priority,
+                "bulk",
+                item.inference_profile or batch.inference_profile,
+                item.source_language
+            ))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"Item {index}: {e.detail}")
+
+    # The whole batch is admitted or rejected, never a part of it
+    client_id = client_id_for(request)
+    try:
+        admission.admit_jobs(client_id, len(prepared))
+    except AdmissionRejected as e:
+        raise too_many_requests(e)
+
+    batch_id = str(uuid.uuid4())
+    jobs = [job_manager.submit(**kwargs, batch_id=batch_id, client_id=client_id) for kwargs in prepared]
+    await run_in_threadpool(metadata_store.add_batch, batch_id, [job.id for job in jobs])
+
+    return {
+        "batch_id": batch_id,
+        "jobs": [
+            {"job_id": job.id, "file_id": job.file_id, "priority": job.priority,
+             "estimated_seconds": job.estimated_seconds}
+            for job in jobs
+        ],
+        "message": f"{len(jobs)} videos queued for processing"
+    }
+
+def batch_summary(batch):
+    """Aggregate status, progress and results of the jobs in a batch"""
+    jobs = []
+    for job_id in batch["job_ids"]:
+        job = job_manager.get(job_id)
+        if job:
+            jobs.append(job.to_dict())
+        else:
+            stored = metadata_store.get_job(job_id) or {"job_id": job_id, "status": "unknown"}
+            stored["progress"] = 1.0 if stored["status"] in FINISHED_STATES else 0.0
+            jobs.append(stored)
+
+    counts = {}
+    for job in jobs:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    finished = sum(counts.get(status, 0) for status in FINISHED_STATES)
+
+    # Weight progress by audio length where it is known, so one long video
+    # is not outweighed by many short ones
+    weights = [job.get("estimated_seconds") or 1.0 for job in jobs]
+    progress = sum(w * job["progress"] for w, job in zip(weights, jobs)) / sum(weights)
+
+    if finished < len(jobs):
+        status = "running" if counts.get("running") or finished else "queued"
+    elif counts.get("completed") == len(jobs):
+        status = "completed"
+    elif counts.get("completed"):
+        status = "partially_completed"
+    else:
+        status = "failed"
+
+    return {
+        "batch_id": batch["batch_id"],
+        "created_at": batch["created_at"],
+        "status": status,
+        "progress": round(progress, 4),
+        "total": len(jobs),
+        "counts": counts,
+        "jobs": [
+            {
+                "job_id": job["job_id"],
+                "file_id": job.get("file_id"),
+                "status": job["status"],
+                "progress": job["progress"],
+                "priority": job.get("priority"),
+                "result": job.get("result"),
+                "error": job.get("error"),
+            }
+            for job in jobs
+        ],
+    }
+
+async def get_batch_or_404(batch_id):
+    batch = await run_in_threadpool(metadata_store.get_batch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@app.get("/api/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregate progress of a batch plus the status and result of each job"""
+    batch = await get_batch_or_404(batch_id)
+    return await run_in_threadpool(batch_summary, batch)
+
+@app.post("/api/batches/{batch_id}/cancel")
+async def cancel_batch(batch_id: str):
+    """Cancel every unfinished job of a batch"""
+    batch = await get_batch_or_404(batch_id)
+    cancelled = 0
+    for job_id in batch["job_ids"]:
+        job = job_manager.get(job_id)
+        if job and not job.finished:
+            job_manager.cancel(job_id)
+            cancelled += 1
+    return {"batch_id": batch_id, "cancel_requested": cancelled, "message": "Batch cancellation requested"}
+
+def page_limits(limit, offset):
+    return min(max(limit, 1), 500), max(offset, 0)
+
+@app.get("/api/jobs")
+async def list_jobs(
+    status: Optional[str] = None,
+    file_id: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
+):
+    """List jobs, newest first, optionally filtered by status or file"""
+    limit, offset = page_limits(limit, offset)
+    jobs, total = await run_in_threadpool(metadata_store.list_jobs, status, file_id, limit, offset)
+    return {"jobs": jobs, "total": total, "limit": limit, "offset": offset}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get the state, per-stage progress and result of a processing job"""
+    job = job_manager.get(job_id)
+    if job:
+        return job.to_dict()
+    # Jobs from before a restart, or pruned from memory, are only stored
+    stored = await run_in_threadpool(metadata_store.get_job, job_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return stored
+
+@app.get("/api/files")
+async def list_files(include_deleted: bool = False, limit: int = 50, offset: int = 0):
+    """List uploaded files, newest first"""
+    limit, offset = page_limits(limit, offset)
+    files, total = await run_in_threadpool(metadata_store.list_files, include_deleted, limit, offset)
+    return {"files": files, "total": total, "limit": limit, "offset": offset}
+
+@app.get("/api/files/{file_id}")
+async def get_file(file_id: str):
+    """Metadata of one uploaded file and its most recent jobs"""
+    video_file = await run_in_threadpool(metadata_store.get_file, file_id)
+    if not video_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    jobs, total = await run_in_threadpool(metadata_store.list_jobs, None, file_id, 20, 0)
+    return dict(video_file, jobs=jobs, jobs_total=total)
+
+@app.get("/api/search")
+async def search_transcripts(
+    q: str,
+    language: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    hits_per_file: int = 5
+):
+    """Search all transcripts for segments containing every term of q
+
+    Returns matching files, best first, each with its number of hits and
+    the timestamps and text of the best ones. "Quoted phrases" match
+    exactly and word* matches a prefix; language filters on the detected
+    transcript language.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
+    limit, offset = page_limits(limit, offset)
+    hits_per_file = min(max(hits_per_file, 1), 50)
+    results, total = await run_in_threadpool(
+        transcript_index.search, q, language, limit, offset, hits_per_file
+    )
+    for result in results:
+        video_file = await run_in_threadpool(metadata_store.get_file, result["file_id"])
+        result["filename"] = video_file["filename"] if video_file else None
+    return {"query": q, "results": results, "total": total, "limit": limit, "offset": offset}
+
+# Comment lines sent on idle event streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events for a job: stage changes, progress, segments and translations
+
+    Past events are replayed first, so a client that connects late still
+    receives every segment. The stream ends with the final status event.
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        queue = job.subscribe(asyncio.get_running_loop())
+        try:
+            # Queued jobs may have been cancelled before anything was recorded
+            if job.finished and not any(e["event"] == "status" for e in job.events):
+                yield f"event: status\ndata: {json.dumps({'status': job.status, 'result': job.result, 'error': job.error})}\n\n"
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+                if event["event"] == "status" and event["data"]["status"] in FINISHED_STATES:
+                    break
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running processing job"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+
+    job = job_manager.cancel(job_id)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "message": "Job cancelled" if job.status == JOB_CANCELLED else "Cancellation requested"
+    }
+
+# Generated outputs are named <uuid>.<ext>; separators, ".." and dot files
+# never reach the filesystem
+OUTPUT_NAME = re.compile(r"[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*")
+
+def read_output_file(filename):
+    """Contents, ETag and path of a file directly inside OUTPUT_DIR, via the render cache"""
+    if not OUTPUT_NAME.fullmatch(filename):
+        raise FileNotFoundError(filename)
+    path = (OUTPUT_DIR / filename).resolve()
+    if path.parent != OUTPUT_DIR.resolve() or not path.is_file():
+        raise FileNotFoundError(filename)
+    stat = path.stat()
+    etag = strong_etag(filename, stat.st_size, stat.st_mtime_ns)
+    body = render_cache.get(etag)
+    if body is None:
+        body = path.read_bytes()
+        render_cache.put(etag, body)
+    return body, etag, path
+
 @app.get("/api/download-srt/{filename}")
-async def download_srt(filename: str):
-    """Download generated SRT file"""
+async def download_srt(filename: str, request: Request):
+    """Download generated SRT file
+
+    Supports conditional GET (ETag / 304), byte ranges, and gzip or brotli
+    compression; recently downloaded files are served from memory.
+    """
     try:
-        file_path = OUTPUT_DIR / filename
-        if not file_path.exists():
+        try:
+            body, etag, file_path = await run_in_threadpool(read_output_file, filename)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="SRT file not found")
-        
-        return FileResponse(
-            path=file_path,
-            media_type='application/octet-stream',
-            filename=filename
+        janitor.touch(file_path)
+
+        media_type = subtitles.FORMATS["srt"][0] if filename.endswith(".srt") else "application/octet-stream"
+        return await run_in_threadpool(
+            cached_file_response,
+            request,
+            body,
+            etag,
+            media_type,
+            {"Content-Disposition": f'attachment; filename="{filename}"'},
+            render_cache
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
 
+# Rendered subtitle files, keyed by ETag
+RENDER_CACHE_BYTES = int(os.environ.get("RENDER_CACHE_BYTES", str(32 * 1024 * 1024)))
+render_cache = RenderCache(RENDER_CACHE_BYTES)
+
+def load_subtitle_document(job_id):
+    path = subtitle_document_path(job_id)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f), path.stat()
+
+@app.get("/api/subtitles/{job_id}")
+async def get_subtitles(
+    job_id: str,
+    request: Request,
+    format: str = "srt",
+    language: str = "original",
+    max_line_length: Optional[int] = None,
+    max_lines: Optional[int] = None
+):
+    """Render a finished job's subtitles in any format and line layout
+
+    Output is generated from the stored segments (no reprocessing) and
+    cached by ETag, so switching format or layout is cheap.
+    """
+    if format not in subtitles.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    # job_id names a file under OUTPUT_DIR, so only accept the UUIDs we issue
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Subtitles not found")
+
+    try:
+        document, stat = await run_in_threadpool(load_subtitle_document, job_id)
+        janitor.touch(subtitle_document_path(job_id))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Subtitles not found")
+
+    if language == "original":
+        texts = [segment['text'] for segment in document['segments']]
+    elif language in document['translations']:
+        texts = document['translations'][language]
+    else:
+        raise HTTPException(status_code=404, detail=f"No subtitles for language: {language}")
+
+    etag = strong_etag(job_id, stat.st_mtime_ns, format, language, max_line_length, max_lines)
+    media_type, extension, _ = subtitles.FORMATS[format]
+    headers = {
+        "Cache-Control": "no-cache",
+        "Content-Disposition": f'attachment; filename="{job_id}.{language}{extension}"',
+    }
+
+    def respond():
+        # Rendered in full even on a miss: whether the body is compressed,
+        # and so which ETag it carries, depends on its size, and every
+        # response (304s included) must use the ETag a 200 would have
+        body = render_cache.get(etag)
+        if body is None:
+            body = ''.join(
+                subtitles.render(document['segments'], texts, format, max_line_length, max_lines)
+            ).encode('utf-8')
+            render_cache.put(etag, body)
+        return cached_file_response(request, body, etag, media_type, headers, render_cache)
+
+    return await run_in_threadpool(respond)
+
+@app.get("/api/admin/translation-cache")
+async def get_translation_cache(
+    target_language: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = 50,
+    offset: int = 0
+):
+    """Inspect translation cache statistics and stored entries"""
+    limit = min(max(limit, 1), 500)
+    return {
+        "stats": translation_cache.stats(),
+        "entries": await run_in_threadpool(translation_cache.entries, target_language, q, limit, max(offset, 0))
+    }
+
+@app.delete("/api/admin/translation-cache")
+async def purge_translation_cache(target_language: Optional[str] = None, q: Optional[str] = None):
+    """Purge translation cache entries, optionally filtered by language or source text"""
+    removed = await run_in_threadpool(translation_cache.purge, target_language, q)
+    return {"removed": removed, "message": "Translation cache purged"}
+
+@app.get("/api/admin/admission")
+async def get_admission():
+    """Admission limits, current usage and the rates used for Retry-After"""
+    return dict(
+        admission.stats(),
+        max_concurrent_jobs=MAX_CONCURRENT_JOBS,
+        max_concurrent_transcriptions=MAX_CONCURRENT_TRANSCRIPTIONS,
+        jobs_in_flight=len(job_manager.active_jobs())
+    )
+
+@app.get("/api/admin/workers")
+async def get_workers():
+    """Deployment role, queued and running jobs, and the live workers with their heartbeats"""
+    return dict(await run_in_threadpool(job_manager.stats), role=APP_ROLE)
+
+@app.get("/api/admin/storage")
+async def get_storage():
+    """Retention settings, bytes reclaimed so far and the last janitor sweep"""
+    return storage_janitor.stats()
+
+@app.post("/api/admin/storage/sweep")
+async def sweep_storage():
+    """Run the janitor now and report what it deleted"""
+    return await run_in_threadpool(storage_janitor.sweep)
+
+@app.get("/api/models")
+async def get_models():
+    """List Whisper models and profiles, with memory use and load time of resident ones"""
+    return {
+        "available": await run_in_threadpool(available_models),
+        **model_registry.stats(),
+        "inference_profiles": INFERENCE_PROFILES,
+        "default_inference_profile": INFERENCE_PROFILE,
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
 @app.get("/api/languages")
 async def get_supported_languages():
     """Get list of supported translation languages"""
-    languages = {
-        "original": "Original Language",
-        "en": "English",
-        "es": "Spanish", 
-        "fr": "French",
-        "de": "German",
-        "it": "Italian",
-        "pt": "Portuguese",
-        "ru": "Russian",
-        "ja": "Japanese",
-        "ko": "Korean",
-        "zh": "Chinese",
-        "ar": "Arabic",
-        "hi": "Hindi"
-    }
-    return {"languages": languages}
+    return {"languages": SUPPORTED_LANGUAGES}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+
+    class Server(uvicorn.Server):
+        async def startup(self, sockets=None):
+            await super().startup(sockets)
+            # Only now is the port bound
+            readiness.mark_listening()
+
+    Server(uvicorn.Config(app, host="0.0.0.0", port=8001)).run()
\ No newline at end of file
@@ -0,0 +1,162 @@
+"""Subtitle rendering from stored segments: SRT, WebVTT, JSON and ASS writers"""
+import json
+import threading
+from collections import OrderedDict
+
+
+def seconds_to_srt_time(seconds):
+    """Convert seconds to SRT time format"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
+
+
+def seconds_to_vtt_time(seconds):
+    """Convert seconds to WebVTT time format"""
+    return seconds_to_srt_time(seconds).replace(',', '.')
+
+
+def seconds_to_ass_time(seconds):
+    """Convert seconds to ASS time format (centisecond precision)"""
+    centiseconds = int(round(seconds * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def wrap_text(text, max_line_length=None, max_lines=None):
+    """Greedy word wrap; lines beyond max_lines are merged into the last one"""
+    text = ' '.join(text.split())
+    if not max_line_length or len(text) <= max_line_length:
+        return [text]
+
+    lines = []
+    current = ''
+    for word in text.split(' '):
+        if current and len(current) + 1 + len(word) > max_line_length:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+
+    if max_lines and len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + [' '.join(lines[max_lines - 1:])]
+    return lines
+
+
+def iter_srt(cues, first_index=1):
+    for i, (start, end, lines) in enumerate(cues, first_index):
+        yield f"{i}\n{seconds_to_srt_time(start)} --> {seconds_to_srt_time(end)}\n" + '\n'.join(lines) + "\n\n"
+
+
+def iter_vtt(cues):
+    yield "WEBVTT\n\n"
+    for i, (start, end, lines) in enumerate(cues, 1):
+        yield f"{i}\n{seconds_to_vtt_time(start)} --> {seconds_to_vtt_time(end)}\n" + '\n'.join(lines) + "\n\n"
+
+
+def iter_json(cues):
+    yield '{"segments": ['
+    for i, (start, end, lines) in enumerate(cues):
+        item = json.dumps({"index": i, "start": start, "end": end, "text": '\n'.join(lines)}, ensure_ascii=False)
+        yield item if i == 0 else ',' + item
+    yield ']}\n'
+
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 384
+PlayResY: 288
+WrapStyle: 0
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,16,&H00FFFFFF,&H000000FF,&H00000000,&H64000000,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def iter_ass(cues):
+    yield ASS_HEADER
+    for start, end, lines in cues:
+        # Braces start override blocks in ASS, so they cannot appear literally
+        text = '\\N'.join(line.replace('{', '(').replace('}', ')') for line in lines)
+        yield f"Dialogue: 0,{seconds_to_ass_time(start)},{seconds_to_ass_time(end)},Default,,0,0,0,,{text}\n"
+
+
+# format -> (media type, file extension, writer)
+FORMATS = {
+    "srt": ("application/x-subrip; charset=utf-8", ".srt", iter_srt),
+    "vtt": ("text/vtt", ".vtt", iter_vtt),
+    "json": ("application/json", ".json", iter_json),
+    "ass": ("text/x-ssa", ".ass", iter_ass),
+}
+
+
+def make_cues(segments, texts, max_line_length=None, max_lines=None):
+    return (
+        (segment['start'], segment['end'], wrap_text(text, max_line_length, max_lines))
+        for segment, text in zip(segments, texts)
+    )
+
+
+def render(segments, texts, fmt="srt", max_line_length=None, max_lines=None):
+    """Yield the subtitle file for segments in fmt, piece by piece
+
+    texts holds the (possibly translated) text of each segment.
+    """
+    writer = FORMATS[fmt][2]
+    return writer(make_cues(segments, texts, max_line_length, max_lines))
+
+
+class SrtAppender:
+    """Writes an SRT file a few cues at a time, numbering them across calls"""
+
+    def __init__(self, path):
+        self.path = path
+        self.cues = 0
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def append(self, segments, texts):
+        self._file.write(''.join(iter_srt(make_cues(segments, texts), self.cues + 1)))
+        # Flushed so the part written so far is readable while the job runs
+        self._file.flush()
+        self.cues += len(segments)
+
+    def close(self):
+        self._file.close()
+
+
+class RenderCache:
+    """LRU of rendered subtitle files keyed by ETag, bounded by total bytes"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
@@ -0,0 +1,223 @@
+"""Full-text index of transcript segments across all uploaded files"""
+import re
+import threading
+import time
+
+import db
+
+# "Quoted phrases" and whitespace-separated words; a trailing * on a word
+# makes it a prefix
+QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def fts_query(text):
+    """Turn a search box string into an FTS5 query matching all of its terms
+
+    Each term is quoted, so punctuation and FTS5 keywords (AND, NEAR, ...)
+    are matched literally; a trailing * keeps its prefix meaning.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM.findall(text):
+        prefix = False
+        if word:
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*").strip('"')
+        phrase = phrase.strip()
+        if not phrase:
+            continue
+        term = '"' + phrase.replace('"', '""') + '"'
+        terms.append(term + "*" if prefix else term)
+    return " ".join(terms)
+
+
+class TranscriptIndex:
+    """SQLite FTS5 index with one transcript per file, searchable by segment
+
+    Segments are stored with their timestamps in a plain table, which the
+    FTS5 table indexes as external content, so a file's transcript can be
+    replaced without scanning the index. Hits are ranked with BM25.
+    """
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = db.connect(db_path)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    file_id TEXT PRIMARY KEY,
+                    job_id TEXT NOT NULL,
+                    language TEXT,
+                    model TEXT,
+                    content_hash TEXT,
+                    settings TEXT,
+                    segment_count INTEGER NOT NULL,
+                    indexed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS transcripts_language ON transcripts (language);
+
+                CREATE TABLE IF NOT EXISTS index_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    segment_index INTEGER NOT NULL,
+                    start REAL NOT NULL,
+                    end REAL NOT NULL,
+                    text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS segments_file_id ON segments (file_id, segment_index);
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                    text, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN
+                    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS segments_fts_delete AFTER DELETE ON segments BEGIN
+                    INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                END;
+                """
+            )
+
+    def add(self, file_id, job_id, segments, language=None, model=None, content_hash=None, settings=None):
+        """Index the segments of a file's transcript, replacing any earlier one
+
+        Returns False without writing when the same transcription (content
+        hash, model and decode settings) is already indexed, as for repeat
+        jobs on one file. A different profile or source language can change
+        the text, so its transcript replaces the indexed one.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash, model, settings FROM transcripts WHERE file_id = ?", (file_id,)
+            ).fetchone()
+            if row and content_hash and (
+                (row["content_hash"], row["model"], row["settings"]) == (content_hash, model, settings)
+            ):
+                return False
+            self._conn.execute("DELETE FROM segments WHERE file_id = ?", (file_id,))
+            self._conn.executemany(
+                "INSERT INTO segments (file_id, segment_index, start, end, text) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (file_id, index, float(segment["start"]), float(segment["end"]), segment["text"].strip())
+                    for index, segment in enumerate(segments)
+                ],
+            )
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO transcripts
+                    (file_id, job_id, language, model, content_hash, settings, segment_count, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (file_id, job_id, language, model, content_hash, settings, len(segments), time.time()),
+            )
+        return True
+
+    def remove(self, file_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments WHERE file_id = ?", (file_id,))
+            return self._conn.execute("DELETE FROM transcripts WHERE file_id = ?", (file_id,)).rowcount > 0
+
+    def backfilled(self):
+        """Whether transcripts written before the index existed were added"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM index_state WHERE key = 'backfilled'").fetchone() is not None
+
+    def mark_backfilled(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO index_state (key, value) VALUES ('backfilled', ?)", (str(time.time()),)
+            )
+
+    def indexed_file_ids(self):
+        with self._lock:
+            return {row["file_id"] for row in self._conn.execute("SELECT file_id FROM transcripts")}
+
+    def search(self, text, language=None, limit=20, offset=0, hits_per_file=5):
+        """Files with segments matching every term, best first, and the total number of files matching
+
+        Each file comes with its number of matching segments and the
+        hits_per_file best of them in playback order. Files are ranked by
+        the summed BM25 score of their matching segments, so a file that
+        mentions the terms often outranks one with a single passing hit.
+        """
+        query = fts_query(text)
+        if not query:
+            return [], 0
+        matches = """
+            FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid
+            WHERE segments_fts MATCH ?
+        """
+        params = [query]
+        if language:
+            matches += " AND s.file_id IN (SELECT file_id FROM transcripts WHERE language = ?)"
+            params.append(language)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(DISTINCT s.file_id) {matches}", params).fetchone()[0]
+            # bm25() cannot be aggregated, but the rank column it backs can
+            page = self._conn.execute(
+                f"""
+                SELECT s.file_id, -SUM(segments_fts.rank) AS score, COUNT(*) AS hits {matches}
+                GROUP BY s.file_id ORDER BY score DESC, hits DESC, s.file_id
+                LIMIT ? OFFSET ?
+                """,
+                [*params, limit, offset],
+            ).fetchall()
+            if not page:
+                return [], total
+
+            file_marks = ", ".join("?" for _ in page)
+            file_ids = [row["file_id"] for row in page]
+            transcripts = {
+                row["file_id"]: row
+                for row in self._conn.execute(
+                    f"SELECT * FROM transcripts WHERE file_id IN ({file_marks})", file_ids
+                )
+            }
+            # The hits_per_file best segments of each file on the page
+            rows = self._conn.execute(
+                f"""
+                SELECT * FROM (
+                    SELECT s.*, -segments_fts.rank AS score,
+                        ROW_NUMBER() OVER (PARTITION BY s.file_id ORDER BY segments_fts.rank) AS place
+                    {matches} AND s.file_id IN ({file_marks})
+                )
+                WHERE place <= ? ORDER BY file_id, start
+                """,
+                [*params, *file_ids, hits_per_file],
+            ).fetchall()
+
+        segments = {}
+        for row in rows:
+            segments.setdefault(row["file_id"], []).append({
+                "index": row["segment_index"],
+                "start": row["start"],
+                "end": row["end"],
+                "text": row["text"],
+                "score": round(row["score"], 4),
+            })
+        results = []
+        for found in page:
+            file_id = found["file_id"]
+            transcript = transcripts.get(file_id)
+            results.append({
+                "file_id": file_id,
+                "job_id": transcript["job_id"] if transcript else None,
+                "language": transcript["language"] if transcript else None,
+                "model": transcript["model"] if transcript else None,
+                "hits": found["hits"],
+                "score": round(found["score"], 4),
+                "segments": segments.get(file_id, []),
+            })
+        return results, total
+
+    def stats(self):
+        with self._lock:
+            files, segments = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segment_count), 0) FROM transcripts"
+            ).fetchone()
+        return {"files": files, "segments": segments}
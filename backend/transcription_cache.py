@@ -0,0 +1,73 @@
+"""Content-addressed cache of Whisper transcriptions"""
+import hashlib
+import json
+import threading
+import time
+
+import db
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def options_key(options):
+    """Stable string form of the decode options that affect Whisper output"""
+    return json.dumps(options or {}, sort_keys=True, separators=(",", ":"))
+
+
+class TranscriptionCache:
+    """Maps (content hash, model name, decode options) to a stored transcription"""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = db.connect(db_path)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcriptions (
+                    content_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    options TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (content_hash, model, options)
+                )
+                """
+            )
+
+    def get(self, content_hash, model, options=None):
+        """Return the cached transcription dict (text, segments, language) or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM transcriptions WHERE content_hash = ? AND model = ? AND options = ?",
+                (content_hash, model, options_key(options)),
+            ).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def put(self, content_hash, model, options, result):
+        """Store the parts of a Whisper result needed to rebuild subtitles"""
+        stored = {
+            "text": result["text"],
+            "segments": result["segments"],
+            "language": result.get("language"),
+        }
+        # How sure language detection was, when the language was detected
+        if result.get("language_probability") is not None:
+            stored["language_probability"] = result["language_probability"]
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO transcriptions (content_hash, model, options, result, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (content_hash, model, options_key(options), json.dumps(stored, default=float), time.time()),
+            )
@@ -0,0 +1,206 @@
+"""Pluggable translation backends and batched segment translation"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import TRANSLATION_ERRORS, TRANSLATION_FALLBACKS, TRANSLATION_SECONDS, log_event, timed
+
+# Each packed segment is prefixed with a numbered marker such as [[12]].
+# Translators leave these alone, and the split tolerates the extra spaces
+# some engines insert inside the brackets.
+MARKER_RE = re.compile(r"\[\[\s*(\d+)\s*\]\]")
+
+
+class TranslationError(Exception):
+    """Raised when a backend cannot translate a batch"""
+
+
+class TranslatorBackend:
+    """Interface for translation engines
+
+    Subclasses implement translate_batch(); max_batch_chars bounds the size
+    of one request to the engine.
+    """
+
+    name = "base"
+    max_batch_chars = 4500
+
+    def translate_batch(self, texts, target_language):
+        """Translate a list of texts, returning a list of the same length"""
+        raise NotImplementedError
+
+    def warm_up(self):
+        """Import and set up whatever the engine needs, before the first request does"""
+
+
+class IdentityTranslatorBackend(TranslatorBackend):
+    """Returns texts unchanged; for offline deployments and tests"""
+
+    name = "identity"
+
+    def translate_batch(self, texts, target_language):
+        return list(texts)
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    """googletrans backend that packs many segments into each request"""
+
+    name = "google"
+
+    def __init__(self):
+        # googletrans clients are not safe to share between threads
+        self._local = threading.local()
+
+    def warm_up(self):
+        # Importing googletrans brings in its HTTP stack; the clients
+        # themselves are per thread and made on first use
+        import googletrans  # noqa: F401
+
+    @property
+    def translator(self):
+        if not hasattr(self._local, "translator"):
+            from googletrans import Translator
+            self._local.translator = Translator()
+        return self._local.translator
+
+    def translate_batch(self, texts, target_language):
+        if len(texts) == 1:
+            return [self._translate(texts[0], target_language)]
+
+        translated = self._translate(pack_texts(texts), target_language)
+        parts = unpack_texts(translated, len(texts))
+        if parts is None:
+            # The engine mangled a marker; fall back to one request per text
+            return [self._translate(text, target_language) for text in texts]
+        return parts
+
+    def _translate(self, text, target_language):
+        try:
+            return self.translator.translate(text, dest=target_language).text
+        except Exception as e:
+            raise TranslationError(str(e)) from e
+
+
+TRANSLATOR_BACKENDS = {
+    "google": GoogleTranslatorBackend,
+    "identity": IdentityTranslatorBackend,
+}
+
+
+def register_backend(name, factory):
+    """Make a translator backend selectable by name"""
+    TRANSLATOR_BACKENDS[name] = factory
+
+
+def create_backend(name):
+    try:
+        factory = TRANSLATOR_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown translator backend: {name}")
+    return factory()
+
+
+def needs_translation(target_language, source_language=None):
+    """False for "original" and for a target that is the spoken language already"""
+    if not target_language or target_language == 'original':
+        return False
+    return not source_language or target_language.lower() != source_language.lower()
+
+
+def pack_texts(texts):
+    """Join texts into one request body, one marked line per text"""
+    return "\n".join(f"[[{i}]] {' '.join(text.split())}" for i, text in enumerate(texts))
+
+
+def unpack_texts(packed, count):
+    """Split a translated body back into count texts, or None if markers were lost"""
+    pieces = MARKER_RE.split(packed)
+    # split() yields [prefix, index, text, index, text, ...]
+    if pieces[0].strip():
+        return None
+    texts = {}
+    for index, text in zip(pieces[1::2], pieces[2::2]):
+        texts[int(index)] = text.strip()
+    if sorted(texts) != list(range(count)):
+        return None
+    return [texts[i] for i in range(count)]
+
+
+def make_batches(texts, batch_size, max_chars):
+    """Group text indexes into batches bounded by count and packed size"""
+    batches = []
+    current = []
+    current_chars = 0
+    for i, text in enumerate(texts):
+        # Marker, space and newline overhead per packed line
+        length = len(text) + len(str(i)) + 6
+        if current and (len(current) >= batch_size or current_chars + length > max_chars):
+            batches.append(current)
+            current = []
+            current_chars = 0
+        current.append(i)
+        current_chars += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translate_segments(texts, target_language, backend, batch_size=50, concurrency=4, progress_callback=None,
+                       cache=None):
+    """Translate many texts with batched, concurrent requests to backend
+
+    Results line up with texts. Each distinct text is translated once, and
+    texts found in cache skip the backend entirely. A batch that fails is
+    retried one text at a time, and a text that still fails keeps its
+    original wording (and is not cached).
+    """
+    with timed("translate", TRANSLATION_SECONDS.labels(backend=backend.name), backend=backend.name,
+               target_language=target_language, texts=len(texts)) as log_fields:
+        unique = [text for text in dict.fromkeys(texts) if text]
+        known = cache.get_many(unique, target_language, backend.name) if cache else {}
+        pending = [text for text in unique if text not in known]
+
+        batches = make_batches(pending, batch_size, backend.max_batch_chars)
+        log_fields.update(unique=len(unique), cached=len(known), batches=len(batches))
+
+        def run_batch(indexes):
+            batch = [pending[i] for i in indexes]
+            try:
+                return batch, backend.translate_batch(batch, target_language), [True] * len(batch)
+            except Exception as e:
+                TRANSLATION_ERRORS.labels(backend=backend.name, kind="batch").inc()
+                TRANSLATION_FALLBACKS.labels(backend=backend.name, kind="per_text").inc()
+                log_event("translation_batch_failed", backend=backend.name, texts=len(batch), error=str(e))
+
+            results = []
+            succeeded = []
+            for text in batch:
+                try:
+                    results.append(backend.translate_batch([text], target_language)[0])
+                    succeeded.append(True)
+                except Exception as e:
+                    TRANSLATION_ERRORS.labels(backend=backend.name, kind="text").inc()
+                    TRANSLATION_FALLBACKS.labels(backend=backend.name, kind="original").inc()
+                    log_event("translation_failed", backend=backend.name, error=str(e))
+                    results.append(text)  # Return original text if translation fails
+                    succeeded.append(False)
+            return batch, results, succeeded
+
+        done = 0
+        fresh = {}
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="translate") as executor:
+                for batch, results, succeeded in executor.map(run_batch, batches):
+                    for text, result, ok in zip(batch, results, succeeded):
+                        known[text] = result
+                        if ok:
+                            fresh[text] = result
+                    done += len(batch)
+                    if progress_callback:
+                        progress_callback(done / len(pending))
+
+        if cache and fresh:
+            cache.put_many(fresh, target_language, backend.name)
+        log_fields["untranslated"] = len(pending) - len(fresh)
+
+    return [known.get(text, text) for text in texts]
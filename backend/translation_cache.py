@@ -0,0 +1,184 @@
+"""Two-level translation memory: in-process LRU in front of a SQLite store"""
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+
+def text_matches(text, query):
+    """Case-insensitive substring test used by both cache levels when filtering by query
+
+    Done in Python for SQLite too, whose LIKE folds case for ASCII only and
+    treats % and _ as wildcards.
+    """
+    return query.lower() in text.lower()
+
+
+class TranslationCache:
+    """Caches translations keyed by (backend, target language, source text)
+
+    The memory level is an LRU bounded by the UTF-8 size of its entries;
+    everything is also written to SQLite so translations survive restarts.
+    """
+
+    def __init__(self, db_path, max_memory_bytes=16 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._conn = db.connect(db_path)
+        self._conn.create_function("text_matches", 2, text_matches, deterministic=True)
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translations (
+                    backend TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    source_text TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (backend, target_language, source_text)
+                )
+                """
+            )
+
+    def get_many(self, texts, target_language, backend):
+        """Return {text: translation} for the texts that are cached"""
+        found = {}
+        missing = []
+        with self._lock:
+            for text in texts:
+                key = (backend, target_language, text)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.append(text)
+
+            if not missing:
+                return found
+
+            now = time.time()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT source_text, translation FROM translations
+                    WHERE backend = ? AND target_language = ? AND source_text IN ({placeholders})
+                    """,
+                    [backend, target_language, *chunk],
+                ).fetchall()
+                for row in rows:
+                    found[row["source_text"]] = row["translation"]
+                    self._remember((backend, target_language, row["source_text"]), row["translation"])
+                if rows:
+                    with self._conn:
+                        self._conn.executemany(
+                            """
+                            UPDATE translations SET hits = hits + 1, last_used_at = ?
+                            WHERE backend = ? AND target_language = ? AND source_text = ?
+                            """,
+                            [(now, backend, target_language, row["source_text"]) for row in rows],
+                        )
+
+            disk_hits = sum(1 for text in missing if text in found)
+            self.disk_hits += disk_hits
+            self.misses += len(missing) - disk_hits
+        return found
+
+    def put_many(self, translations, target_language, backend):
+        """Store {text: translation} pairs in both levels"""
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            for text, translation in translations.items():
+                self._remember((backend, target_language, text), translation)
+            with self._conn:
+                self._conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO translations
+                        (backend, target_language, source_text, translation, created_at, last_used_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [(backend, target_language, text, translation, now, now)
+                     for text, translation in translations.items()],
+                )
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_entries": disk_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def entries(self, target_language=None, query=None, limit=50, offset=0):
+        """List stored entries, most recently used first"""
+        where, params = self._filters(target_language, query)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT backend, target_language, source_text, translation, created_at, last_used_at, hits
+                FROM translations {where}
+                ORDER BY last_used_at DESC LIMIT ? OFFSET ?
+                """,
+                [*params, limit, offset],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def purge(self, target_language=None, query=None):
+        """Delete matching entries from both levels and return how many were removed"""
+        where, params = self._filters(target_language, query)
+        with self._lock:
+            with self._conn:
+                removed = self._conn.execute(f"DELETE FROM translations {where}", params).rowcount
+            for key in list(self._memory):
+                backend, language, text = key
+                if target_language and language != target_language:
+                    continue
+                if query and not text_matches(text, query):
+                    continue
+                self._memory_bytes -= self._entry_size(key, self._memory.pop(key))
+        return removed
+
+    def _filters(self, target_language, query):
+        clauses = []
+        params = []
+        if target_language:
+            clauses.append("target_language = ?")
+            params.append(target_language)
+        if query:
+            clauses.append("text_matches(source_text, ?)")
+            params.append(query)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _remember(self, key, translation):
+        """Insert into the memory LRU, evicting the oldest entries past the size budget"""
+        if key in self._memory:
+            self._memory_bytes -= self._entry_size(key, self._memory.pop(key))
+        self._memory[key] = translation
+        self._memory_bytes += self._entry_size(key, translation)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            old_key, old_translation = self._memory.popitem(last=False)
+            self._memory_bytes -= self._entry_size(old_key, old_translation)
+
+    @staticmethod
+    def _entry_size(key, translation):
+        return len(key[2].encode("utf-8")) + len(translation.encode("utf-8"))
@@ -0,0 +1,147 @@
+"""Energy and spectral voice activity detection on 16 kHz mono audio
+
+Long stretches of silence or steady noise cost Whisper time and are where
+it tends to hallucinate text. find_speech marks 20 ms frames as speech by
+their loudness above the recording's noise floor and the share of their
+energy in the speech band, then joins them into padded spans. SpeechMap
+cuts those spans out into one shorter array for Whisper and maps its
+timestamps back onto the original timeline.
+"""
+import numpy as np
+
+from audio import SAMPLE_RATE, allocate_buffer
+
+FRAME_SAMPLES = SAMPLE_RATE // 50
+# Frames analysed per FFT call, which bounds memory on long recordings
+BLOCK_FRAMES = 8192
+# Voice fundamentals through the upper formants; mains hum and hiss fall outside
+SPEECH_BAND_HZ = (80.0, 4000.0)
+
+
+def frame_features(audio):
+    """Log energy (dBFS) and fraction of spectral energy in the speech band of each 20 ms frame"""
+    frames = len(audio) // FRAME_SAMPLES
+    energy_db = np.empty(frames, dtype=np.float32)
+    band_ratio = np.empty(frames, dtype=np.float32)
+    freqs = np.fft.rfftfreq(FRAME_SAMPLES, 1.0 / SAMPLE_RATE)
+    band = (freqs >= SPEECH_BAND_HZ[0]) & (freqs <= SPEECH_BAND_HZ[1])
+    window = np.hanning(FRAME_SAMPLES).astype(np.float32)
+
+    for first in range(0, frames, BLOCK_FRAMES):
+        last = min(first + BLOCK_FRAMES, frames)
+        block = np.asarray(audio[first * FRAME_SAMPLES:last * FRAME_SAMPLES], dtype=np.float32)
+        block = block.reshape(last - first, FRAME_SAMPLES)
+        spectrum = np.fft.rfft(block * window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mean_square = np.einsum("ij,ij->i", block, block) / FRAME_SAMPLES
+        energy_db[first:last] = 10.0 * np.log10(mean_square + 1e-10)
+        band_ratio[first:last] = power[:, band].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+    return energy_db, band_ratio
+
+
+def runs(mask):
+    """Start and end (exclusive) indexes of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def join_close(starts, ends, min_gap):
+    """Merge runs separated by fewer than min_gap"""
+    if len(starts) < 2:
+        return starts, ends
+    kept = starts[1:] - ends[:-1] >= min_gap
+    return np.concatenate((starts[:1], starts[1:][kept])), np.concatenate((ends[:-1][kept], ends[-1:]))
+
+
+def find_speech(audio, min_silence_seconds=1.0, speech_pad_seconds=0.2, min_speech_seconds=0.25,
+                margin_db=12.0, floor_db=-60.0, ceiling_db=-30.0, min_band_ratio=0.3):
+    """Sample ranges [(start, end), ...] of audio that may hold speech
+
+    A frame counts as speech when it is margin_db louder than the noise
+    floor (the quietest tenth of the recording), clamped to between
+    floor_db and ceiling_db, and at least min_band_ratio of its energy
+    lies in SPEECH_BAND_HZ. Pauses shorter than min_silence_seconds are
+    kept, blips shorter than min_speech_seconds are dropped, and every span
+    is widened by speech_pad_seconds so word onsets and tails survive.
+    Doubtful audio is kept rather than cut.
+    """
+    energy_db, band_ratio = frame_features(audio)
+    if not len(energy_db):
+        return [(0, len(audio))] if len(audio) else []
+
+    threshold = min(max(float(np.percentile(energy_db, 10)) + margin_db, floor_db), ceiling_db)
+    starts, ends = runs((energy_db > threshold) & (band_ratio >= min_band_ratio))
+
+    frames_per_second = SAMPLE_RATE / FRAME_SAMPLES
+    starts, ends = join_close(starts, ends, min_silence_seconds * frames_per_second)
+    long_enough = ends - starts >= min_speech_seconds * frames_per_second
+    starts, ends = starts[long_enough], ends[long_enough]
+
+    pad = int(round(speech_pad_seconds * frames_per_second))
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, len(energy_db))
+    starts, ends = join_close(starts, ends, 1)
+
+    spans = [(int(start) * FRAME_SAMPLES, int(end) * FRAME_SAMPLES) for start, end in zip(starts, ends)]
+    # The samples after the last whole frame belong to a span that reaches it
+    if spans and spans[-1][1] == len(energy_db) * FRAME_SAMPLES:
+        spans[-1] = (spans[-1][0], len(audio))
+    return spans
+
+
+class SpeechMap:
+    """Speech spans of a recording, laid back to back on a shorter timeline"""
+
+    def __init__(self, spans, total_samples):
+        self.spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        self.total_samples = total_samples
+        lengths = self.spans[:, 1] - self.spans[:, 0]
+        # Where each span starts on the speech-only timeline
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)[:len(lengths)]
+        self.speech_samples = int(lengths.sum())
+
+    def compact(self, audio):
+        """The speech spans of audio back to back, or audio itself when nothing is cut
+
+        Memory-mapped input gets a memory-mapped copy.
+        """
+        if self.speech_samples == len(audio):
+            return audio
+        speech = allocate_buffer(self.speech_samples, isinstance(audio, np.memmap))
+        for (start, end), offset in zip(self.spans, self.offsets):
+            speech[offset:offset + end - start] = audio[start:end]
+        return speech
+
+    def to_original(self, seconds, is_end=False):
+        """Map a time on the speech-only timeline back onto the recording
+
+        A time on the seam between two spans is the end of the first when
+        is_end is set, and the start of the second otherwise.
+        """
+        if not len(self.spans):
+            return seconds
+        sample = seconds * SAMPLE_RATE
+        span = int(np.searchsorted(self.offsets, sample, side="left" if is_end else "right")) - 1
+        span = min(max(span, 0), len(self.spans) - 1)
+        start, end = self.spans[span]
+        return float(min(start + max(sample - self.offsets[span], 0), end)) / SAMPLE_RATE
+
+    def restore_segments(self, segments):
+        """Copies of Whisper segments with times on the original timeline"""
+        restored = []
+        for segment in segments:
+            start = self.to_original(segment["start"])
+            end = max(self.to_original(segment["end"], is_end=True), start)
+            restored.append(dict(segment, start=start, end=end))
+        return restored
+
+    def stats(self):
+        audio_seconds = self.total_samples / SAMPLE_RATE
+        speech_seconds = self.speech_samples / SAMPLE_RATE
+        return {
+            "audio_seconds": round(audio_seconds, 3),
+            "speech_seconds": round(speech_seconds, 3),
+            "skipped_seconds": round(audio_seconds - speech_seconds, 3),
+            "speech_ratio": round(speech_seconds / audio_seconds, 4) if audio_seconds else None,
+            "spans": len(self.spans),
+        }
@@ -0,0 +1,72 @@
+"""Worker process for APP_ROLE=api deployments
+
+Claims jobs from the shared job queue and runs the same processing
+pipeline as the server. Start as many as the hardware allows, on this
+machine or others sharing the queue database and the upload, output and
+cache directories:
+
+    python worker.py
+
+The model is loaded and warmed up before the first job is claimed. The
+first SIGTERM or Ctrl-C lets the running jobs finish; a second one hands
+them back to the queue and exits at once.
+"""
+import os
+import signal
+
+os.environ.setdefault("APP_ROLE", "worker")
+
+import server
+from job_queue import QueueWorker
+from metrics import log_event
+
+# Jobs run at the same time by one worker process; scale out with processes
+WORKER_CONCURRENCY = int(os.environ.get("WORKER_CONCURRENCY", "1"))
+WORKER_HEARTBEAT_INTERVAL = float(os.environ.get("WORKER_HEARTBEAT_INTERVAL", "5"))
+WORKER_POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1"))
+# Port for this worker's own /metrics, since its Whisper and translation
+# timings are not visible to the API process (0 disables)
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "0"))
+
+
+def main():
+    if server.job_queue is None:
+        raise SystemExit("worker.py needs APP_ROLE=worker (or api); APP_ROLE=all runs jobs in the server")
+
+    worker = QueueWorker(
+        server.job_queue,
+        server.run_processing_job,
+        concurrency=WORKER_CONCURRENCY,
+        on_status=server.persist_job,
+        poll_interval=WORKER_POLL_INTERVAL,
+        heartbeat_interval=WORKER_HEARTBEAT_INTERVAL,
+    )
+
+    signals = []
+
+    def handle_signal(signum, frame):
+        signals.append(signum)
+        if len(signals) == 1:
+            log_event("worker_draining", worker_id=worker.worker_id, signal=signum)
+            server.readiness.stop()
+            worker.stop()
+        else:
+            worker.stop(release=True)
+            raise SystemExit(1)
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    if WORKER_METRICS_PORT:
+        from prometheus_client import start_http_server
+        start_http_server(WORKER_METRICS_PORT)
+
+    # Warm up before claiming jobs, so none waits on this worker's model
+    # load while a warm worker could have taken it
+    if not server.readiness.run():
+        return
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
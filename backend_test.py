@@ -25,6 +25,17 @@ def create_test_video_file():
     
     return temp_file.name
 
+def wait_for_job(job_id, timeout=120):
+    """Poll GET /api/jobs/{job_id} until the job finishes or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BACKEND_URL}/api/jobs/{job_id}", timeout=10)
+        job = response.json()
+        if job.get("status") in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(2)
+    return None
+
 def test_health_endpoint():
     """Test GET /api/health endpoint"""
     print("\n=== Testing Health Check Endpoint ===")
@@ -172,13 +183,29 @@ def test_process_video_endpoint(file_id=None):
             return True, None
         elif response.status_code == 200:
             data = response.json()
+            if "job_id" not in data:
+                print("❌ Video processing response missing job_id")
+                return False, None
+
+            job = wait_for_job(data["job_id"])
+            if not job:
+                print("❌ Video processing job did not finish in time")
+                return False, None
+            print(f"Job: {job['status']} (stage: {job['stage']}, error: {job['error']})")
+
+            if job["status"] == "failed":
+                # The dummy upload has no audio stream, so extraction is expected to fail
+                print("⚠️ Job failed as expected for a video without audio")
+                return True, None
+
+            result = job["result"] or {}
             required_fields = ["file_id", "srt_file", "transcription", "language_detected", "segments_count"]
             
-            if all(field in data for field in required_fields):
+            if all(field in result for field in required_fields):
                 print("✅ Video processing endpoint working correctly")
-                return True, data["srt_file"]
+                return True, result["srt_file"]
             else:
-                print("❌ Video processing response missing required fields")
+                print("❌ Video processing result missing required fields")
                 return False, None
         else:
             print(f"❌ Video processing failed with status {response.status_code}")
@@ -191,6 +218,29 @@ def test_process_video_endpoint(file_id=None):
         print(f"❌ Video processing test error: {e}")
         return False, None
 
+def test_job_endpoints():
+    """Test GET /api/jobs/{job_id} and POST /api/jobs/{job_id}/cancel with an unknown job"""
+    print("\n=== Testing Job Endpoints ===")
+    try:
+        response = requests.get(f"{BACKEND_URL}/api/jobs/non-existent-job", timeout=10)
+        print(f"Status Code: {response.status_code}")
+        if response.status_code != 404:
+            print("❌ Unknown job should return 404")
+            return False
+
+        response = requests.post(f"{BACKEND_URL}/api/jobs/non-existent-job/cancel", timeout=10)
+        print(f"Cancel Status Code: {response.status_code}")
+        if response.status_code != 404:
+            print("❌ Cancelling an unknown job should return 404")
+            return False
+
+        print("✅ Job endpoints working correctly")
+        return True
+
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Job endpoints request failed: {e}")
+        return False
+
 def test_download_srt_endpoint(srt_filename=None):
     """Test GET /api/download-srt/{filename} endpoint"""
     print("\n=== Testing SRT Download Endpoint ===")
@@ -259,6 +309,7 @@ def run_all_tests():
     
     process_success, srt_file = test_process_video_endpoint(file_id)
     results['process'] = process_success
+    results['jobs'] = test_job_endpoints()
     
     results['download'] = test_download_srt_endpoint(srt_file)
     
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Per-stage microbenchmarks for the video transcription backend
+Runs each processing stage in-process against synthetic fixtures, with a
+stub Whisper model and translator unless a real model is requested, and
+compares throughput against stored baselines
+
+Usage:
+    python benchmark.py                    # run and compare with the baseline
+    python benchmark.py --save-baseline    # run and store the results as the new baseline
+    python benchmark.py --model tiny       # use a real Whisper model for transcription
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = ROOT_DIR / "backend"
+BASELINE_PATH = ROOT_DIR / "benchmark_baseline.json"
+
+SAMPLE_RATE = 16000
+
+# Stub transcription emits one segment per this many seconds of audio
+STUB_SEGMENT_SECONDS = 2.5
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "a", "lazy", "dog", "while",
+         "subtitles", "appear", "on", "screen", "every", "few", "seconds")
+
+
+def synthetic_audio(seconds, seed=0):
+    """16 kHz mono float32 with speech-like tone bursts separated by pauses"""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    position = 0
+    while position < len(audio):
+        burst = int(rng.uniform(0.8, 3.0) * SAMPLE_RATE)
+        pause = int(rng.uniform(0.2, 1.0) * SAMPLE_RATE)
+        t = np.arange(min(burst, len(audio) - position)) / SAMPLE_RATE
+        pitch = rng.uniform(100, 250)
+        tone = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 4))
+        envelope = np.sin(np.pi * t / max(t[-1], 1e-3)) if len(t) else t
+        audio[position:position + len(t)] = 0.3 * tone * envelope + 0.01 * rng.standard_normal(len(t))
+        position += burst + pause
+    return audio
+
+
+def synthetic_segments(count, seed=0):
+    """Whisper-shaped segments with varied sentence text"""
+    rng = np.random.default_rng(seed)
+    segments = []
+    start = 0.0
+    for i in range(count):
+        duration = float(rng.uniform(1.0, 5.0))
+        words = rng.choice(WORDS, size=int(rng.integers(4, 14)))
+        segments.append({"id": i, "start": start, "end": start + duration, "text": " " + " ".join(words)})
+        start += duration + float(rng.uniform(0.0, 0.5))
+    return segments
+
+
+def synthetic_video(path, audio):
+    """Mux a test pattern with audio into an MP4; returns False without ffmpeg"""
+    if shutil.which("ffmpeg") is None:
+        return False
+    wav_path = Path(path).with_suffix(".pcm")
+    (audio * 32767).astype("<i2").tofile(wav_path)
+    cmd = [
+        'ffmpeg', '-y', '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc=size=320x240:rate=10:duration={len(audio) / SAMPLE_RATE}',
+        '-f', 's16le', '-ar', str(SAMPLE_RATE), '-ac', '1', '-i', str(wav_path),
+        '-c:v', 'mpeg4', '-c:a', 'aac', '-shortest', str(path)
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    wav_path.unlink()
+    return result.returncode == 0
+
+
+class StubWhisperModel:
+    """Stands in for a Whisper model with deterministic, cheap output
+
+    It does a pass of real NumPy work over the samples so the cost still
+    grows with the audio length, which keeps windowing and stitching
+    overhead visible.
+    """
+
+    def transcribe(self, audio, **options):
+        frames = len(audio) // 160
+        energy = np.square(audio[:frames * 160]).reshape(frames, 160).mean(axis=1) if frames else []
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + STUB_SEGMENT_SECONDS, duration)
+            segments.append({"id": len(segments), "start": start, "end": end,
+                             "text": f" segment {len(segments)} {len(energy)}"})
+            start = end
+        return {"text": "".join(s["text"] for s in segments), "segments": segments,
+                "language": options.get("language") or "en"}
+
+    def parameters(self):
+        return []
+
+    def buffers(self):
+        return []
+
+    def modules(self):
+        return []
+
+
+def load_server(workdir, model_name, translate_latency):
+    """Import the backend inside workdir and swap in the stub model and translator"""
+    os.chdir(workdir)
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    from models import ModelRegistry
+    from translation import TranslatorBackend
+
+    class StubTranslatorBackend(TranslatorBackend):
+        """Answers after a fixed delay per request, like a remote engine"""
+
+        name = "benchmark"
+
+        def translate_batch(self, texts, target_language):
+            time.sleep(translate_latency)
+            return [f"[{target_language}] {text}" for text in texts]
+
+    class StubModelRegistry(ModelRegistry):
+        def resolve(self, name=None):
+            return name or self.default_model
+
+        def _get(self, name, quantize=False):
+            # There are no weights to quantize; the profile's decode options still apply
+            return super()._get(name)
+
+    server.translator = StubTranslatorBackend()
+    if model_name:
+        server.model_registry = ModelRegistry(
+            default_model=model_name, max_models=1, num_threads=server.INFERENCE_THREADS
+        )
+    else:
+        server.model_registry = StubModelRegistry(
+            default_model="stub", max_models=1, loader=lambda name: StubWhisperModel()
+        )
+    return server
+
+
+def measure(fn, repeat):
+    """Median wall time of fn() over repeat runs, after one warm-up run"""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run_benchmarks(server, args, workdir):
+    """Return {metric name: (value, unit)}; every metric is higher-is-better"""
+    from subtitles import seconds_to_srt_time
+
+    results = {}
+    audio = synthetic_audio(args.audio_seconds)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    segments = synthetic_segments(args.segments)
+
+    # seconds_to_srt_time
+    values = [segment["start"] for segment in segments] * 10
+    elapsed = measure(lambda: [seconds_to_srt_time(v) for v in values], args.repeat)
+    results["seconds_to_srt_time"] = (len(values) / elapsed, "calls/s")
+
+    # create_srt_file without translation: pure formatting and file writing
+    srt_path = Path(workdir) / "benchmark.srt"
+    elapsed = measure(lambda: server.create_srt_file(segments, None, srt_path), args.repeat)
+    results["create_srt_file"] = (len(segments) / elapsed, "segments/s")
+
+    # Translation with a cold cache, so every batch reaches the stub backend
+    cache = server.translation_cache
+    server.translation_cache = None
+    try:
+        elapsed = measure(lambda: server.create_srt_file(segments, "es", srt_path), args.repeat)
+        results["create_srt_file_translated"] = (len(segments) / elapsed, "segments/s")
+
+        texts = [segment["text"] for segment in segments[:args.translate_calls]]
+        elapsed = measure(lambda: [server.translate_text(text, "es") for text in texts], args.repeat)
+        results["translate_text"] = (len(texts) / elapsed, "texts/s")
+    finally:
+        server.translation_cache = cache
+
+    # extract_audio_from_video
+    video_path = Path(workdir) / "benchmark.mp4"
+    if synthetic_video(video_path, audio):
+        elapsed = measure(lambda: server.extract_audio_from_video(video_path), args.repeat)
+        results["extract_audio_from_video"] = (audio_seconds / elapsed, "audio s/s")
+    else:
+        print("⚠️ ffmpeg not available - skipping extract_audio_from_video")
+
+    # Voice activity detection and cutting out the pauses
+    elapsed = measure(lambda: server.skip_silence(audio), args.repeat)
+    results["skip_silence"] = (audio_seconds / elapsed, "audio s/s")
+
+    # transcribe_audio
+    produced = []
+
+    def transcribe():
+        result = server.transcribe_audio(audio, profile=args.inference_profile)
+        if result is None:
+            raise RuntimeError("transcribe_audio failed")
+        produced.append(len(result["segments"]))
+
+    elapsed = measure(transcribe, args.repeat)
+    results["transcribe_audio"] = (audio_seconds / elapsed, "audio s/s")
+    results["transcribe_audio_segments"] = (produced[-1] / elapsed, "segments/s")
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print results next to the baseline; return the names of regressed metrics"""
+    regressions = []
+    print(f"\n{'STAGE':<28} {'THROUGHPUT':>14} {'UNIT':<11} {'BASELINE':>14} {'CHANGE':>8}")
+    for name, (value, unit) in results.items():
+        line = f"{name:<28} {value:>14.1f} {unit:<11}"
+        previous = baseline.get(name, {}).get("value")
+        if previous:
+            change = value / previous - 1
+            marker = ""
+            if change < -tolerance:
+                regressions.append(name)
+                marker = " ❌"
+            line += f" {previous:>14.1f} {change:>+7.1%}{marker}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", help="Real Whisper model to benchmark instead of the stub")
+    parser.add_argument("--inference-profile", choices=["speed", "standard", "quality"],
+                        help="Inference profile for transcribe_audio (default: the server's)")
+    parser.add_argument("--audio-seconds", type=float, default=300.0, help="Length of the synthetic recording")
+    parser.add_argument("--segments", type=int, default=2000, help="Segments in the synthetic transcription")
+    parser.add_argument("--translate-calls", type=int, default=50, help="Single-text translate_text calls")
+    parser.add_argument("--translate-latency", type=float, default=0.02,
+                        help="Seconds the stub translator waits per request")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage; the median is reported")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed throughput drop before a stage counts as regressed")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    workdir = tempfile.mkdtemp(prefix="app-sub-bench-")
+    cwd = os.getcwd()
+    try:
+        server = load_server(workdir, args.model, args.translate_latency)
+        results = run_benchmarks(server, args, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "model": args.model or "stub",
+                "settings": {
+                    "audio_seconds": args.audio_seconds,
+                    "segments": args.segments,
+                    "translate_calls": args.translate_calls,
+                    "translate_latency": args.translate_latency,
+                },
+                "results": {name: {"value": value, "unit": unit} for name, (value, unit) in results.items()},
+            }, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    if baseline:
+        print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
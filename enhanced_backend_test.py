@@ -14,6 +14,17 @@ from pathlib import Path
 # Backend URL from frontend .env
 BACKEND_URL = "http://localhost:8001"
 
+def wait_for_job(job_id, timeout=120):
+    """Poll GET /api/jobs/{job_id} until the job finishes or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = requests.get(f"{BACKEND_URL}/api/jobs/{job_id}", timeout=10)
+        job = response.json()
+        if job.get("status") in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(2)
+    return None
+
 def test_with_real_video():
     """Test the complete workflow with a real video file"""
     print("\n=== Testing Complete Workflow with Real Video ===")
@@ -45,14 +56,19 @@ def test_with_real_video():
             'target_language': 'original'
         }
         
-        response = requests.post(f"{BACKEND_URL}/api/process-video", data=process_data, timeout=120)
+        response = requests.post(f"{BACKEND_URL}/api/process-video", data=process_data, timeout=30)
         
         if response.status_code != 200:
             print(f"❌ Processing failed: {response.status_code}")
             print(f"Error: {response.json()}")
             return False
         
-        process_result = response.json()
+        job = wait_for_job(response.json()["job_id"])
+        if not job or job["status"] != "completed":
+            print(f"❌ Processing job did not complete: {job}")
+            return False
+        
+        process_result = job["result"]
         srt_filename = process_result["srt_file"]
         print(f"✅ Processing successful, SRT file: {srt_filename}")
         print(f"Transcription: {process_result.get('transcription', 'N/A')[:100]}...")
@@ -108,15 +124,20 @@ def test_translation_workflow():
             'target_language': 'es'
         }
         
-        response = requests.post(f"{BACKEND_URL}/api/process-video", data=process_data, timeout=120)
+        response = requests.post(f"{BACKEND_URL}/api/process-video", data=process_data, timeout=30)
+        
+        if response.status_code != 200:
+            print(f"❌ Translation failed: {response.status_code}")
+            return False
         
-        if response.status_code == 200:
-            result = response.json()
+        job = wait_for_job(response.json()["job_id"])
+        if job and job["status"] == "completed":
+            result = job["result"]
             print(f"✅ Spanish translation successful")
             print(f"Transcription: {result.get('transcription', 'N/A')[:100]}...")
             return True
         else:
-            print(f"❌ Translation failed: {response.status_code}")
+            print(f"❌ Translation job did not complete: {job}")
             return False
             
     except Exception as e:
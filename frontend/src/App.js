@@ -8,12 +8,16 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'
 function App() {
   const [file, setFile] = useState(null);
   const [fileId, setFileId] = useState('');
+  const [jobId, setJobId] = useState('');
   const [processing, setProcessing] = useState(false);
   const [uploadProgress, setUploadProgress] = useState(0);
   const [currentStep, setCurrentStep] = useState('');
   const [result, setResult] = useState(null);
   const [error, setError] = useState('');
-  const [targetLanguage, setTargetLanguage] = useState('original');
+  const [targetLanguages, setTargetLanguages] = useState(['original']);
+  const [modelProfile, setModelProfile] = useState('');
+  const [liveSegments, setLiveSegments] = useState([]);
+  const [subtitleFormat, setSubtitleFormat] = useState('srt');
   const [languages, setLanguages] = useState({});
 
   // Load supported languages on component mount
@@ -52,6 +56,82 @@ function App() {
     multiple: false
   });
 
+  // Files above this size go through the resumable multi-part upload API
+  const MULTIPART_THRESHOLD = 32 * 1024 * 1024;
+  const PART_RETRIES = 3;
+
+  const uploadSingle = async (file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const uploadResponse = await axios.post(
+      `${BACKEND_URL}/api/upload-video`,
+      formData,
+      {
+        headers: { 'Content-Type': 'multipart/form-data' },
+        onUploadProgress: (progressEvent) => {
+          const progress = Math.round(
+            (progressEvent.loaded * 100) / progressEvent.total
+          );
+          setUploadProgress(progress);
+        }
+      }
+    );
+    return uploadResponse.data;
+  };
+
+  const uploadInParts = async (file) => {
+    // Remember the session so a reload can resume where the upload stopped
+    const sessionKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    let uploadId = localStorage.getItem(sessionKey);
+    let partSize;
+    const received = new Set();
+
+    if (uploadId) {
+      try {
+        const status = await axios.get(`${BACKEND_URL}/api/uploads/${uploadId}`);
+        partSize = status.data.part_size;
+        status.data.parts.forEach((part) => received.add(part.part_number));
+      } catch (err) {
+        uploadId = null;
+      }
+    }
+
+    if (!uploadId) {
+      const formData = new FormData();
+      formData.append('filename', file.name);
+      formData.append('content_type', file.type);
+      formData.append('total_size', file.size);
+      const session = await axios.post(`${BACKEND_URL}/api/uploads`, formData);
+      uploadId = session.data.upload_id;
+      partSize = session.data.part_size;
+      localStorage.setItem(sessionKey, uploadId);
+    }
+
+    const partCount = Math.ceil(file.size / partSize);
+    for (let partNumber = 1; partNumber <= partCount; partNumber++) {
+      if (!received.has(partNumber)) {
+        const blob = file.slice((partNumber - 1) * partSize, partNumber * partSize);
+        for (let attempt = 1; ; attempt++) {
+          try {
+            await axios.put(`${BACKEND_URL}/api/uploads/${uploadId}/parts/${partNumber}`, blob, {
+              headers: { 'Content-Type': 'application/octet-stream' }
+            });
+            break;
+          } catch (err) {
+            if (attempt >= PART_RETRIES || err.response?.status < 500) throw err;
+            await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+          }
+        }
+      }
+      setUploadProgress(Math.round((partNumber * 100) / partCount));
+    }
+
+    const completeResponse = await axios.post(`${BACKEND_URL}/api/uploads/${uploadId}/complete`);
+    localStorage.removeItem(sessionKey);
+    return completeResponse.data;
+  };
+
   const uploadFile = async () => {
     if (!file) return;
 
@@ -60,28 +140,15 @@ function App() {
       setCurrentStep('Uploading video...');
       setError('');
 
-      const formData = new FormData();
-      formData.append('file', file);
+      const uploadData = file.size > MULTIPART_THRESHOLD
+        ? await uploadInParts(file)
+        : await uploadSingle(file);
 
-      const uploadResponse = await axios.post(
-        `${BACKEND_URL}/api/upload-video`,
-        formData,
-        {
-          headers: { 'Content-Type': 'multipart/form-data' },
-          onUploadProgress: (progressEvent) => {
-            const progress = Math.round(
-              (progressEvent.loaded * 100) / progressEvent.total
-            );
-            setUploadProgress(progress);
-          }
-        }
-      );
-
-      setFileId(uploadResponse.data.file_id);
+      setFileId(uploadData.file_id);
       setCurrentStep('Processing video...');
       
       // Process the video
-      await processVideo(uploadResponse.data.file_id);
+      await processVideo(uploadData.file_id);
 
     } catch (err) {
       setError(err.response?.data?.detail || 'Upload failed');
@@ -89,13 +156,93 @@ function App() {
     }
   };
 
+  const formatTimestamp = (seconds) => {
+    const minutes = Math.floor(seconds / 60);
+    const secs = Math.floor(seconds % 60);
+    return `${minutes}:${secs.toString().padStart(2, '0')}`;
+  };
+
+  const STAGE_LABELS = {
+    extract_audio: 'Extracting audio...',
+    transcribe: 'Transcribing audio...',
+    create_srt: 'Creating subtitles...'
+  };
+
+  const waitForJob = async (jobId) => {
+    // Poll the job until the worker pool has finished with it
+    while (true) {
+      const response = await axios.get(`${BACKEND_URL}/api/jobs/${jobId}`);
+      const job = response.data;
+
+      if (job.status === 'completed') return job.result;
+      if (job.status === 'failed') throw new Error(job.error || 'Processing failed');
+      if (job.status === 'cancelled') throw new Error('Processing was cancelled');
+
+      if (job.status === 'queued') {
+        setCurrentStep('Waiting in queue...');
+      } else if (job.stage) {
+        setCurrentStep(`${STAGE_LABELS[job.stage] || 'Processing video...'} (${Math.round(job.progress * 100)}%)`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  };
+
+  const followJob = (jobId) => {
+    // Stream progress and subtitles as they are produced; fall back to
+    // polling if the event stream is unavailable
+    if (!window.EventSource) return waitForJob(jobId);
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${BACKEND_URL}/api/jobs/${jobId}/events`);
+      let finished = false;
+
+      source.addEventListener('stage', (e) => {
+        const data = JSON.parse(e.data);
+        if (data.status === 'running') setCurrentStep(STAGE_LABELS[data.stage] || 'Processing video...');
+      });
+      source.addEventListener('progress', (e) => {
+        const data = JSON.parse(e.data);
+        setCurrentStep(`${STAGE_LABELS[data.stage] || 'Processing video...'} (${Math.round(data.overall * 100)}%)`);
+      });
+      source.addEventListener('segment', (e) => {
+        const segment = JSON.parse(e.data);
+        setLiveSegments((current) => [...current, { ...segment, translations: {} }]);
+      });
+      source.addEventListener('translation', (e) => {
+        const data = JSON.parse(e.data);
+        setLiveSegments((current) => current.map((segment) => (
+          segment.index === data.index
+            ? { ...segment, translations: { ...segment.translations, [data.language]: data.text } }
+            : segment
+        )));
+      });
+      source.addEventListener('status', (e) => {
+        const data = JSON.parse(e.data);
+        if (data.status === 'queued') setCurrentStep('Waiting in queue...');
+        if (data.status === 'completed') resolve(data.result);
+        if (data.status === 'failed') reject(new Error(data.error || 'Processing failed'));
+        if (data.status === 'cancelled') reject(new Error('Processing was cancelled'));
+        if (['completed', 'failed', 'cancelled'].includes(data.status)) {
+          finished = true;
+          source.close();
+        }
+      });
+      source.onerror = () => {
+        if (finished) return;
+        source.close();
+        waitForJob(jobId).then(resolve, reject);
+      };
+    });
+  };
+
   const processVideo = async (fileId) => {
     try {
-      setCurrentStep('Extracting audio...');
+      setCurrentStep('Queueing video...');
       
       const formData = new FormData();
       formData.append('file_id', fileId);
-      formData.append('target_language', targetLanguage);
+      targetLanguages.forEach((code) => formData.append('target_languages', code));
+      if (modelProfile) formData.append('model', modelProfile);
 
       const response = await axios.post(
         `${BACKEND_URL}/api/process-video`,
@@ -105,34 +252,60 @@ function App() {
         }
       );
 
-      setResult(response.data);
+      setJobId(response.data.job_id);
+      setLiveSegments([]);
+      const jobResult = await followJob(response.data.job_id);
+
+      setResult(jobResult);
       setCurrentStep('Complete!');
       setProcessing(false);
 
     } catch (err) {
-      setError(err.response?.data?.detail || 'Processing failed');
+      setError(err.response?.data?.detail || err.message || 'Processing failed');
       setProcessing(false);
     }
   };
 
-  const downloadSRT = async () => {
-    if (!result?.srt_file) return;
+  const cancelProcessing = async () => {
+    if (!jobId) return;
 
     try {
-      const response = await axios.get(
-        `${BACKEND_URL}/api/download-srt/${result.srt_file}`,
-        { responseType: 'blob' }
-      );
+      await axios.post(`${BACKEND_URL}/api/jobs/${jobId}/cancel`);
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Cancel failed');
+    }
+  };
+
+  const toggleLanguage = (code) => {
+    setTargetLanguages((current) => {
+      if (!current.includes(code)) return [...current, code];
+      // Keep at least one language selected
+      return current.length > 1 ? current.filter((c) => c !== code) : current;
+    });
+  };
+
+  const downloadSubtitles = async (language, srtFile) => {
+    // Finished jobs can render any format from their stored segments;
+    // older results only have the generated SRT file
+    const url = result?.job_id
+      ? `${BACKEND_URL}/api/subtitles/${result.job_id}?format=${subtitleFormat}&language=${language}`
+      : `${BACKEND_URL}/api/download-srt/${srtFile}`;
+    const filename = result?.job_id
+      ? `${result.job_id}.${language}.${subtitleFormat}`
+      : srtFile;
+
+    try {
+      const response = await axios.get(url, { responseType: 'blob' });
 
       // Create download link
-      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const blobUrl = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
-      link.href = url;
-      link.setAttribute('download', result.srt_file);
+      link.href = blobUrl;
+      link.setAttribute('download', filename);
       document.body.appendChild(link);
       link.click();
       link.remove();
-      window.URL.revokeObjectURL(url);
+      window.URL.revokeObjectURL(blobUrl);
 
     } catch (err) {
       setError('Download failed');
@@ -142,12 +315,16 @@ function App() {
   const resetApp = () => {
     setFile(null);
     setFileId('');
+    setJobId('');
     setProcessing(false);
     setUploadProgress(0);
     setCurrentStep('');
     setResult(null);
     setError('');
-    setTargetLanguage('original');
+    setTargetLanguages(['original']);
+    setModelProfile('');
+    setLiveSegments([]);
+    setSubtitleFormat('srt');
   };
 
   return (
@@ -219,18 +396,39 @@ function App() {
               {file && (
                 <div className="mt-6">
                   <label className="block text-sm font-medium text-gray-700 mb-2">
-                    Target Language for Translation
+                    Subtitle Languages
+                  </label>
+                  <div className="grid grid-cols-2 md:grid-cols-4 gap-2">
+                    {Object.entries(languages).map(([code, name]) => (
+                      <label key={code} className="flex items-center space-x-2 text-sm text-gray-700">
+                        <input
+                          type="checkbox"
+                          checked={targetLanguages.includes(code)}
+                          onChange={() => toggleLanguage(code)}
+                          className="rounded border-gray-300 text-blue-600 focus:ring-blue-500"
+                        />
+                        <span>{name}</span>
+                      </label>
+                    ))}
+                  </div>
+                </div>
+              )}
+
+              {/* Transcription Quality */}
+              {file && (
+                <div className="mt-6">
+                  <label className="block text-sm font-medium text-gray-700 mb-2">
+                    Transcription Quality
                   </label>
                   <select
-                    value={targetLanguage}
-                    onChange={(e) => setTargetLanguage(e.target.value)}
+                    value={modelProfile}
+                    onChange={(e) => setModelProfile(e.target.value)}
                     className="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
                   >
-                    {Object.entries(languages).map(([code, name]) => (
-                      <option key={code} value={code}>
-                        {name}
-                      </option>
-                    ))}
+                    <option value="">Server default</option>
+                    <option value="fast">Fast</option>
+                    <option value="balanced">Balanced</option>
+                    <option value="accurate">Accurate (slow)</option>
                   </select>
                 </div>
               )}
@@ -267,6 +465,24 @@ function App() {
               <p className="text-sm text-gray-500">
                 This may take a few minutes depending on video length...
               </p>
+              {jobId && (
+                <button
+                  onClick={cancelProcessing}
+                  className="mt-4 text-sm text-red-600 hover:text-red-800"
+                >
+                  Cancel
+                </button>
+              )}
+              {liveSegments.length > 0 && (
+                <div className="mt-6 text-left bg-gray-50 p-4 rounded-md max-h-60 overflow-y-auto">
+                  {liveSegments.map((segment) => (
+                    <p key={segment.index} className="text-sm text-gray-700 mb-1">
+                      <span className="text-gray-400 mr-2">{formatTimestamp(segment.start)}</span>
+                      {Object.values(segment.translations)[0] || segment.text}
+                    </p>
+                  ))}
+                </div>
+              )}
             </div>
           )}
 
@@ -291,14 +507,33 @@ function App() {
                 </div>
               </div>
 
-              {/* Download Button */}
+              {/* Download Buttons */}
+              {result.subtitle_formats && (
+                <div className="flex items-center space-x-2">
+                  <label className="text-sm font-medium text-gray-700">Format:</label>
+                  <select
+                    value={subtitleFormat}
+                    onChange={(e) => setSubtitleFormat(e.target.value)}
+                    className="px-3 py-1 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  >
+                    {result.subtitle_formats.map((fmt) => (
+                      <option key={fmt} value={fmt}>{fmt.toUpperCase()}</option>
+                    ))}
+                  </select>
+                </div>
+              )}
+              <div className="grid grid-cols-2 gap-4">
+                {(result.srt_files || [{ language: 'original', srt_file: result.srt_file }]).map(({ language, srt_file }) => (
+                  <button
+                    key={srt_file}
+                    onClick={() => downloadSubtitles(language, srt_file)}
+                    className="bg-green-600 text-white py-3 px-4 rounded-md hover:bg-green-700 font-medium transition-colors"
+                  >
+                    Download {result.job_id ? subtitleFormat.toUpperCase() : 'SRT'} ({languages[language] || language})
+                  </button>
+                ))}
+              </div>
               <div className="flex space-x-4">
-                <button
-                  onClick={downloadSRT}
-                  className="flex-1 bg-green-600 text-white py-3 px-4 rounded-md hover:bg-green-700 font-medium transition-colors"
-                >
-                  Download SRT File
-                </button>
                 <button
                   onClick={resetApp}
                   className="flex-1 bg-gray-600 text-white py-3 px-4 rounded-md hover:bg-gray-700 font-medium transition-colors"
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# The backend modules import each other by their flat names, as when run
+# from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
@@ -0,0 +1,89 @@
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, RateEstimate, clamp_retry_after
+
+
+class Queue:
+    """The parts of a job manager admission control looks at"""
+
+    def __init__(self, queued=None, max_workers=2):
+        self.queued = queued or {}
+        self.max_workers = max_workers
+
+    def queued_by_client(self):
+        return dict(self.queued)
+
+    def queue_depth(self):
+        return sum(self.queued.values())
+
+
+def test_rate_estimate_starts_at_first_sample():
+    rate = RateEstimate(100)
+    rate.observe(10)
+    assert rate.value == 10
+    rate.observe(20)
+    assert rate.value == pytest.approx(12)
+
+
+def test_retry_after_is_clamped():
+    assert clamp_retry_after(0.2) == 1
+    assert clamp_retry_after(2.1) == 3
+    assert clamp_retry_after(10 ** 6) == 3600
+
+
+def test_full_queue_is_rejected_with_drain_time():
+    controller = AdmissionController(Queue({"a": 2, "b": 2}, max_workers=2), max_queued_jobs=4,
+                                     default_job_seconds=30)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit_jobs("b", count=2)
+    assert rejected.value.reason == "queue_full"
+    # Two jobs over the limit on two workers at 30 s each
+    assert rejected.value.retry_after == 30
+
+
+def test_every_client_gets_its_minimum_even_when_full():
+    controller = AdmissionController(Queue({"a": 4}), max_queued_jobs=4, min_client_jobs=1)
+    controller.admit_jobs("newcomer")
+    with pytest.raises(AdmissionRejected):
+        controller.admit_jobs("newcomer", count=2)
+
+
+def test_clients_are_held_to_a_fair_share():
+    controller = AdmissionController(Queue({"a": 5, "b": 1}), max_queued_jobs=12)
+    controller.admit_jobs("b", count=5)
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit_jobs("a", count=2)
+    assert rejected.value.reason == "client_share"
+
+
+def test_zero_disables_the_job_limit():
+    AdmissionController(Queue({"a": 10 ** 6}), max_queued_jobs=0).admit_jobs("a", count=100)
+
+
+def test_upload_budget_is_released_after_the_upload():
+    controller = AdmissionController(Queue(), max_upload_bytes=100, default_upload_rate=10)
+    with controller.upload("a", 60):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.upload("b", 60):
+                pass
+        assert rejected.value.reason == "upload_bytes"
+        assert rejected.value.retry_after == 2
+        assert controller.stats()["upload_bytes_in_flight"] == 60
+    with controller.upload("b", 60):
+        pass
+    assert controller.stats()["uploads_in_flight"] == 0
+
+
+def test_a_single_oversized_upload_is_admitted_when_idle():
+    controller = AdmissionController(Queue(), max_upload_bytes=100)
+    with controller.upload("a", 500):
+        pass
+
+
+def test_one_client_cannot_hold_the_whole_upload_budget():
+    controller = AdmissionController(Queue(), max_upload_bytes=100)
+    with controller.upload("a", 30), controller.upload("b", 10):
+        with pytest.raises(AdmissionRejected) as rejected:
+            with controller.upload("a", 30):
+                pass
+        assert rejected.value.reason == "client_upload_share"
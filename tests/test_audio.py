@@ -0,0 +1,73 @@
+import os
+import stat
+import sys
+
+import numpy as np
+import pytest
+
+import audio
+from audio import SAMPLE_RATE, AudioExtractionError, load_audio
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """Put ffmpeg and ffprobe stand-ins, written in Python, first on PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+
+    def install(ffmpeg_body, duration=""):
+        for name, body in (("ffmpeg", ffmpeg_body), ("ffprobe", f"print({duration!r})")):
+            path = bin_dir / name
+            path.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+            path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return install
+
+
+def pcm_writer(samples, value=16384, stderr_bytes=0, exit_code=0):
+    return (
+        f"sys.stderr.write('x' * {stderr_bytes}); sys.stderr.flush()\n"
+        f"sys.stdout.buffer.write(({value}).to_bytes(2, 'little', signed=True) * {samples})\n"
+        f"sys.exit({exit_code})"
+    )
+
+
+def test_decodes_pcm_to_float32(fake_ffmpeg):
+    fake_ffmpeg(pcm_writer(SAMPLE_RATE * 2), duration="2.0")
+    progress = []
+    samples = load_audio("in.mp4", progress_callback=progress.append)
+    assert samples.dtype == np.float32 and len(samples) == SAMPLE_RATE * 2
+    assert np.allclose(samples, 0.5)
+    assert progress[-1] == pytest.approx(1.0)
+
+
+def test_buffer_grows_past_a_short_duration_estimate(fake_ffmpeg, monkeypatch):
+    monkeypatch.setattr(audio, "READ_CHUNK_BYTES", 4096)
+    fake_ffmpeg(pcm_writer(SAMPLE_RATE * 5), duration="1.0")
+    assert len(load_audio("in.mp4")) == SAMPLE_RATE * 5
+
+
+def test_long_inputs_spill_to_a_memory_map(fake_ffmpeg, tmp_path):
+    fake_ffmpeg(pcm_writer(SAMPLE_RATE), duration="1.0")
+    samples = load_audio("in.mp4", memmap_threshold_seconds=0.5, spill_dir=tmp_path)
+    assert isinstance(samples, np.memmap)
+
+
+def test_a_noisy_log_does_not_stall_decoding(fake_ffmpeg):
+    # Far more than a pipe buffer, written before any audio
+    fake_ffmpeg(pcm_writer(SAMPLE_RATE, stderr_bytes=1024 * 1024), duration="1.0")
+    assert len(load_audio("in.mp4")) == SAMPLE_RATE
+
+
+def test_failure_reports_the_tail_of_the_log(fake_ffmpeg):
+    fake_ffmpeg("sys.stderr.write('a' * 100000 + 'Invalid data found'); sys.exit(1)")
+    with pytest.raises(AudioExtractionError, match="Invalid data found$") as error:
+        load_audio("in.mp4")
+    assert len(str(error.value)) < 5000
+
+
+def test_no_audio_is_an_error(fake_ffmpeg):
+    fake_ffmpeg("pass")
+    with pytest.raises(AudioExtractionError, match="no audio"):
+        load_audio("in.mp4")
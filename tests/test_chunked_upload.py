@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from chunked_upload import UploadError, UploadSessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadSessionStore(tmp_path / "sessions", max_upload_size=100, max_part_size=40)
+
+
+def put_part(store, upload_id, number, data):
+    store.part_path(upload_id, number).write_bytes(data)
+    return store.commit_part(upload_id, number, len(data))
+
+
+def test_parts_are_joined_in_order(store, tmp_path):
+    session = store.create("a.mp4", "video/mp4", total_size=9)
+    put_part(store, session["upload_id"], 2, b"def")
+    put_part(store, session["upload_id"], 1, b"abc")
+    put_part(store, session["upload_id"], 3, b"ghi")
+    assert store.get(session["upload_id"])["received_size"] == 9
+
+    destination = tmp_path / "out.mp4"
+    size, digest = store.complete(session["upload_id"], destination)
+    assert destination.read_bytes() == b"abcdefghi"
+    assert (size, digest) == (9, hashlib.sha256(b"abcdefghi").hexdigest())
+    # The session is gone once completed
+    with pytest.raises(UploadError):
+        store.get(session["upload_id"])
+
+
+def test_retried_part_replaces_earlier_attempt(store):
+    upload_id = store.create("a.mp4", "video/mp4")["upload_id"]
+    put_part(store, upload_id, 1, b"x" * 30)
+    put_part(store, upload_id, 1, b"y" * 10)
+    assert store.get(upload_id)["parts"] == [{"part_number": 1, "size": 10}]
+
+
+def test_unwritten_parts_are_not_listed(store):
+    upload_id = store.create("a.mp4", "video/mp4")["upload_id"]
+    store.part_path(upload_id, 1).write_bytes(b"partial")
+    assert store.get(upload_id)["parts"] == []
+
+
+def test_complete_rejects_gaps_and_size_mismatch(store, tmp_path):
+    upload_id = store.create("a.mp4", "video/mp4")["upload_id"]
+    put_part(store, upload_id, 1, b"a")
+    put_part(store, upload_id, 3, b"c")
+    with pytest.raises(UploadError, match=r"Missing parts: \[2\]"):
+        store.complete(upload_id, tmp_path / "out")
+
+    upload_id = store.create("a.mp4", "video/mp4", total_size=5)["upload_id"]
+    put_part(store, upload_id, 1, b"abc")
+    with pytest.raises(UploadError, match="expected 5"):
+        store.complete(upload_id, tmp_path / "out")
+
+
+def test_size_limit(store):
+    with pytest.raises(UploadError) as error:
+        store.create("a.mp4", "video/mp4", total_size=101)
+    assert error.value.status_code == 413
+
+    upload_id = store.create("a.mp4", "video/mp4")["upload_id"]
+    put_part(store, upload_id, 1, b"x" * 60)
+    with pytest.raises(UploadError):
+        put_part(store, upload_id, 2, b"x" * 41)
+    assert not store.part_path(upload_id, 2).exists()
+
+
+def test_unknown_or_malformed_ids_are_not_found(store):
+    for upload_id in ("../etc", "00000000-0000-0000-0000-000000000000"):
+        with pytest.raises(UploadError) as error:
+            store.get(upload_id)
+        assert error.value.status_code == 404
@@ -0,0 +1,117 @@
+import gzip
+
+import pytest
+
+import http_cache
+from http_cache import accepted_encodings, cached_file_response, choose_encoding, etag_matches, parse_range
+from subtitles import RenderCache
+
+ETAG = '"abc"'
+BODY = b"".join(b"line %d\n" % i for i in range(500))
+
+
+class Request:
+    """Just the headers a handler reads, keyed in lower case as Starlette does"""
+
+    def __init__(self, **headers):
+        self.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=50-500", (50, 99)),
+    ("bytes=9-3", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=a-b", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0"])
+def test_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+def test_etag_matches_lists_weak_tags_and_star():
+    assert etag_matches('"x", "abc"', ETAG)
+    assert etag_matches('W/"abc"', ETAG)
+    assert etag_matches("*", ETAG)
+    assert not etag_matches('"abcd"', ETAG)
+    assert not etag_matches(None, ETAG)
+
+
+def test_accepted_encodings_drop_zero_q_values():
+    assert accepted_encodings("gzip;q=0.5, br;q=0, Deflate") == {"gzip", "deflate"}
+    assert accepted_encodings("gzip;q=x") == set()
+    assert accepted_encodings(None) == set()
+
+
+def test_choose_encoding_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("*") == "br"
+    monkeypatch.setattr(http_cache, "brotli", None)
+    assert choose_encoding("gzip, br") == "gzip"
+    assert choose_encoding("br") is None
+    assert choose_encoding("identity") is None
+
+
+def test_whole_body_is_gzipped_and_cached(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    cache = RenderCache()
+    response = cached_file_response(Request(accept_encoding="gzip"), BODY, ETAG, "text/plain", cache=cache)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert gzip.decompress(response.body) == BODY
+    assert cache.get('"abc-gzip":gzip') == response.body
+
+
+def test_brotli_round_trip():
+    brotli = pytest.importorskip("brotli")
+    response = cached_file_response(Request(accept_encoding="br"), BODY, ETAG, "text/plain")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == BODY
+
+
+def test_small_bodies_are_sent_as_they_are():
+    response = cached_file_response(Request(accept_encoding="gzip"), b"tiny", ETAG, "text/plain")
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+    assert response.body == b"tiny"
+
+
+def test_not_modified_per_encoding(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+    request = Request(accept_encoding="gzip", if_none_match='W/"abc-gzip"')
+    assert cached_file_response(request, BODY, ETAG, "text/plain").status_code == 304
+    # The uncompressed tag does not match the gzipped representation
+    request = Request(accept_encoding="gzip", if_none_match=ETAG)
+    assert cached_file_response(request, BODY, ETAG, "text/plain").status_code == 200
+
+
+def test_ranges_are_served_uncompressed():
+    response = cached_file_response(Request(range="bytes=0-5", accept_encoding="gzip"), BODY, ETAG, "text/plain")
+    assert response.status_code == 206
+    assert response.body == BODY[:6]
+    assert response.headers["content-range"] == f"bytes 0-5/{len(BODY)}"
+    assert "content-encoding" not in response.headers
+
+    response = cached_file_response(Request(range=f"bytes={len(BODY)}-"), BODY, ETAG, "text/plain")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(BODY)}"
+
+
+def test_stale_if_range_sends_the_whole_body():
+    request = Request(range="bytes=0-5", if_range='"old"')
+    response = cached_file_response(request, BODY, ETAG, "text/plain")
+    assert response.status_code == 200 and response.body == BODY
+
+    request = Request(range="bytes=0-5", if_range=ETAG)
+    assert cached_file_response(request, BODY, ETAG, "text/plain").status_code == 206
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE
+from inference import (
+    INFERENCE_PROFILES, WARM_UP_SECONDS, LanguageError, ProfileError, decode_options, parse_source_language,
+    profile_settings, reliable_language, resolve_profile, warm_up,
+)
+
+
+def test_resolve_profile_falls_back_to_the_default():
+    assert resolve_profile(None, "standard") == "standard"
+    assert resolve_profile("speed", "standard") == "speed"
+    with pytest.raises(ProfileError, match="Unknown inference profile: fast"):
+        resolve_profile("fast", "standard")
+
+
+@pytest.mark.parametrize("name", list(INFERENCE_PROFILES))
+def test_decode_options_override_the_base_and_disable_fp16(name):
+    options = decode_options(name, {"language": "en", "best_of": 99, "fp16": True})
+    assert options["language"] == "en"
+    assert options["best_of"] == INFERENCE_PROFILES[name]["decode"]["best_of"]
+    assert options["fp16"] is False
+
+
+def test_profile_settings_tell_quantized_profiles_apart():
+    assert profile_settings("speed")["quantize"] is True
+    assert profile_settings("standard")["quantize"] is False
+    assert profile_settings("speed") != profile_settings("standard")
+
+
+def test_warm_up_transcribes_silence_without_fallback():
+    calls = []
+
+    class Model:
+        def transcribe(self, audio, **options):
+            calls.append((audio, options))
+
+    warm_up(Model(), decode_options("quality"))
+    (audio, options), = calls
+    assert len(audio) == WARM_UP_SECONDS * SAMPLE_RATE and not np.any(audio)
+    assert options["temperature"] == 0.0
+    assert options["beam_size"] == 5
+
+
+def test_parse_source_language_normalises_whisper_codes():
+    assert parse_source_language(None) is None
+    assert parse_source_language("") is None
+    assert parse_source_language(" EN ") == "en"
+    assert parse_source_language("haw") == "haw"
+    for bad in ("english", "e", "en-US", "1a"):
+        with pytest.raises(LanguageError):
+            parse_source_language(bad)
+
+
+def test_reliable_language_needs_a_confident_detection():
+    assert reliable_language({"language": "fr", "source": "client"}, 0.8) == "fr"
+    assert reliable_language({"language": "fr", "probability": 0.93, "source": "detected"}, 0.8) == "fr"
+    assert reliable_language({"language": "fr", "probability": 0.8, "source": "detected"}, 0.8) == "fr"
+    assert reliable_language({"language": "fr", "probability": 0.41, "source": "detected"}, 0.8) is None
+    assert reliable_language({"language": "fr", "probability": 0.9, "source": "cache"}, 0.8) == "fr"
+    assert reliable_language({"language": "fr", "probability": None, "source": "cache"}, 0.8) is None
+    assert reliable_language({"language": None, "source": "failed"}, 0.8) is None
@@ -0,0 +1,112 @@
+import os
+import time
+
+import pytest
+
+from janitor import Janitor, ManagedDirectory, touch
+
+DAY = 24 * 3600
+
+
+def make_file(directory, name, size, age_seconds=0, accessed_seconds_ago=None):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    modified = time.time() - age_seconds
+    accessed = time.time() - (age_seconds if accessed_seconds_ago is None else accessed_seconds_ago)
+    os.utime(path, (accessed, modified))
+    return path
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    uploads = tmp_path / "uploads"
+    outputs = tmp_path / "outputs"
+    uploads.mkdir()
+    outputs.mkdir()
+    return uploads, outputs
+
+
+def test_expired_files_are_deleted(dirs):
+    uploads, outputs = dirs
+    old = make_file(uploads, "old.mp4", 100, age_seconds=2 * DAY)
+    fresh = make_file(uploads, "fresh.mp4", 100, age_seconds=60)
+    kept = make_file(outputs, "old.srt", 10, age_seconds=2 * DAY)
+    deleted = []
+    janitor = Janitor(
+        [ManagedDirectory("uploads", uploads, ttl_seconds=DAY), ManagedDirectory("outputs", outputs)],
+        on_delete=lambda directory, name: deleted.append((directory, name)),
+    )
+    report = janitor.sweep()
+    assert not old.exists() and fresh.exists() and kept.exists()
+    assert deleted == [("uploads", "old.mp4")]
+    assert report["reclaimed_bytes_by_reason"]["ttl"] == 100
+    assert report["usage_bytes"] == {"uploads": 100, "outputs": 10}
+
+
+def test_recent_access_keeps_a_file_alive(dirs):
+    uploads, _ = dirs
+    path = make_file(uploads, "a.mp4", 10, age_seconds=2 * DAY)
+    touch(path)
+    Janitor([ManagedDirectory("uploads", uploads, ttl_seconds=DAY)]).sweep()
+    assert path.exists()
+
+
+def test_quota_evicts_least_recently_accessed_first(dirs):
+    uploads, outputs = dirs
+    first = make_file(uploads, "a.mp4", 400, age_seconds=DAY, accessed_seconds_ago=3000)
+    second = make_file(outputs, "b.srt", 400, age_seconds=DAY, accessed_seconds_ago=2000)
+    third = make_file(uploads, "c.mp4", 400, age_seconds=DAY, accessed_seconds_ago=1000)
+    # Too new to evict, even though it was never read
+    young = make_file(outputs, "d.srt", 400, age_seconds=10)
+    janitor = Janitor(
+        [ManagedDirectory("uploads", uploads), ManagedDirectory("outputs", outputs)],
+        quota_bytes=900,
+    )
+    report = janitor.sweep()
+    assert not first.exists() and not second.exists()
+    assert third.exists() and young.exists()
+    assert report["reclaimed_bytes_by_reason"]["quota"] == 800
+    assert report["total_bytes"] == 800 and not report["over_quota"]
+
+
+def test_files_of_unfinished_jobs_are_protected(dirs):
+    uploads, outputs = dirs
+    job_id, file_id = "5f1c0b6e-job", "9a7d-file"
+    protected = [
+        make_file(uploads, f"{file_id}.mp4", 500, age_seconds=2 * DAY),
+        make_file(outputs, f"{job_id}.es.srt", 500, age_seconds=2 * DAY),
+        make_file(outputs, f"{job_id}.segments.json", 500, age_seconds=2 * DAY),
+    ]
+    other = make_file(outputs, "other-job.es.srt", 500, age_seconds=2 * DAY)
+    lookups = []
+
+    def protected_ids():
+        lookups.append(1)
+        return {job_id, file_id}
+
+    janitor = Janitor(
+        [ManagedDirectory("uploads", uploads, ttl_seconds=DAY), ManagedDirectory("outputs", outputs)],
+        quota_bytes=100,
+        protected_ids=protected_ids,
+    )
+    janitor.sweep()
+    assert all(path.exists() for path in protected)
+    assert not other.exists()
+    # Once per sweep, not per file
+    assert len(lookups) == 1
+
+
+def test_stale_upload_sessions_are_removed_whole(dirs, tmp_path):
+    sessions = tmp_path / "sessions"
+    stale = sessions / "stale"
+    active = sessions / "active"
+    stale.mkdir(parents=True)
+    active.mkdir()
+    make_file(stale, "part_00001", 50, age_seconds=2 * DAY)
+    os.utime(stale, (time.time() - 2 * DAY,) * 2)
+    make_file(active, "part_00001", 50, age_seconds=2 * DAY)
+    make_file(active, "part_00002", 50, age_seconds=60)
+    report = Janitor([ManagedDirectory("sessions", sessions, session_ttl_seconds=DAY)]).sweep()
+    assert not stale.exists() and active.exists()
+    assert report["reclaimed_bytes_by_reason"]["session_ttl"] == 50
+    assert report["usage_bytes"]["sessions"] == 100
@@ -0,0 +1,155 @@
+import json
+import threading
+
+import pytest
+
+from job_queue import JobQueue, QueuedJob, QueueWorker
+from jobs import JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, PRIORITIES, Job
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "queue.db", heartbeat_timeout=60.0, max_attempts=2)
+
+
+def enqueue(queue, **kwargs):
+    job = Job("file", stages=("transcribe",), **kwargs)
+    queue.enqueue(job)
+    return job
+
+
+def expire_heartbeats(queue):
+    """Make every running job look like its worker went quiet"""
+    queue.heartbeat_timeout = -1.0
+    try:
+        return queue.requeue_stale()
+    finally:
+        queue.heartbeat_timeout = 60.0
+
+
+def test_claims_follow_priority_then_shortest_audio(queue):
+    bulk = enqueue(queue, priority=PRIORITIES["bulk"])
+    long = enqueue(queue, estimated_seconds=600)
+    short = enqueue(queue, estimated_seconds=10)
+    interactive = enqueue(queue, priority=PRIORITIES["interactive"])
+
+    claimed = [queue.claim("w")["job_id"] for _ in range(4)]
+    assert claimed == [interactive.id, short.id, long.id, bulk.id]
+    assert queue.claim("w") is None
+
+
+def test_a_job_is_claimed_once(queue):
+    enqueue(queue)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(queue.claim("w"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(row is not None for row in results) == 1
+
+
+def test_heartbeat_reports_owned_jobs_and_cancellation(queue):
+    job = enqueue(queue)
+    queue.claim("w1")
+    assert queue.heartbeat("w1", [job.id]) == {job.id: False}
+    assert queue.heartbeat("w2", [job.id]) == {}
+
+    queue.request_cancel(job.id)
+    assert queue.heartbeat("w1", [job.id]) == {job.id: True}
+
+
+def test_heartbeats_keep_a_job_leased(queue):
+    job = enqueue(queue)
+    queue.claim("w")
+    queue.heartbeat("w", [job.id])
+    assert queue.requeue_stale() == []
+    assert queue.get(job.id)["status"] == JOB_RUNNING
+
+
+def test_missed_heartbeats_requeue_until_attempts_run_out(queue):
+    job = enqueue(queue)
+    queue.claim("w1")
+    queue.add_event(job.id, {"event": "segment", "data": {}})
+
+    assert expire_heartbeats(queue) == [job.id]
+    row = queue.get(job.id)
+    assert row["status"] == JOB_QUEUED and row["worker_id"] is None
+    # Events of the lost attempt are replaced by the requeue
+    assert [event["event"] for _, event in queue.events_since(job.id)] == ["status"]
+    # The old worker no longer owns the job
+    assert queue.heartbeat("w1", [job.id]) == {}
+    assert queue.save(job, "w1") is False
+
+    assert queue.claim("w2")["attempts"] == 2
+    expire_heartbeats(queue)
+    row = queue.get(job.id)
+    assert row["status"] == JOB_FAILED
+    assert "2 attempts" in json.loads(row["state"])["error"]
+
+
+def test_stale_job_being_cancelled_is_cancelled(queue):
+    job = enqueue(queue)
+    queue.claim("w")
+    queue.request_cancel(job.id)
+    expire_heartbeats(queue)
+    assert queue.get(job.id)["status"] == JOB_CANCELLED
+
+
+def test_cancelling_a_queued_job_finishes_it(queue):
+    job = enqueue(queue)
+    assert queue.request_cancel(job.id)["status"] == JOB_CANCELLED
+    assert queue.claim("w") is None
+
+
+def test_release_returns_jobs_without_using_an_attempt(queue):
+    job = enqueue(queue)
+    queue.claim("w")
+    assert queue.release("w") == [job.id]
+    assert queue.get(job.id)["attempts"] == 0
+    assert queue.claim("w")["attempts"] == 1
+
+
+def test_queued_by_client(queue):
+    enqueue(queue, client_id="a")
+    enqueue(queue, client_id="a")
+    enqueue(queue, client_id="b")
+    queue.claim("w")
+    assert queue.queued_by_client() == {"a": 1, "b": 1}
+    assert queue.queue_depth() == 2
+
+
+def test_queued_job_stops_once_lost(queue):
+    enqueue(queue)
+    job = QueuedJob(queue, "w1", queue.claim("w1"))
+    assert job.save()
+    expire_heartbeats(queue)
+    assert not job.save()
+    assert job.lost and job.cancel_requested
+
+
+def test_worker_runs_jobs_to_completion(queue):
+    jobs = [enqueue(queue) for _ in range(3)]
+    done = threading.Event()
+    handled = []
+
+    def handler(job):
+        handled.append(job.id)
+        if len(handled) == len(jobs):
+            done.set()
+        return {"ok": True}
+
+    worker = QueueWorker(queue, handler, concurrency=2, poll_interval=0.05, heartbeat_interval=0.05)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    try:
+        assert done.wait(5)
+    finally:
+        worker.stop()
+        thread.join(5)
+
+    assert sorted(handled) == sorted(job.id for job in jobs)
+    for job in jobs:
+        state = json.loads(queue.get(job.id)["state"])
+        assert state["status"] == JOB_COMPLETED and state["result"] == {"ok": True}
+    assert queue.workers() == []
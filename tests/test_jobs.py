@@ -0,0 +1,128 @@
+import asyncio
+import threading
+
+from jobs import (
+    JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, PRIORITIES, Job, JobError, JobManager,
+    run_job,
+)
+
+
+def test_run_job_completes_with_handler_result():
+    job = Job("file", stages=("a",))
+    assert run_job(job, lambda job: {"ok": True}) == JOB_COMPLETED
+    assert job.result == {"ok": True}
+    assert job.started_at is not None and job.finished_at >= job.started_at
+
+
+def test_run_job_reports_job_errors_verbatim_and_others_wrapped():
+    def fail_with(error):
+        def handler(job):
+            raise error
+        return handler
+
+    job = Job("file")
+    assert run_job(job, fail_with(JobError("No audio"))) == JOB_FAILED
+    assert job.error == "No audio"
+
+    job = Job("file")
+    assert run_job(job, fail_with(RuntimeError("boom"))) == JOB_FAILED
+    assert job.error == "Processing failed: boom"
+
+
+def test_cancelled_job_stops_at_next_stage():
+    job = Job("file", stages=("a", "b"))
+
+    def handler(job):
+        job.start_stage("a")
+        job._cancel_event.set()
+        job.start_stage("b")
+
+    assert run_job(job, handler) == JOB_CANCELLED
+    assert job.stages["b"]["status"] == "pending"
+
+
+def test_progress_is_mean_of_stages():
+    job = Job("file", stages=("a", "b"))
+    job.start_stage("a")
+    job.update_progress("a", 0.5)
+    assert job.progress() == 0.25
+    job.finish_stage("a")
+    job.skip_stage("b")
+    assert job.progress() == 1.0
+    # Progress ticks are not replayed to late subscribers
+    assert [event["event"] for event in job.events] == ["stage", "stage", "stage"]
+
+
+def test_update_progress_is_clamped():
+    job = Job("file", stages=("a",))
+    job.update_progress("a", 3)
+    assert job.stages["a"]["progress"] == 1.0
+
+
+def test_manager_runs_by_priority_then_shortest_audio():
+    order = []
+    gate = threading.Event()
+
+    def handler(job):
+        gate.wait(5)
+        order.append(job.file_id)
+
+    async def main():
+        manager = JobManager(handler, max_workers=1)
+        await manager.start()
+        # Holds the only worker while the others queue up
+        manager.submit("first")
+        await asyncio.sleep(0.05)
+        manager.submit("bulk", priority=PRIORITIES["bulk"], estimated_seconds=1)
+        manager.submit("long", priority=PRIORITIES["interactive"], estimated_seconds=600)
+        manager.submit("unknown", priority=PRIORITIES["interactive"])
+        manager.submit("short", priority=PRIORITIES["interactive"], estimated_seconds=10)
+        gate.set()
+        while len(order) < 5:
+            await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(main())
+    assert order == ["first", "short", "long", "unknown", "bulk"]
+
+
+def test_cancel_queued_job_never_runs_it():
+    ran = []
+    gate = threading.Event()
+
+    def handler(job):
+        gate.wait(5)
+        ran.append(job.file_id)
+
+    async def main():
+        manager = JobManager(handler, max_workers=1)
+        await manager.start()
+        manager.submit("running")
+        await asyncio.sleep(0.05)
+        queued = manager.submit("queued")
+        assert queued.status == JOB_QUEUED
+        assert manager.referenced_ids() >= {queued.id, "queued"}
+        manager.cancel(queued.id)
+        assert queued.status == JOB_CANCELLED
+        gate.set()
+        while not ran:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await manager.stop()
+
+    asyncio.run(main())
+    assert ran == ["running"]
+
+
+def test_history_keeps_unfinished_jobs():
+    async def main():
+        manager = JobManager(lambda job: None, max_workers=1, history_limit=2)
+        manager._queue = asyncio.PriorityQueue()
+        jobs = [manager.submit(str(i)) for i in range(3)]
+        jobs[0].set_status(JOB_COMPLETED)
+        manager.submit("3")
+        return manager, jobs
+
+    manager, jobs = asyncio.run(main())
+    assert jobs[0].id not in manager.jobs
+    assert len(manager.jobs) == 3
@@ -0,0 +1,149 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import longform
+from audio import SAMPLE_RATE
+from longform import find_quiet_point, plan_windows, stitch_segments
+
+
+def tone_with_pauses(seconds, pauses):
+    """A loud tone with half-second silences starting at each of pauses (seconds)"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    for pause in pauses:
+        audio[int(pause * SAMPLE_RATE):int((pause + 0.5) * SAMPLE_RATE)] = 0
+    return audio
+
+
+def test_find_quiet_point_lands_in_a_pause():
+    audio = tone_with_pauses(30, [12])
+    cut = find_quiet_point(audio, 10 * SAMPLE_RATE, 5 * SAMPLE_RATE)
+    assert 12 * SAMPLE_RATE <= cut < 12.5 * SAMPLE_RATE
+
+
+def test_windows_are_cut_at_pauses_and_cover_the_audio():
+    audio = tone_with_pauses(100, [28, 61])
+    windows = plan_windows(audio, window_seconds=30, overlap_seconds=2, search_seconds=5)
+    owned = [(own_start / SAMPLE_RATE, own_end / SAMPLE_RATE) for _, _, own_start, own_end in windows]
+    assert len(windows) == 4
+    assert owned[0][0] == 0 and owned[-1][1] == 100
+    assert 28 <= owned[0][1] < 28.5 and 61 <= owned[1][1] < 61.5
+    for (start, end, own_start, own_end), (_, next_end, next_start, _) in zip(windows, windows[1:]):
+        assert own_end == next_start
+        assert end == own_end + 2 * SAMPLE_RATE
+
+
+def test_short_windows_still_advance():
+    windows = plan_windows(np.zeros(20 * SAMPLE_RATE, dtype=np.float32), window_seconds=4, overlap_seconds=0)
+    cuts = [own_start for _, _, own_start, _ in windows]
+    assert cuts == sorted(set(cuts)) and len(windows) >= 4
+
+
+def test_short_audio_is_one_window():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    assert plan_windows(audio, window_seconds=600) == [(0, len(audio), 0, len(audio))]
+
+
+def test_stitch_drops_duplicates_and_segments_outside_own_range():
+    windows = [
+        (0, 12 * SAMPLE_RATE, 0, 10 * SAMPLE_RATE),
+        (8 * SAMPLE_RATE, 20 * SAMPLE_RATE, 10 * SAMPLE_RATE, 20 * SAMPLE_RATE),
+    ]
+    results = {
+        # Results arrive in any order
+        1: (8.0, [
+            {"start": 0.2, "end": 1.0, "text": " before the cut"},
+            {"start": 1.5, "end": 2.6, "text": " across the cut"},
+            {"start": 3.0, "end": 5.0, "text": " second"},
+            {"start": 11.5, "end": 13.5, "text": " past the end"},
+        ]),
+        0: (0.0, [
+            {"start": 0.0, "end": 4.0, "text": " first"},
+            {"start": 9.0, "end": 10.4, "text": "across the cut "},
+        ]),
+    }
+    stitched = stitch_segments(results, windows)
+    assert [(s["id"], s["text"], s["start"], s["end"]) for s in stitched] == [
+        (0, " first", 0.0, 4.0),
+        # Heard by both windows; kept once, reaching the later end
+        (1, "across the cut ", 9.0, 10.6),
+        (2, " second", 11.0, 13.0),
+    ]
+
+
+class WindowModel:
+    """Returns one segment per second of the audio it is given, and records its options"""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        seconds = len(audio) // SAMPLE_RATE
+        segments = [{"start": float(i), "end": i + 0.8, "text": f" s{i}"} for i in range(seconds)]
+        return {"segments": segments, "language": "en"}
+
+
+def test_incremental_reports_segments_per_window_on_the_global_timeline():
+    model = WindowModel()
+    batches = []
+    progress = []
+    result = longform.transcribe_incremental(
+        np.zeros(25 * SAMPLE_RATE, dtype=np.float32), model, {"condition_on_previous_text": True},
+        window_seconds=10, overlap_seconds=0, segment_callback=batches.append, progress_callback=progress.append
+    )
+    assert len(batches) == result["windows"]
+    starts = [segment["start"] for segment in result["segments"]]
+    assert starts == sorted(starts) and starts[-1] >= 20
+    assert [segment["id"] for segment in result["segments"]] == list(range(len(starts)))
+    assert [segment for batch in batches for segment in batch] == result["segments"]
+    assert progress[-1] == 1.0
+    # Later windows reuse the detected language and the previous text
+    assert "language" not in model.calls[0] and model.calls[1]["language"] == "en"
+    assert "initial_prompt" in model.calls[1]
+
+
+class GlobalClockModel:
+    """One segment per second, named after the second of the recording it covers
+
+    The audio holds its own timestamp in every sample, so windows that
+    overlap hear the same words.
+    """
+
+    def transcribe(self, audio, **options):
+        segments = []
+        for i in range(len(audio) // SAMPLE_RATE):
+            second = int(round(float(audio[i * SAMPLE_RATE + SAMPLE_RATE // 2])))
+            segments.append({"start": float(i), "end": i + 1.0, "text": f" s{second}"})
+        return {"segments": segments, "language": "en"}
+
+
+def test_incremental_windows_overlap_and_merge_the_shared_words():
+    audio = np.repeat(np.arange(40, dtype=np.float32), SAMPLE_RATE)
+    batches = []
+    result = longform.transcribe_incremental(
+        audio, GlobalClockModel(), window_seconds=10, overlap_seconds=2, segment_callback=batches.append
+    )
+    assert result["windows"] > 2 and len(batches) > 1
+    # Every second once, though the seconds around each cut were decoded twice
+    assert [segment["text"] for segment in result["segments"]] == [f" s{i}" for i in range(39)]
+    assert [segment for batch in batches for segment in batch] == result["segments"]
+    ends = [segment["end"] for segment in result["segments"]]
+    assert ends == sorted(ends)
+
+
+def test_long_form_emits_segments_in_timeline_order(monkeypatch):
+    model = WindowModel()
+    monkeypatch.setattr(longform, "load_worker_model", lambda name, quantize=False: model)
+    audio = tone_with_pauses(60, [19, 41])
+    emitted = []
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = longform.transcribe_long_form(
+            audio, executor, "base", window_seconds=20, overlap_seconds=1, segment_callback=emitted.extend
+        )
+    assert result["windows"] == 3 and result["language"] == "en"
+    assert [s["text"] for s in emitted] == [s["text"] for s in result["segments"]]
+    starts = [segment["start"] for segment in result["segments"]]
+    assert starts == sorted(starts)
+    assert all(start >= end for start, end in zip(starts[1:], [s["end"] for s in result["segments"]]))
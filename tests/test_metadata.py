@@ -0,0 +1,73 @@
+import pytest
+
+from metadata import MetadataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetadataStore(tmp_path / "metadata.db")
+
+
+def job(job_id, status="completed", file_id="f1", created_at=1.0, result=None):
+    return {
+        "job_id": job_id,
+        "file_id": file_id,
+        "status": status,
+        "options": {"model": "base", "target_languages": ["es"]},
+        "result": result,
+        "created_at": created_at,
+    }
+
+
+def test_files(store):
+    store.add_file("f1", "uploads/f1.mp4", filename="a.mp4", size=10, created_at=1.0)
+    store.add_file("f2", "uploads/f2.mp4", filename="b.mp4", size=20, created_at=2.0)
+    store.update_file("f1", duration=12.5, content_hash="abc")
+    assert store.get_file("f1")["duration"] == 12.5
+    with pytest.raises(ValueError):
+        store.update_file("f1", created_at=0)
+
+    store.update_file("f2", deleted_at=3.0)
+    files, total = store.list_files()
+    assert total == 1 and files[0]["file_id"] == "f1"
+    files, total = store.list_files(include_deleted=True)
+    assert [f["file_id"] for f in files] == ["f2", "f1"]
+    assert store.known_file_ids() == {"f1", "f2"}
+
+
+def test_jobs_keep_results_and_outputs(store):
+    result = {
+        "model": "small",
+        "language_detected": "en",
+        "srt_files": [{"language": "es", "srt_file": "j1.es.srt"}],
+    }
+    store.save_job(job("j1", "running"))
+    store.save_job(job("j1", result=result))
+    saved = store.get_job("j1")
+    assert saved["status"] == "completed" and saved["model"] == "small" and saved["language"] == "en"
+    assert saved["outputs"] == ["j1.es.srt", "j1.segments.json"]
+    assert saved["result"] == result and saved["target_languages"] == ["es"]
+
+
+def test_list_jobs_filters_and_pages(store):
+    for i in range(5):
+        store.save_job(job(f"j{i}", "failed" if i % 2 else "completed", file_id=f"f{i % 2}", created_at=i))
+    jobs, total = store.list_jobs(status="completed", limit=2)
+    assert total == 3 and [j["job_id"] for j in jobs] == ["j4", "j2"]
+    jobs, total = store.list_jobs(file_id="f1")
+    assert total == 2 and "result" not in jobs[0]
+
+
+def test_unfinished_jobs_fail_after_a_restart(store):
+    store.save_job(job("queued", "queued"))
+    store.save_job(job("running", "running"))
+    store.save_job(job("done"))
+    assert store.fail_unfinished_jobs("Interrupted") == 2
+    assert store.get_job("running")["error"] == "Interrupted"
+    assert store.get_job("done")["error"] is None
+
+
+def test_batches(store):
+    store.add_batch("b1", ["j1", "j2"])
+    assert store.get_batch("b1")["job_ids"] == ["j1", "j2"]
+    assert store.get_batch("missing") is None
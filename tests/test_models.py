@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+import models
+from models import ModelError, ModelRegistry, estimate_memory_bytes
+
+
+class Tensor:
+    def __init__(self, count):
+        self.count = count
+
+    def numel(self):
+        return self.count
+
+    def element_size(self):
+        return 4
+
+
+class FakeModel:
+    def __init__(self, name, parameters=1000):
+        self.name = name
+        self._parameters = [Tensor(parameters)]
+
+    def parameters(self):
+        return self._parameters
+
+    def buffers(self):
+        return []
+
+    def modules(self):
+        return [self]
+
+
+@pytest.fixture(autouse=True)
+def known_models(monkeypatch):
+    monkeypatch.setattr(models, "available_models", lambda: ["tiny", "base", "small"])
+
+
+def registry(**kwargs):
+    loads = []
+
+    def loader(name):
+        loads.append(name)
+        return FakeModel(name)
+
+    return ModelRegistry(loader=loader, **kwargs), loads
+
+
+def test_resolve_profiles_and_rejects_unknown_models():
+    models_registry, _ = registry(default_model="base")
+    assert models_registry.resolve() == "base"
+    assert models_registry.resolve("fast") == "base"
+    assert models_registry.resolve("small") == "small"
+    with pytest.raises(ModelError):
+        models_registry.resolve("huge")
+
+
+def test_models_load_once_and_least_recently_used_is_evicted():
+    models_registry, loads = registry(max_models=2)
+    for name in ("tiny", "base", "tiny", "small"):
+        with models_registry.acquire(name) as model:
+            assert model.name == name
+    assert loads == ["tiny", "base", "small"]
+    stats = models_registry.stats()
+    assert [model["name"] for model in stats["loaded"]] == ["tiny", "small"]
+    assert stats["evictions"] == 1 and stats["resident_bytes"] == 8000
+
+
+def test_busy_models_are_not_evicted_to_fit_the_budget():
+    models_registry, _ = registry(max_models=5, memory_budget_bytes=estimate_memory_bytes("tiny") + 1000)
+    with models_registry.acquire("base"):
+        with pytest.raises(ModelError, match="budget"):
+            with models_registry.acquire("tiny"):
+                pass
+
+
+def test_concurrent_requests_share_one_load():
+    started = threading.Event()
+
+    def slow_loader(name):
+        started.set()
+        time.sleep(0.1)
+        return FakeModel(name)
+
+    models_registry = ModelRegistry(loader=slow_loader)
+    loaded = []
+
+    def use():
+        with models_registry.acquire("base") as model:
+            loaded.append(model)
+
+    threads = [threading.Thread(target=use) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(model) for model in loaded}) == 1
+    assert models_registry.stats()["loaded"][0]["uses"] == 4
+
+
+def test_quantized_models_are_resident_separately(monkeypatch):
+    monkeypatch.setattr(models, "quantize_int8", lambda model: model)
+    models_registry, loads = registry()
+    with models_registry.acquire("base", quantize=True):
+        pass
+    with models_registry.acquire("base"):
+        pass
+    assert loads == ["base", "base"]
+    assert {model["name"] for model in models_registry.stats()["loaded"]} == {"base", "base-int8"}
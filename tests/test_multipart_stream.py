@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from multipart_stream import MultipartError, MultipartFileStream
+
+BOUNDARY = "xyzzy"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def form(*parts, end=True):
+    body = b""
+    for name, filename, content_type, data in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if content_type:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + data + b"\r\n"
+    if end:
+        body += f"--{BOUNDARY}--\r\n".encode()
+    return body
+
+
+async def pieces(body, size):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def read(body, size=7, **kwargs):
+    async def run():
+        upload = await MultipartFileStream(pieces(body, size), CONTENT_TYPE, **kwargs).open()
+        chunks = [chunk async for chunk in upload.chunks()]
+        return upload, chunks
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("size", [1, 7, 10 ** 6])
+def test_file_bytes_come_through_whatever_the_chunking(size):
+    data = bytes(range(256)) * 40 + b"\r\n--xyzz"
+    upload, chunks = read(form(("file", "clip.mp4", "video/mp4", data)), size)
+    assert b"".join(chunks) == data
+    assert upload.filename == "clip.mp4" and upload.content_type == "video/mp4"
+    if size == 7:
+        # Handed out as it arrives, not once the body is complete
+        assert len(chunks) > 100
+
+
+def test_other_fields_are_skipped():
+    body = form(("note", None, None, b"hello"), ("file", "a.mkv", "video/x-matroska", b"data"),
+                ("after", None, None, b"ignored"))
+    upload, chunks = read(body)
+    assert b"".join(chunks) == b"data" and upload.content_type == "video/x-matroska"
+
+
+def test_missing_file_field():
+    with pytest.raises(MultipartError, match="Missing form field: file"):
+        read(form(("other", "a.mp4", "video/mp4", b"data")))
+
+
+def test_truncated_body_is_an_error():
+    body = form(("file", "a.mp4", "video/mp4", b"data" * 100), end=False)[:-50]
+    with pytest.raises(MultipartError, match="Incomplete"):
+        read(body)
+
+
+def test_body_size_is_limited_while_reading():
+    received = []
+
+    async def stream():
+        yield form(("file", "a.mp4", "video/mp4", b""), end=False)[:-2]
+        for _ in range(1000):
+            received.append(1)
+            yield b"x" * 1000
+
+    async def run():
+        upload = MultipartFileStream(stream(), CONTENT_TYPE, max_body_size=10000)
+        async for _ in (await upload.open()).chunks():
+            pass
+
+    with pytest.raises(MultipartError) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 413
+    assert len(received) == 10
+
+
+def test_only_multipart_bodies_are_accepted():
+    with pytest.raises(MultipartError):
+        MultipartFileStream(pieces(b"", 1), "application/json")
+    with pytest.raises(MultipartError):
+        MultipartFileStream(pieces(b"", 1), "multipart/form-data")
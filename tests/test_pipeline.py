@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from pipeline import SubtitlePipeline
+
+
+def chunk(i, size=3):
+    return [
+        {"start": float(i * size + j), "end": i * size + j + 0.5, "text": f"t{i * size + j}"}
+        for j in range(size)
+    ]
+
+
+def translate(segments, language):
+    # Later chunks finish first, so writes must wait for earlier ones
+    time.sleep(0.02 if segments[0]["start"] < 3 else 0.0)
+    if language == "bad":
+        raise ValueError("translation failed")
+    return [f"[{language}]{segment['text']}" for segment in segments]
+
+
+def test_every_language_gets_every_segment_in_order(tmp_path):
+    written = []
+    paths = {language: tmp_path / f"{language}.srt" for language in ("es", "fr")}
+    pipeline = SubtitlePipeline(["es", "fr"], translate, paths, queue_size=2,
+                                on_written=lambda language, segments, texts: written.append((language, len(texts))))
+    pipeline.start()
+    for i in range(5):
+        pipeline.feed(chunk(i))
+    pipeline.feed([])
+    texts = pipeline.finish()
+
+    assert pipeline.fed == 15
+    assert texts["es"] == [f"[es]t{i}" for i in range(15)]
+    assert texts["fr"] == [f"[fr]t{i}" for i in range(15)]
+    assert sorted(written) == sorted([("es", 3)] * 5 + [("fr", 3)] * 5)
+
+    srt = paths["es"].read_text(encoding="utf-8")
+    assert srt.count("-->") == 15
+    assert srt.startswith("1\n00:00:00,000 --> 00:00:00,500\n[es]t0\n")
+    assert "\n15\n00:00:14,000 --> 00:00:14,500\n[es]t14\n" in srt
+
+
+def test_translation_overlaps_feeding(tmp_path):
+    started = threading.Event()
+
+    def slow(segments, language):
+        started.set()
+        time.sleep(0.05)
+        return [segment["text"] for segment in segments]
+
+    pipeline = SubtitlePipeline(["es"], slow, {"es": tmp_path / "es.srt"}).start()
+    pipeline.feed(chunk(0))
+    # Translation starts before the transcription is finished
+    assert started.wait(1)
+    pipeline.feed(chunk(1))
+    assert pipeline.finish()["es"] == [f"t{i}" for i in range(6)]
+
+
+def test_full_queues_hold_back_feed(tmp_path):
+    release = threading.Event()
+
+    def blocked(segments, language):
+        release.wait(5)
+        return [segment["text"] for segment in segments]
+
+    pipeline = SubtitlePipeline(["es"], blocked, {"es": tmp_path / "es.srt"}, queue_size=1,
+                                translate_concurrency=1).start()
+    fed = []
+    feeder = threading.Thread(target=lambda: [fed.append(pipeline.feed(chunk(i))) for i in range(10)])
+    feeder.start()
+    time.sleep(0.2)
+    assert 0 < len(fed) < 10
+    release.set()
+    feeder.join(5)
+    assert len(pipeline.finish()["es"]) == 30
+
+
+def test_a_failing_language_stops_feed_and_finish(tmp_path):
+    paths = {"es": tmp_path / "es.srt", "bad": tmp_path / "bad.srt"}
+    pipeline = SubtitlePipeline(["es", "bad"], translate, paths, queue_size=1).start()
+    with pytest.raises(ValueError, match="translation failed"):
+        for i in range(50):
+            pipeline.feed(chunk(i))
+        pipeline.finish()
+
+
+def test_abort_releases_the_pipeline(tmp_path):
+    pipeline = SubtitlePipeline(["es"], translate, {"es": tmp_path / "es.srt"}, queue_size=1).start()
+    pipeline.feed(chunk(0))
+    pipeline.abort()
+    assert not pipeline._thread.is_alive()
+    with pytest.raises(RuntimeError):
+        pipeline.feed(chunk(1))
+
+
+def test_each_file_is_timed_once(tmp_path):
+    def written_files():
+        return REGISTRY.get_sample_value("app_sub_subtitle_write_seconds_count", {"format": "srt"}) or 0
+
+    before = written_files()
+    paths = {language: tmp_path / f"{language}.srt" for language in ("es", "fr")}
+    pipeline = SubtitlePipeline(["es", "fr"], translate, paths).start()
+    for i in range(3):
+        pipeline.feed(chunk(i))
+    pipeline.finish()
+
+    assert written_files() - before == 2
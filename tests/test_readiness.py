@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from readiness import Readiness
+
+
+def test_steps_run_in_order_and_report_readiness():
+    ran = []
+    readiness = Readiness(retry_seconds=0.01)
+    readiness.add("model", lambda: ran.append("model"))
+    readiness.add("translator", lambda: ran.append("translator"))
+    assert not readiness.ready
+
+    assert readiness.run()
+    assert ran == ["model", "translator"]
+    assert readiness.ready
+    state = readiness.to_dict()
+    assert state["ready"] and state["cold_start_seconds"] >= 0
+    assert {name: step["status"] for name, step in state["steps"].items()} == {"model": "done", "translator": "done"}
+
+
+def test_failing_steps_are_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("download failed")
+
+    readiness = Readiness(retry_seconds=0.01)
+    readiness.add("model", flaky)
+    assert readiness.run()
+    step = readiness.to_dict()["steps"]["model"]
+    assert step["attempts"] == 3 and step["error"] is None
+
+
+def test_stop_ends_the_retries():
+    failed = threading.Event()
+
+    def broken():
+        failed.set()
+        raise OSError("no model")
+
+    readiness = Readiness(retry_seconds=60)
+    readiness.add("model", broken)
+    readiness.start()
+    assert failed.wait(5)
+    readiness.stop()
+    readiness._thread.join(5)
+    assert not readiness._thread.is_alive()
+    assert not readiness.ready
+    step = readiness.to_dict()["steps"]["model"]
+    assert step["status"] == "failed" and step["error"] == "no model"
+
+
+def test_wait_times_out_until_ready():
+    readiness = Readiness()
+    assert asyncio.run(readiness.wait(0.05)) is False
+    readiness.run()
+    assert asyncio.run(readiness.wait(0.05)) is True
+
+
+def test_listening_is_recorded_apart_from_warm_up():
+    readiness = Readiness()
+    readiness.add("step", lambda: None)
+    readiness.start()
+    readiness._thread.join(5)
+    assert readiness.ready and readiness.to_dict()["listening_at"] is None
+    readiness.mark_listening()
+    assert readiness.to_dict()["seconds_to_listen"] >= 0
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from subtitles import (
+    RenderCache, SrtAppender, render, seconds_to_ass_time, seconds_to_srt_time, seconds_to_vtt_time, wrap_text,
+)
+
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": " Hello"},
+    {"start": 3661.25, "end": 3662.0, "text": " {world}"},
+]
+
+
+@pytest.mark.parametrize("seconds, srt, ass", [
+    (0, "00:00:00,000", "0:00:00.00"),
+    (1.5, "00:00:01,500", "0:00:01.50"),
+    (3661.257, "01:01:01,257", "1:01:01.26"),
+    (59.999, "00:00:59,999", "0:01:00.00"),
+])
+def test_timestamps(seconds, srt, ass):
+    assert seconds_to_srt_time(seconds) == srt
+    assert seconds_to_vtt_time(seconds) == srt.replace(",", ".")
+    assert seconds_to_ass_time(seconds) == ass
+
+
+def test_wrap_text():
+    assert wrap_text("  one   two ") == ["one two"]
+    assert wrap_text("the quick brown fox jumps", max_line_length=10) == ["the quick", "brown fox", "jumps"]
+    assert wrap_text("the quick brown fox jumps", max_line_length=10, max_lines=2) == ["the quick", "brown fox jumps"]
+    # A word longer than a line gets a line of its own
+    assert wrap_text("a supercalifragilistic b", max_line_length=5) == ["a", "supercalifragilistic", "b"]
+
+
+def test_srt():
+    body = "".join(render(SEGMENTS, ["Hello", "world"], "srt"))
+    assert body == "1\n00:00:00,000 --> 00:00:01,500\nHello\n\n2\n01:01:01,250 --> 01:01:02,000\nworld\n\n"
+
+
+def test_vtt_starts_with_its_header():
+    body = "".join(render(SEGMENTS, ["Hello", "world"], "vtt"))
+    assert body.startswith("WEBVTT\n\n1\n00:00:00.000 --> 00:00:01.500\nHello\n")
+
+
+def test_json_is_valid_and_keeps_line_breaks():
+    body = "".join(render(SEGMENTS, ["Hello there friend", "mundo"], "json", max_line_length=11))
+    assert json.loads(body) == {"segments": [
+        {"index": 0, "start": 0.0, "end": 1.5, "text": "Hello there\nfriend"},
+        {"index": 1, "start": 3661.25, "end": 3662.0, "text": "mundo"},
+    ]}
+
+
+def test_json_with_no_segments():
+    assert json.loads("".join(render([], [], "json"))) == {"segments": []}
+
+
+def test_ass_escapes_override_braces_and_joins_lines():
+    body = "".join(render(SEGMENTS, ["Hello there friend", "{world}"], "ass", max_line_length=11))
+    assert "[Events]" in body
+    assert "Dialogue: 0,0:00:00.00,0:00:01.50,Default,,0,0,0,,Hello there\\Nfriend\n" in body
+    assert body.endswith(",(world)\n")
+
+
+def test_render_cache_evicts_least_recently_used():
+    cache = RenderCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"
+    cache.put("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+
+
+def test_render_cache_skips_oversized_bodies_and_replaces_keys():
+    cache = RenderCache(max_bytes=10)
+    cache.put("big", b"x" * 11)
+    assert cache.get("big") is None
+    cache.put("a", b"123456")
+    cache.put("a", b"123456")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"123456" and cache.get("b") == b"1234"
+
+
+def test_srt_appender_numbers_cues_across_appends(tmp_path):
+    path = tmp_path / "out.srt"
+    segments = [{"start": 0.0, "end": 1.0}, {"start": 1.0, "end": 2.0}, {"start": 2.0, "end": 3.0}]
+    appender = SrtAppender(path)
+    appender.append(segments[:2], ["one", "two"])
+    # Readable while the file is still being written
+    assert path.read_text(encoding="utf-8").count("-->") == 2
+    appender.append(segments[2:], ["three"])
+    appender.close()
+
+    assert appender.cues == 3
+    assert path.read_text(encoding="utf-8") == "".join(render(segments, ["one", "two", "three"], "srt"))
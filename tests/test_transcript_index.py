@@ -0,0 +1,99 @@
+import pytest
+
+from transcript_index import TranscriptIndex, fts_query
+
+
+def segments(*texts):
+    return [{"start": float(i), "end": i + 1.0, "text": text} for i, text in enumerate(texts)]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TranscriptIndex(tmp_path / "search.db")
+
+
+def test_fts_query_quotes_terms_and_keeps_prefixes():
+    assert fts_query('cats AND "big dogs" run*') == '"cats" "AND" "big dogs" "run"*'
+    assert fts_query('say "hi"there') == '"say" "hi" "there"'
+    assert fts_query('  ""  ') == ""
+
+
+def test_search_matches_every_term_ignoring_accents(index):
+    index.add("f1", "j1", segments("Le café est chaud", "Il fait froid"), language="fr")
+    index.add("f2", "j2", segments("cafe without heat"), language="en")
+
+    results, total = index.search("cafe chaud")
+    assert total == 1
+    assert results[0]["file_id"] == "f1"
+    assert results[0]["job_id"] == "j1"
+    assert [s["text"] for s in results[0]["segments"]] == ["Le café est chaud"]
+
+    assert index.search("cafe", language="en")[1] == 1
+    assert index.search("")[1] == 0
+
+
+def test_files_mentioning_terms_more_often_rank_first(index):
+    # Unrelated files give the term a meaningful IDF
+    for i in range(5):
+        index.add(f"other{i}", "j", segments("nothing to see", "here"))
+    index.add("once", "j", segments("the river", "something else", "more filler"))
+    index.add("often", "j", segments("the river bank", "down the river", "a river again"))
+
+    results, total = index.search("river")
+    assert total == 2
+    assert [r["file_id"] for r in results] == ["often", "once"]
+    assert results[0]["hits"] == 3 and results[1]["hits"] == 1
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_pages_and_total(index):
+    for i in range(7):
+        index.add(f"f{i}", "j", segments(*["alpha"] * (i + 1)))
+    index.add("other", "j", segments("beta"))
+
+    first, total = index.search("alpha", limit=3)
+    assert total == 7
+    assert [r["file_id"] for r in first] == ["f6", "f5", "f4"]
+    last, total = index.search("alpha", limit=3, offset=6)
+    assert [r["file_id"] for r in last] == ["f0"] and total == 7
+    assert index.search("alpha", limit=3, offset=9) == ([], 7)
+
+
+def test_best_hits_per_file_in_playback_order(index):
+    texts = ["filler"] * 10
+    for i in (1, 4, 6, 8):
+        texts[i] = "needle"
+    texts[8] = "needle needle needle"
+    index.add("f", "j", segments(*texts))
+
+    result = index.search("needle", hits_per_file=2)[0][0]
+    assert result["hits"] == 4
+    indexes = [segment["index"] for segment in result["segments"]]
+    assert len(indexes) == 2 and 8 in indexes and indexes == sorted(indexes)
+
+
+def test_reindexing_replaces_the_transcript(index):
+    assert index.add("f", "j1", segments("old words"), model="base", content_hash="h")
+    assert not index.add("f", "j2", segments("old words"), model="base", content_hash="h")
+    assert index.add("f", "j3", segments("new words"), model="small", content_hash="h")
+    assert index.search("old")[1] == 0
+    assert index.search("new")[0][0]["job_id"] == "j3"
+
+    assert index.remove("f")
+    assert index.search("new")[1] == 0
+    assert index.stats() == {"files": 0, "segments": 0}
+
+
+def test_other_decode_settings_replace_the_transcript(index):
+    assert index.add("f", "j1", segments("old words"), model="base", content_hash="h", settings="fast")
+    assert not index.add("f", "j2", segments("old words"), model="base", content_hash="h", settings="fast")
+    assert index.add("f", "j3", segments("new words"), model="base", content_hash="h", settings="accurate")
+    assert index.search("old")[1] == 0
+    assert index.search("new")[0][0]["job_id"] == "j3"
+
+
+def test_backfill_marker_persists(tmp_path):
+    index = TranscriptIndex(tmp_path / "search.db")
+    assert not index.backfilled()
+    index.mark_backfilled()
+    assert TranscriptIndex(tmp_path / "search.db").backfilled()
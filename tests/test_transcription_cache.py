@@ -0,0 +1,45 @@
+import hashlib
+
+from transcription_cache import TranscriptionCache, hash_file, options_key
+
+RESULT = {
+    "text": " hello world",
+    "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " hello world", "tokens": [1, 2]}],
+    "language": "en",
+}
+
+
+def test_hash_file_reads_in_chunks(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"x" * 1000)
+    assert hash_file(path, chunk_size=7) == hashlib.sha256(b"x" * 1000).hexdigest()
+
+
+def test_options_key_ignores_order():
+    assert options_key({"a": 1, "b": 2}) == options_key({"b": 2, "a": 1})
+    assert options_key(None) == options_key({})
+
+
+def test_lookup_is_keyed_by_hash_model_and_options(tmp_path):
+    cache = TranscriptionCache(tmp_path / "t.db")
+    cache.put("abc", "base", {"beam_size": 5}, RESULT)
+    assert cache.get("abc", "base", {"beam_size": 5}) == RESULT
+    assert cache.get("abc", "small", {"beam_size": 5}) is None
+    assert cache.get("abc", "base", {}) is None
+    assert cache.get("def", "base", {"beam_size": 5}) is None
+
+
+def test_results_persist_and_can_be_replaced(tmp_path):
+    TranscriptionCache(tmp_path / "t.db").put("abc", "base", None, RESULT)
+    cache = TranscriptionCache(tmp_path / "t.db")
+    assert cache.get("abc", "base")["language"] == "en"
+    cache.put("abc", "base", None, dict(RESULT, language="es"))
+    assert cache.get("abc", "base")["language"] == "es"
+
+
+def test_the_detection_probability_is_kept(tmp_path):
+    cache = TranscriptionCache(tmp_path / "t.db")
+    cache.put("abc", "base", None, dict(RESULT, language_probability=0.92))
+    assert cache.get("abc", "base")["language_probability"] == 0.92
+    cache.put("abc", "base", None, RESULT)
+    assert "language_probability" not in cache.get("abc", "base")
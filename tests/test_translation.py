@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from inference import reliable_language
+from translation import (
+    GoogleTranslatorBackend, IdentityTranslatorBackend, TranslatorBackend, create_backend, make_batches,
+    needs_translation, pack_texts, translate_segments, unpack_texts,
+)
+
+
+class RecordingBackend(TranslatorBackend):
+    """Upper-cases texts and records every batch it is sent"""
+
+    name = "recording"
+
+    def __init__(self, fail=lambda texts: False):
+        self.fail = fail
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts, target_language):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail(texts):
+            raise RuntimeError("engine error")
+        return [f"{target_language}:{text.upper()}" for text in texts]
+
+
+def test_pack_and_unpack_round_trip():
+    texts = ["Hello there", "multi\nline   text", "[x] brackets"]
+    packed = pack_texts(texts)
+    assert packed.count("\n") == 2
+    assert unpack_texts(packed, 3) == ["Hello there", "multi line text", "[x] brackets"]
+
+
+def test_unpack_tolerates_spaces_inside_markers():
+    assert unpack_texts("[[ 0 ]] Hola\n[[1 ]] Mundo", 2) == ["Hola", "Mundo"]
+
+
+@pytest.mark.parametrize("packed", [
+    "[[0]] Hola",                # a marker went missing
+    "Prefix [[0]] Hola [[1]] x",  # text before the first marker
+    "[[0]] Hola [[2]] Mundo",    # a marker was renumbered
+])
+def test_unpack_detects_mangled_markers(packed):
+    assert unpack_texts(packed, 2) is None
+
+
+def test_make_batches_bounds_count_and_size():
+    texts = ["a" * 10] * 7
+    assert make_batches(texts, batch_size=3, max_chars=1000) == [[0, 1, 2], [3, 4, 5], [6]]
+    # Each packed line costs the text plus marker overhead (17 chars here)
+    assert make_batches(texts, batch_size=50, max_chars=40) == [[0, 1], [2, 3], [4, 5], [6]]
+    # An oversized text still gets a batch of its own
+    assert make_batches(["a" * 100, "b"], batch_size=50, max_chars=40) == [[0], [1]]
+
+
+def test_translate_segments_translates_each_distinct_text_once():
+    backend = RecordingBackend()
+    progress = []
+    result = translate_segments(["hi", "", "bye", "hi"], "es", backend, batch_size=10,
+                                progress_callback=progress.append)
+    assert result == ["es:HI", "", "es:BYE", "es:HI"]
+    assert backend.batches == [["hi", "bye"]]
+    assert progress == [1.0]
+
+
+def test_failed_batch_falls_back_to_single_texts_and_keeps_originals():
+    backend = RecordingBackend(fail=lambda texts: len(texts) > 1 or texts == ["bad"])
+    result = translate_segments(["one", "bad", "two"], "fr", backend, batch_size=10)
+    assert result == ["fr:ONE", "bad", "fr:TWO"]
+    assert backend.batches[0] == ["one", "bad", "two"]
+    assert sorted(backend.batches[1:]) == [["bad"], ["one"], ["two"]]
+
+
+def test_results_line_up_with_concurrent_batches():
+    backend = RecordingBackend()
+    texts = [f"text {i}" for i in range(23)]
+    result = translate_segments(texts, "de", backend, batch_size=4, concurrency=3)
+    assert result == [f"de:TEXT {i}" for i in range(23)]
+    assert len(backend.batches) == 6
+
+
+def test_google_backend_falls_back_when_markers_are_lost():
+    class Translated:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeTranslator:
+        def translate(self, text, dest):
+            # Mangles markers in packed bodies
+            return Translated(text.replace("[[", "(").upper())
+
+    backend = GoogleTranslatorBackend()
+    backend._local.translator = FakeTranslator()
+    assert backend.translate_batch(["a", "b"], "es") == ["A", "B"]
+
+
+def test_create_backend():
+    assert isinstance(create_backend("identity"), IdentityTranslatorBackend)
+    with pytest.raises(ValueError):
+        create_backend("nope")
+
+
+def test_needs_translation_skips_original_and_the_spoken_language():
+    assert not needs_translation(None)
+    assert not needs_translation("original", "en")
+    assert not needs_translation("FR", "fr")
+    assert needs_translation("fr", "en")
+    assert needs_translation("fr")
+
+
+def test_only_a_confident_detection_skips_translation():
+    confident = {"language": "fr", "probability": 0.95, "source": "detected"}
+    unsure = {"language": "fr", "probability": 0.55, "source": "detected"}
+    assert not needs_translation("fr", reliable_language(confident, 0.8))
+    assert needs_translation("fr", reliable_language(unsure, 0.8))
+    assert not needs_translation("fr", reliable_language({"language": "fr", "source": "client"}, 0.8))
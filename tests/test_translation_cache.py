@@ -0,0 +1,65 @@
+import pytest
+
+from translation_cache import TranslationCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranslationCache(tmp_path / "translations.db")
+
+
+def test_disk_level_survives_a_new_instance(tmp_path):
+    cache = TranslationCache(tmp_path / "t.db")
+    cache.put_many({"hello": "hola"}, "es", "google")
+    assert cache.get_many(["hello", "bye"], "es", "google") == {"hello": "hola"}
+    assert cache.memory_hits == 1 and cache.misses == 1
+
+    reopened = TranslationCache(tmp_path / "t.db")
+    assert reopened.get_many(["hello"], "es", "google") == {"hello": "hola"}
+    assert reopened.disk_hits == 1
+    # A disk hit is promoted to memory
+    reopened.get_many(["hello"], "es", "google")
+    assert reopened.memory_hits == 1
+
+
+def test_keys_include_language_and_backend(cache):
+    cache.put_many({"hello": "hola"}, "es", "google")
+    assert cache.get_many(["hello"], "fr", "google") == {}
+    assert cache.get_many(["hello"], "es", "identity") == {}
+
+
+def test_memory_level_is_bounded_by_bytes(tmp_path):
+    cache = TranslationCache(tmp_path / "t.db", max_memory_bytes=20)
+    cache.put_many({"aaaa": "1111", "bbbb": "2222"}, "es", "google")
+    cache.put_many({"cccc": "3333"}, "es", "google")
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2 and stats["memory_bytes"] == 16
+    assert stats["disk_entries"] == 3
+    # The evicted entry is still on disk
+    assert cache.get_many(["aaaa"], "es", "google") == {"aaaa": "1111"}
+    assert cache.disk_hits == 1
+
+
+@pytest.mark.parametrize("query, purged", [
+    ("ÉTÉ", {"Un été chaud"}),
+    ("50%", {"50% off"}),
+    ("a_b", {"a_b"}),
+])
+def test_purge_matches_the_same_entries_on_both_levels(cache, query, purged):
+    texts = ["Un été chaud", "50% off", "5000 off", "a_b", "axb"]
+    cache.put_many({text: text.upper() for text in texts}, "es", "google")
+    assert cache.purge(query=query) == len(purged)
+
+    kept = set(texts) - purged
+    assert {entry["source_text"] for entry in cache.entries()} == kept
+    # Nothing purged from disk may linger in memory
+    assert set(cache.get_many(texts, "es", "google")) == kept
+    assert cache.disk_hits == 0
+
+
+def test_purge_by_language(cache):
+    cache.put_many({"hello": "hola"}, "es", "google")
+    cache.put_many({"hello": "bonjour"}, "fr", "google")
+    assert cache.purge(target_language="es") == 1
+    assert cache.get_many(["hello"], "es", "google") == {}
+    assert cache.get_many(["hello"], "fr", "google") == {"hello": "bonjour"}
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE
+from vad import FRAME_SAMPLES, SpeechMap, find_speech, runs
+
+
+def signal(*parts):
+    """Concatenate (seconds, frequency, amplitude) pieces over faint noise; frequency None is silence"""
+    rng = np.random.default_rng(0)
+    pieces = []
+    for seconds, frequency, amplitude in parts:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        piece = rng.normal(0, 1e-4, len(t))
+        if frequency:
+            piece += amplitude * np.sin(2 * np.pi * frequency * t)
+        pieces.append(piece)
+    return np.concatenate(pieces).astype(np.float32)
+
+
+def seconds(spans):
+    return [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in spans]
+
+
+def test_runs():
+    starts, ends = runs(np.array([False, True, True, False, True]))
+    assert starts.tolist() == [1, 4] and ends.tolist() == [3, 5]
+
+
+def test_tones_between_silences_are_found_with_padding():
+    audio = signal((1, None, 0), (2, 300, 0.3), (3, None, 0), (1, 440, 0.3), (1, None, 0))
+    spans = seconds(find_speech(audio))
+    assert spans == [pytest.approx((0.8, 3.2)), pytest.approx((5.8, 7.2))]
+
+
+def test_short_pauses_are_kept_and_blips_dropped():
+    audio = signal((1, None, 0), (1, 300, 0.3), (0.5, None, 0), (1, 300, 0.3), (2, None, 0),
+                   (0.1, 300, 0.3), (2, None, 0))
+    spans = seconds(find_speech(audio))
+    assert spans == [pytest.approx((0.8, 3.7))]
+
+
+def test_hum_outside_the_speech_band_is_not_speech():
+    audio = signal((2, None, 0), (2, 50, 0.3), (2, None, 0))
+    assert find_speech(audio) == []
+
+
+def test_trailing_partial_frame_stays_with_the_last_span():
+    audio = signal((1, None, 0), (1, 300, 0.3))[:-FRAME_SAMPLES // 2]
+    assert find_speech(audio)[-1][1] == len(audio)
+    assert find_speech(np.zeros(10, dtype=np.float32)) == [(0, 10)]
+
+
+def test_compact_lays_spans_back_to_back():
+    audio = np.arange(100, dtype=np.float32)
+    speech_map = SpeechMap([(10, 20), (50, 60)], len(audio))
+    assert speech_map.compact(audio).tolist() == list(range(10, 20)) + list(range(50, 60))
+
+    whole = SpeechMap([(0, 100)], len(audio))
+    assert whole.compact(audio) is audio
+
+
+def test_to_original_maps_times_and_seams():
+    second = SAMPLE_RATE
+    speech_map = SpeechMap([(1 * second, 3 * second), (10 * second, 12 * second)], 20 * second)
+    assert speech_map.to_original(0.5) == 1.5
+    assert speech_map.to_original(3.0) == 11.0
+    # The seam between the spans
+    assert speech_map.to_original(2.0) == 10.0
+    assert speech_map.to_original(2.0, is_end=True) == 3.0
+    # Times past the speech are held at the end of the last span
+    assert speech_map.to_original(9.0) == 12.0
+    assert SpeechMap([], 100).to_original(1.25) == 1.25
+
+
+def test_restore_segments_and_stats():
+    second = SAMPLE_RATE
+    speech_map = SpeechMap([(1 * second, 3 * second), (10 * second, 12 * second)], 20 * second)
+    segments = [{"start": 0.0, "end": 2.0, "text": "a"}, {"start": 2.0, "end": 4.0, "text": "b"}]
+    restored = speech_map.restore_segments(segments)
+    assert [(s["start"], s["end"], s["text"]) for s in restored] == [(1.0, 3.0, "a"), (10.0, 12.0, "b")]
+    assert segments[0]["start"] == 0.0
+
+    assert speech_map.stats() == {
+        "audio_seconds": 20.0, "speech_seconds": 4.0, "skipped_seconds": 16.0, "speech_ratio": 0.2, "spans": 2,
+    }